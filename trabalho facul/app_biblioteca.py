@@ -1,27 +1,200 @@
+import time
+_INICIO = time.perf_counter()  # Referência das fases de inicialização (antes das demais importações)
+
+import argparse
+import json
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import database as db  # Nosso módulo para interagir com o banco de dados SQLite
+import instrumentacao  # Configuração das métricas do banco (janela de estatísticas)
+from executor_banco import ExecutorBanco  # Roda as operações de banco fora da thread da interface
+from perfil_interface import LIMITE_TRAVAMENTO_MS, PerfilInterface  # Modo --perfilar
+from seletor_autores import IndicePrefixoAutores, SeletorAutores  # Escolha de autor por digitação
+
+ATRASO_BUSCA_MS = 250  # Pausa na digitação antes de disparar a busca de livros
+INTERVALO_MUDANCAS_MS = 1000  # Frequência da verificação de mudanças feitas por outras estações
+
+# --- TEMPOS DE INICIALIZAÇÃO ---
+# Instante (ms desde o início da importação deste módulo) em que cada fase terminou:
+# importação dos módulos, conferência do esquema, primeira pintura da janela e
+# dados da primeira tela exibidos. Servem para acompanhar regressões no início.
+FASES_INICIALIZACAO = (("importacao", "importação"), ("esquema", "esquema"),
+                       ("primeira_pintura", "primeira pintura"), ("dados_prontos", "dados prontos"))
+tempos_inicializacao = {}
+
+def marcar_fase(fase):
+    """Registra o fim de uma fase da inicialização (só a primeira marcação de cada fase vale)."""
+    tempos_inicializacao.setdefault(fase, (time.perf_counter() - _INICIO) * 1000)
+
+def resumo_inicializacao():
+    """Texto com os tempos das fases já concluídas, ex.: 'importação 45 ms, esquema 52 ms, ...'."""
+    return ", ".join(f"{rotulo} {tempos_inicializacao[fase]:.0f} ms"
+                     for fase, rotulo in FASES_INICIALIZACAO if fase in tempos_inicializacao)
+
+marcar_fase("importacao")
+
+# --- ATUALIZAÇÃO INCREMENTAL DAS TREEVIEWS ---
+def sincronizar_treeview(tree, linhas, valores_exibidos):
+    """
+    Faz a Treeview exibir 'linhas' (tuplas de valores, na ordem desejada) aplicando
+    apenas as diferenças: remove os itens que sumiram, altera os que mudaram e
+    insere os novos. O ID do registro (coluna 0) é usado como iid do item, então a
+    seleção e a posição de rolagem são preservadas.
+    'valores_exibidos' é o dicionário {iid: valores} mantido para essa Treeview;
+    ele evita consultar o Tk item a item para descobrir o que mudou.
+    """
+    novos = {str(linha[0]): tuple(linha) for linha in linhas}
+
+    removidos = [iid for iid in valores_exibidos if iid not in novos]
+    if removidos:
+        tree.delete(*removidos)
+        for iid in removidos:
+            del valores_exibidos[iid]
+
+    ordem_atual = list(tree.get_children())
+    for posicao, (iid, valores) in enumerate(novos.items()):
+        if iid not in valores_exibidos:
+            tree.insert("", posicao, iid=iid, values=valores)
+            ordem_atual.insert(posicao, iid)
+        else:
+            if valores_exibidos[iid] != valores:
+                tree.item(iid, values=valores)
+            if ordem_atual[posicao] != iid: # Mudou de posição (ex.: título alterado)
+                tree.move(iid, "", posicao)
+                ordem_atual.remove(iid)
+                ordem_atual.insert(posicao, iid)
+        valores_exibidos[iid] = valores
+
+def _posicao_ordenada(chaves, chave, decrescente):
+    """Posição de 'chave' na lista 'chaves', já ordenada (crescente ou decrescente)."""
+    inicio, fim = 0, len(chaves)
+    while inicio < fim:
+        meio = (inicio + fim) // 2
+        if (chaves[meio] > chave) if decrescente else (chaves[meio] < chave):
+            inicio = meio + 1
+        else:
+            fim = meio
+    return inicio
+
+def aplicar_linhas_alteradas(tree, ids, linhas, valores_exibidos, chave_de, decrescente=False, chave_limite=None):
+    """
+    Aplica na Treeview só os registros 'ids' (ex.: alterados por outra estação),
+    sem reler a lista inteira. 'linhas' são os que ainda existem e passam pelos
+    filtros da tela (os demais ids saem da lista); cada uma vai para a posição
+    dada por chave_de(valores) na ordem atual. Com 'chave_limite' (chave da última
+    linha carregada numa lista paginada), linhas além dela não são inseridas:
+    aparecem quando a página delas for carregada.
+    """
+    novas = {str(linha[0]): tuple(linha) for linha in linhas}
+    afetados = [iid for iid in map(str, ids) if iid in valores_exibidos]
+    if afetados:
+        tree.detach(*afetados) # Saem da ordem atual; move() os recoloca no lugar certo
+    ordem = list(tree.get_children())
+    chaves = [chave_de(valores_exibidos[iid]) for iid in ordem]
+
+    for iid, valores in novas.items():
+        chave = chave_de(valores)
+        if chave_limite is not None and ((chave < chave_limite) if decrescente else (chave > chave_limite)):
+            continue
+        posicao = _posicao_ordenada(chaves, chave, decrescente)
+        if iid in valores_exibidos:
+            tree.move(iid, "", posicao)
+            tree.item(iid, values=valores)
+        else:
+            tree.insert("", posicao, iid=iid, values=valores)
+        ordem.insert(posicao, iid)
+        chaves.insert(posicao, chave)
+        valores_exibidos[iid] = valores
+
+    recolocados = set(ordem)
+    removidos = [iid for iid in afetados if iid not in recolocados]
+    if removidos:
+        tree.delete(*removidos)
+        for iid in removidos:
+            del valores_exibidos[iid]
+
+def indicar_ordenacao(tree, titulos, coluna_ordenada, decrescente):
+    """Mostra nos cabeçalhos da Treeview qual coluna ordena a lista e em que sentido."""
+    for coluna, titulo in titulos.items():
+        seta = (" ▼" if decrescente else " ▲") if coluna == coluna_ordenada else ""
+        tree.heading(coluna, text=titulo + seta)
+
+def inteiro_ou_none(texto):
+    """Converte o texto de um campo de filtro numérico; vazio ou inválido vira None (sem filtro)."""
+    texto = texto.strip()
+    return int(texto) if texto.isdigit() else None
+
 
 # --- CLASSE PRINCIPAL DA APLICAÇÃO ---
 class AppBiblioteca(tk.Tk):
-    def __init__(self):
+    def __init__(self, inicio_rapido=True, ao_ficar_pronta=None, espelho_memoria=False,
+                 perfil_interface=False, limite_travamento_ms=LIMITE_TRAVAMENTO_MS):
+        """
+        Com inicio_rapido=True a janela aparece sem esperar pelo banco: o esquema é
+        conferido pela versão (db.preparar_banco, sem DDL se já estiver em dia) na
+        thread de banco e os dados da primeira tela só são pedidos depois da
+        primeira pintura. 'ao_ficar_pronta' é chamada quando esses dados aparecem.
+        Com espelho_memoria=True as leituras passam a ser feitas numa cópia do banco
+        em memória (db.ativar_espelho), criada logo após o esquema.
+        Com perfil_interface=True os handlers da interface são medidos (tempo em
+        banco x em widgets) e os travamentos acima de limite_travamento_ms são
+        registrados; o relatório é impresso ao fechar (ver perfil_interface.py).
+        """
         super().__init__()
+        self.perfil = None
+        if perfil_interface:
+            # Antes de criar os widgets: só os callbacks registrados depois são medidos
+            if not instrumentacao.CONFIG_INSTRUMENTACAO["ativo"]: # O tempo em banco vem das métricas
+                db.configurar_instrumentacao()
+            self.perfil = PerfilInterface(self, limite_travamento_ms=limite_travamento_ms)
+            self.perfil.iniciar()
         self.title("Sistema de Gerenciamento de Biblioteca")
         self.geometry("850x650") # Um pouco maior para melhor visualização
         self.minsize(700, 500) # Tamanho mínimo da janela
+        self.ao_ficar_pronta = ao_ficar_pronta
 
-        # Chamada para criar/verificar tabelas no banco de dados ao iniciar
-        # Esta função está definida em database.py
-        db.criar_tabelas()
+        if not inicio_rapido:
+            # Chamada para criar/verificar tabelas no banco de dados ao iniciar
+            # Esta função está definida em database.py
+            db.criar_tabelas()
+            marcar_fase("esquema")
+            if espelho_memoria:
+                db.ativar_espelho()
+
+        # Barra de status com o indicador de atividade do banco de dados
+        self.barra_status = ttk.Frame(self, padding=(10, 2))
+        self.barra_status.pack(side="bottom", fill="x")
+        self.rotulo_status = ttk.Label(self.barra_status, text="")
+        self.rotulo_status.pack(side="left")
+        self.indicador_ocupado = ttk.Progressbar(self.barra_status, mode="indeterminate", length=120)
+
+        # As consultas e alterações no banco rodam numa thread de trabalho; os
+        # resultados voltam para a interface pelos callbacks (ver executor_banco.py)
+        self.executor = ExecutorBanco(self, ao_mudar_ocupado=self._indicar_ocupado,
+                                      ao_falhar_padrao=self._mostrar_erro_banco, perfil=self.perfil)
+        self.protocol("WM_DELETE_WINDOW", self.encerrar)
+        if inicio_rapido:
+            # Primeiro pedido da fila: os que vierem depois só rodam com o esquema pronto
+            self.executor.submeter(self._preparar_esquema, espelho_memoria, ao_concluir=self._ao_preparar_esquema)
 
         # Container principal onde as diferentes "telas" (frames) serão exibidas
         self.container = ttk.Frame(self, padding="10")
         self.container.pack(fill="both", expand=True)
 
         self.frames = {}  # Dicionário para armazenar as instâncias dos frames
+        self.tela_atual = None  # Frame exibido no momento
 
         self._criar_menus_navegacao_ajuda()
-        self.mostrar_tela(AutoresFrame) # Inicia mostrando a tela de autores
+        self.mostrar_tela(AutoresFrame, carregar=not inicio_rapido) # Inicia mostrando a tela de autores
+        if inicio_rapido:
+            self.after_idle(self._apos_primeira_pintura)
+
+        # Mudanças feitas por outras estações: o monitor roda na thread de banco
+        # (PRAGMA data_version é por conexão) e as telas aplicam só o que mudou
+        self.monitor_mudancas = db.MonitorMudancas()
+        self.executor.submeter(self.monitor_mudancas.verificar, silencioso=True) # Ponto de partida
+        self.after(INTERVALO_MUDANCAS_MS, self._verificar_mudancas)
 
     def _criar_menus_navegacao_ajuda(self):
         """Cria a barra de menus superior da aplicação."""
@@ -33,19 +206,33 @@ class AppBiblioteca(tk.Tk):
         menubar.add_cascade(label="Navegação", menu=menu_navegacao)
         menu_navegacao.add_command(label="Gerenciar Autores", command=lambda: self.mostrar_tela(AutoresFrame))
         menu_navegacao.add_command(label="Gerenciar Livros", command=lambda: self.mostrar_tela(LivrosFrame))
+        menu_navegacao.add_command(label="Painel do Catálogo", command=lambda: self.mostrar_tela(PainelFrame))
         menu_navegacao.add_separator()
-        menu_navegacao.add_command(label="Sair", command=self.quit)
+        menu_navegacao.add_command(label="Sair", command=self.encerrar)
+
+        # Menu "Exportar"
+        menu_exportar = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Exportar", menu=menu_exportar)
+        menu_exportar.add_command(label="Catálogo em CSV...", command=lambda: self._exportar_catalogo("csv"))
+        menu_exportar.add_command(label="Catálogo em JSON Lines...", command=lambda: self._exportar_catalogo("jsonl"))
+
+        # Menu "Backup"
+        menu_backup = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Backup", menu=menu_backup)
+        menu_backup.add_command(label="Fazer Backup Agora", command=self._fazer_backup)
 
         # Menu "Ajuda"
         menu_ajuda = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Ajuda", menu=menu_ajuda)
+        menu_ajuda.add_command(label="Estatísticas do Banco de Dados", command=self._mostrar_estatisticas_banco)
         menu_ajuda.add_command(label="Sobre o Sistema", command=self._mostrar_dialogo_sobre)
 
-    def mostrar_tela(self, classe_frame):
+    def mostrar_tela(self, classe_frame, carregar=True):
         """Gerencia a exibição das telas (frames) no container principal."""
-        # Destroi widgets do frame anterior para limpar o container
-        for widget in self.container.winfo_children():
-            widget.destroy()
+        # As telas ficam vivas: a anterior só é escondida, e voltar a ela não
+        # recria os widgets nem perde a lista já carregada
+        if self.tela_atual is not None:
+            self.tela_atual.pack_forget()
 
         # Cria uma nova instância do frame ou reutiliza uma existente (se não foi destruída)
         frame = self.frames.get(classe_frame)
@@ -53,15 +240,135 @@ class AppBiblioteca(tk.Tk):
             frame = classe_frame(self.container, self)  # Passa o container e a instância da app
             self.frames[classe_frame] = frame
         frame.pack(fill="both", expand=True)
+        self.tela_atual = frame
 
         # Atualiza título e dados da tela
         if classe_frame == AutoresFrame:
             self.title("Biblioteca - Gerenciar Autores")
-            frame.atualizar_lista_autores() # Garante que a lista de autores seja carregada/atualizada
         elif classe_frame == LivrosFrame:
             self.title("Biblioteca - Gerenciar Livros")
-            frame.atualizar_combobox_autores() # Essencial para o cadastro de livros
+        elif classe_frame == PainelFrame:
+            self.title("Biblioteca - Painel do Catálogo")
+        if carregar:
+            self._carregar_tela(frame)
+
+    def _carregar_tela(self, frame):
+        """Pede (em segundo plano) os dados da tela; as listas aplicam só as diferenças."""
+        if isinstance(frame, AutoresFrame):
+            frame.atualizar_lista_autores() # Garante que a lista de autores seja carregada/atualizada
+        elif isinstance(frame, LivrosFrame):
+            frame.atualizar_seletor_autores() # Essencial para o cadastro de livros
             frame.atualizar_lista_livros()   # Garante que a lista de livros seja carregada/atualizada
+        elif isinstance(frame, PainelFrame):
+            frame.atualizar_painel()
+
+    @staticmethod
+    def _preparar_esquema(espelho_memoria=False):
+        """Roda na thread de banco: confere o esquema pela versão e só roda DDL se preciso."""
+        pronto = db.preparar_banco()
+        marcar_fase("esquema")
+        if pronto and espelho_memoria:
+            db.ativar_espelho() # Se falhar, as leituras simplesmente continuam no arquivo
+        return pronto
+
+    def _ao_preparar_esquema(self, pronto):
+        if not pronto:
+            messagebox.showerror("Erro no Banco de Dados",
+                                 f"Não foi possível preparar o banco de dados '{db.DB_NAME}'. Veja o console para detalhes.")
+
+    def _apos_primeira_pintura(self):
+        """Início rápido: a janela já foi desenhada; agora pede os dados da primeira tela."""
+        self.update_idletasks() # Conclui os desenhos ainda pendentes
+        marcar_fase("primeira_pintura")
+        self._carregar_tela(self.tela_atual)
+
+    def registrar_dados_exibidos(self):
+        """Chamado pelas telas ao exibir dados: na primeira vez, fecha a medição do início."""
+        if "dados_prontos" in tempos_inicializacao:
+            return
+        marcar_fase("dados_prontos")
+        # Depois da primeira tela: monta o índice do "Você quis dizer...?" do cadastro de
+        # autores numa thread própria, sem ocupar a fila de operações do banco
+        db.preparar_indice_semelhanca()
+        print(f"Inicialização: {resumo_inicializacao()}")
+        if self.ao_ficar_pronta:
+            self.ao_ficar_pronta()
+
+    def _verificar_mudancas(self):
+        """Pede, a cada INTERVALO_MUDANCAS_MS, as mudanças gravadas por outras estações."""
+        self.executor.submeter(self.monitor_mudancas.verificar, ao_concluir=self._aplicar_mudancas,
+                               ao_falhar=lambda erro: print(f"Erro ao verificar mudanças: {erro!r}"),
+                               chave="mudancas", silencioso=True)
+        self.after(INTERVALO_MUDANCAS_MS, self._verificar_mudancas)
+
+    def _aplicar_mudancas(self, mudancas):
+        """Repassa as mudanças (ver db.mudancas_desde) às telas já criadas."""
+        if mudancas is None:
+            return
+        for frame in self.frames.values():
+            if not frame.winfo_exists():
+                continue
+            if mudancas["completo"]:
+                frame.aplicar_mudancas(mudancas)
+            else: # Parte das mudanças foi podada do registro: relê a tela
+                self._carregar_tela(frame)
+
+    def _indicar_ocupado(self, ocupado):
+        """Mostra/esconde o indicador de atividade enquanto há operações de banco pendentes."""
+        if ocupado:
+            self.rotulo_status.config(text="Acessando o banco de dados...")
+            self.indicador_ocupado.pack(side="right")
+            self.indicador_ocupado.start(15)
+        else:
+            self.indicador_ocupado.stop()
+            self.indicador_ocupado.pack_forget()
+            self.rotulo_status.config(text="")
+
+    def _mostrar_erro_banco(self, erro):
+        """Exibe falhas das operações em segundo plano, distinguindo banco travado de outros erros."""
+        if isinstance(erro, db.BancoOcupadoError):
+            messagebox.showwarning("Banco de Dados Ocupado",
+                                   "O banco de dados está sendo usado por outra estação e continuou travado.\n"
+                                   "Nenhuma alteração foi feita; tente novamente em instantes.")
+        else:
+            messagebox.showerror("Erro no Banco de Dados", f"Ocorreu um erro inesperado: {erro}")
+
+    def encerrar(self):
+        """Finaliza a thread de banco de dados e fecha a janela."""
+        self.executor.encerrar()
+        if self.perfil is not None:
+            self.perfil.encerrar() # Imprime o relatório por handler
+        self.destroy()
+
+    def _exportar_catalogo(self, formato):
+        """Pergunta o arquivo de destino e exporta o catálogo com uma janela de progresso."""
+        janela = getattr(self, "janela_exportacao", None)
+        if janela is not None and janela.winfo_exists():
+            janela.lift()
+            return
+        extensao = ".csv" if formato == "csv" else ".jsonl"
+        caminho = filedialog.asksaveasfilename(
+            parent=self, title="Exportar Catálogo", defaultextension=extensao,
+            initialfile=f"catalogo{extensao}",
+            filetypes=[(f"{formato.upper()}", f"*{extensao}"), (f"{formato.upper()} compactado", f"*{extensao}.gz")])
+        if caminho:
+            self.janela_exportacao = JanelaExportacao(self, caminho, formato)
+
+    def _fazer_backup(self):
+        """Faz um backup online do banco, com uma janela de progresso."""
+        janela = getattr(self, "janela_backup", None)
+        if janela is not None and janela.winfo_exists():
+            janela.lift()
+            return
+        self.janela_backup = JanelaBackup(self)
+
+    def _mostrar_estatisticas_banco(self):
+        """Abre (ou traz para frente) a janela com os contadores do banco de dados."""
+        janela = getattr(self, "janela_estatisticas", None)
+        if janela is not None and janela.winfo_exists():
+            janela.lift()
+            return
+        self.janela_estatisticas = JanelaEstatisticas(self)
 
     def _mostrar_dialogo_sobre(self):
         """Exibe a caixa de diálogo 'Sobre' com os créditos."""
@@ -82,12 +389,233 @@ class AppBiblioteca(tk.Tk):
         messagebox.showinfo(titulo_janela, mensagem)
 
 
+# --- JANELA DE ESTATÍSTICAS DO BANCO DE DADOS (menu Ajuda) ---
+class JanelaEstatisticas(tk.Toplevel):
+    """Mostra, atualizando a cada segundo, as métricas coletadas pelo módulo database."""
+    INTERVALO_ATUALIZACAO_MS = 1000
+
+    def __init__(self, app_controller):
+        super().__init__(app_controller)
+        self.title("Estatísticas do Banco de Dados")
+        self.geometry("760x420")
+
+        colunas = ("funcao", "chamadas", "media_ms", "max_ms", "linhas", "lentas", "erros")
+        self.tree_metricas = ttk.Treeview(self, columns=colunas, show="headings")
+        for coluna, titulo, largura in (("funcao", "Função", 220), ("chamadas", "Chamadas", 80),
+                                        ("media_ms", "Média (ms)", 90), ("max_ms", "Máx. (ms)", 90),
+                                        ("linhas", "Linhas", 80), ("lentas", "Lentas", 60), ("erros", "Erros", 60)):
+            self.tree_metricas.heading(coluna, text=titulo)
+            self.tree_metricas.column(coluna, width=largura, anchor="w" if coluna == "funcao" else "e")
+        self.tree_metricas.pack(padx=10, pady=(10, 5), fill="both", expand=True)
+        self.metricas_exibidas = {}  # iid -> valores exibidos (ver sincronizar_treeview)
+
+        self.rotulo_resumo = ttk.Label(self, text="", justify="left")
+        self.rotulo_resumo.pack(padx=10, pady=(0, 5), anchor="w")
+
+        # A coleta vem desligada (custa um pouco em cada chamada); liga-se por aqui ou pela linha de comando
+        config = instrumentacao.CONFIG_INSTRUMENTACAO
+        self.var_coletar = tk.BooleanVar(value=config["ativo"])
+        self.var_capturar_sql = tk.BooleanVar(value=config["capturar_sql"])
+        frame_opcoes = ttk.Frame(self)
+        frame_opcoes.pack(padx=10, pady=(0, 10), anchor="w")
+        ttk.Checkbutton(frame_opcoes, text="Coletar métricas", variable=self.var_coletar,
+                        command=self._configurar_coleta).pack(side="left")
+        self.check_capturar_sql = ttk.Checkbutton(frame_opcoes, text="Registrar SQL das consultas lentas",
+                                                  variable=self.var_capturar_sql, command=self._configurar_coleta)
+        self.check_capturar_sql.pack(side="left", padx=(15, 0))
+        if not config["ativo"]:
+            self.check_capturar_sql.state(["disabled"])
+
+        self._atualizar()
+
+    def _atualizar(self):
+        if not self.winfo_exists():
+            return
+        retrato = db.estatisticas_banco() # Só lê contadores em memória: não acessa o banco
+        linhas = [(nome, m["chamadas"], f"{m['media_ms']:.3f}", f"{m['max_ms']:.3f}", m["linhas"], m["lentas"], m["erros"])
+                  for nome, m in sorted(retrato["funcoes"].items())]
+        sincronizar_treeview(self.tree_metricas, linhas, self.metricas_exibidas)
+        cache = retrato["cache_autores"]
+        concorrencia = retrato["concorrencia"]
+        espelho = retrato["espelho"]
+        if espelho["ativo"]:
+            linha_espelho = (f"Espelho em memória: {espelho['bytes'] / 1024 / 1024:.1f} MB, "
+                             f"{espelho['sincronizacoes']} sincronizações, "
+                             f"{espelho['registros_aplicados']} registros aplicados, {espelho['recargas']} recargas")
+        else:
+            linha_espelho = "Espelho em memória: desativado"
+        self.rotulo_resumo.config(text=(
+            f"Cache de autores: {cache['acertos']} acertos, {cache['faltas']} faltas, "
+            f"{cache['invalidacoes']} invalidações\n"
+            f"Escritas: {concorrencia['escritas']} concluídas, {concorrencia['retentativas']} retentativas, "
+            f"{concorrencia['falhas_por_bloqueio']} falhas por banco travado\n"
+            f"{linha_espelho}\n"
+            f"Inicialização: {resumo_inicializacao()}"))
+        self.after(self.INTERVALO_ATUALIZACAO_MS, self._atualizar)
+
+    def _configurar_coleta(self):
+        """Aplica as opções de coleta (só altera a configuração em memória, sem acessar o banco)."""
+        coletar = self.var_coletar.get()
+        if not coletar:
+            self.var_capturar_sql.set(False)
+        self.check_capturar_sql.state(["!disabled"] if coletar else ["disabled"])
+        db.configurar_instrumentacao(ativo=coletar, capturar_sql=self.var_capturar_sql.get())
+
+
+# --- JANELA DE PROGRESSO DA EXPORTAÇÃO (menu Exportar) ---
+class JanelaExportacao(tk.Toplevel):
+    """
+    Roda db.exportar_catalogo numa thread própria (não na do ExecutorBanco, para
+    não segurar as demais operações da interface durante uma exportação longa) e
+    mostra o progresso, consultado periodicamente com after().
+    """
+    INTERVALO_PROGRESSO_MS = 100
+
+    def __init__(self, app_controller, caminho, formato):
+        super().__init__(app_controller)
+        self.title("Exportando Catálogo")
+        self.resizable(False, False)
+        self.transient(app_controller)
+        self.caminho = caminho
+        self.progresso = (0, 0)  # (exportadas, total), escrito pela thread da exportação
+        self.cancelar = False
+        self.resultado = None
+        self.terminou = False
+
+        self.rotulo_progresso = ttk.Label(self, text=f"Exportando para '{caminho}'...")
+        self.rotulo_progresso.pack(padx=15, pady=(15, 5), anchor="w")
+        self.barra_progresso = ttk.Progressbar(self, mode="determinate", length=360)
+        self.barra_progresso.pack(padx=15, pady=5)
+        self.btn_cancelar = ttk.Button(self, text="Cancelar", command=self._cancelar)
+        self.btn_cancelar.pack(pady=(5, 15))
+        self.protocol("WM_DELETE_WINDOW", self._cancelar)
+
+        threading.Thread(target=self._exportar, args=(formato,), name="ExportacaoCatalogo", daemon=True).start()
+        self.after(self.INTERVALO_PROGRESSO_MS, self._acompanhar)
+
+    def _exportar(self, formato):
+        """Roda na thread da exportação."""
+        try:
+            self.resultado = db.exportar_catalogo(self.caminho, formato, ao_progredir=self._ao_progredir)
+        finally:
+            self.terminou = True
+
+    def _ao_progredir(self, exportadas, total):
+        self.progresso = (exportadas, total)
+        return not self.cancelar
+
+    def _cancelar(self):
+        self.cancelar = True
+        self.btn_cancelar.config(state="disabled")
+
+    def _acompanhar(self):
+        exportadas, total = self.progresso
+        if total:
+            self.barra_progresso["value"] = 100 * exportadas / total
+            self.rotulo_progresso.config(text=f"{exportadas} de {total} livros exportados...")
+        if not self.terminou:
+            self.after(self.INTERVALO_PROGRESSO_MS, self._acompanhar)
+            return
+
+        resultado = self.resultado
+        self.destroy()
+        if resultado is None:
+            messagebox.showerror("Erro na Exportação", f"Não foi possível exportar o catálogo para '{self.caminho}'.")
+        elif resultado["concluida"]:
+            messagebox.showinfo("Exportação Concluída",
+                                f"{resultado['exportadas']} livros exportados para '{self.caminho}' "
+                                f"em {resultado['segundos']:.1f} s.")
+        else:
+            messagebox.showinfo("Exportação Cancelada", "A exportação foi cancelada; nenhum arquivo foi gravado.")
+
+
+# --- JANELA DE PROGRESSO DO BACKUP (menu Backup) ---
+class JanelaBackup(tk.Toplevel):
+    """
+    Roda db.fazer_backup numa thread própria: a cópia em passos pequenos e a
+    verificação de integridade não ocupam a thread do ExecutorBanco nem a da
+    interface, e os usuários continuam gravando enquanto o backup é feito.
+    """
+    INTERVALO_PROGRESSO_MS = 100
+
+    def __init__(self, app_controller):
+        super().__init__(app_controller)
+        self.title("Backup do Banco de Dados")
+        self.resizable(False, False)
+        self.transient(app_controller)
+        self.progresso = (0, 0)  # (páginas copiadas, total), escrito pela thread do backup
+        self.cancelar = False
+        self.resultado = None
+        self.terminou = False
+
+        self.rotulo_progresso = ttk.Label(self, text=f"Copiando para '{db.diretorio_backups()}'...")
+        self.rotulo_progresso.pack(padx=15, pady=(15, 5), anchor="w")
+        self.barra_progresso = ttk.Progressbar(self, mode="determinate", length=360)
+        self.barra_progresso.pack(padx=15, pady=5)
+        self.btn_cancelar = ttk.Button(self, text="Cancelar", command=self._cancelar)
+        self.btn_cancelar.pack(pady=(5, 15))
+        self.protocol("WM_DELETE_WINDOW", self._cancelar)
+
+        threading.Thread(target=self._fazer_backup, name="BackupBanco", daemon=True).start()
+        self.after(self.INTERVALO_PROGRESSO_MS, self._acompanhar)
+
+    def _fazer_backup(self):
+        """Roda na thread do backup."""
+        try:
+            self.resultado = db.fazer_backup(ao_progredir=self._ao_progredir)
+        finally:
+            self.terminou = True
+
+    def _ao_progredir(self, copiadas, total):
+        self.progresso = (copiadas, total)
+        return not self.cancelar
+
+    def _cancelar(self):
+        self.cancelar = True
+        self.btn_cancelar.config(state="disabled")
+
+    def _acompanhar(self):
+        copiadas, total = self.progresso
+        if total:
+            self.barra_progresso["value"] = 100 * copiadas / total
+            if copiadas < total:
+                self.rotulo_progresso.config(text=f"{copiadas} de {total} páginas copiadas...")
+            else: # Cópia pronta: a thread está rodando o integrity_check
+                self.rotulo_progresso.config(text="Verificando a integridade do backup...")
+                self.btn_cancelar.config(state="disabled")
+        if not self.terminou:
+            self.after(self.INTERVALO_PROGRESSO_MS, self._acompanhar)
+            return
+
+        resultado = self.resultado
+        self.destroy()
+        if resultado is None:
+            messagebox.showerror("Erro no Backup", "Não foi possível fazer o backup do banco de dados.")
+        elif not resultado["concluido"]:
+            messagebox.showinfo("Backup Cancelado", "O backup foi cancelado; nenhum arquivo foi gravado.")
+        elif resultado["integridade"] != ["ok"]:
+            problemas = "\n".join(resultado["integridade"][:10])
+            messagebox.showerror("Backup com Problemas",
+                                 f"O backup '{resultado['caminho']}' falhou na verificação de integridade:\n\n{problemas}\n\n"
+                                 "Os backups anteriores foram mantidos.")
+        else:
+            messagebox.showinfo("Backup Concluído",
+                                f"Backup gravado e verificado em '{resultado['caminho']}' "
+                                f"({resultado['segundos']:.1f} s).\n{len(resultado['removidos'])} backups antigos removidos.")
+
+
 # --- TELA (FRAME) PARA GERENCIAMENTO DE AUTORES ---
 class AutoresFrame(ttk.Frame):
     def __init__(self, parent_container, app_controller):
         super().__init__(parent_container)
         self.app_controller = app_controller  # Referência à instância principal da App
         self.id_autor_selecionado = None  # Armazena o ID do autor selecionado na Treeview
+        self.ids_autores_selecionados = []  # IDs de todos os autores selecionados (seleção múltipla)
+        self.autores_exibidos = {}  # iid -> valores exibidos na Treeview (ver sincronizar_treeview)
+        # Ordenação e filtro da lista, aplicados pelo banco (ver db.consultar_autores)
+        self.ordenacao_autores = "nome"
+        self.autores_decrescente = False
+        self.filtro_agendado = None  # ID do after() que aplica o filtro (debounce da digitação)
 
         # --- Widgets do Formulário ---
         frame_formulario = ttk.LabelFrame(self, text="Dados do Autor", padding=(15, 10))
@@ -107,19 +635,31 @@ class AutoresFrame(ttk.Frame):
         self.btn_adicionar.pack(side="left", padx=5)
         self.btn_atualizar = ttk.Button(frame_botoes, text="Atualizar Selecionado", command=self._atualizar_autor, state="disabled")
         self.btn_atualizar.pack(side="left", padx=5)
-        self.btn_deletar = ttk.Button(frame_botoes, text="Deletar Selecionado", command=self._deletar_autor, state="disabled")
+        self.btn_deletar = ttk.Button(frame_botoes, text="Deletar Selecionados", command=self._deletar_autor, state="disabled")
         self.btn_deletar.pack(side="left", padx=5)
         self.btn_limpar = ttk.Button(frame_botoes, text="Limpar Formulário", command=self._limpar_campos_autor)
         self.btn_limpar.pack(side="left", padx=5)
 
+        # --- Filtro (prefixo do nome, enquanto digita) ---
+        frame_filtro = ttk.Frame(self)
+        frame_filtro.pack(pady=(5, 0), padx=10, fill="x")
+        ttk.Label(frame_filtro, text="Nome começa com:").pack(side="left", padx=5)
+        self.filtro_nome_var = tk.StringVar()
+        ttk.Entry(frame_filtro, textvariable=self.filtro_nome_var).pack(side="left", padx=5, fill="x", expand=True)
+        self.filtro_nome_var.trace_add("write", self._ao_digitar_filtro)
+
         # --- Grade (Treeview) para Exibir Autores ---
         frame_treeview = ttk.Frame(self)
         frame_treeview.pack(pady=10, padx=10, fill="both", expand=True)
 
         colunas_treeview = ("id_autor", "nome")
-        self.tree_autores = ttk.Treeview(frame_treeview, columns=colunas_treeview, show="headings", selectmode="browse")
-        self.tree_autores.heading("id_autor", text="ID")
-        self.tree_autores.heading("nome", text="Nome do Autor")
+        # selectmode="extended": Ctrl/Shift+clique selecionam vários autores para deletar de uma vez
+        self.tree_autores = ttk.Treeview(frame_treeview, columns=colunas_treeview, show="headings", selectmode="extended")
+        # Clicar no cabeçalho ordena pela coluna; clicar de novo inverte o sentido
+        self.titulos_colunas = {"id_autor": "ID", "nome": "Nome do Autor"}
+        for coluna, titulo in self.titulos_colunas.items():
+            self.tree_autores.heading(coluna, text=titulo, command=lambda c=coluna: self._ordenar_por(c))
+        indicar_ordenacao(self.tree_autores, self.titulos_colunas, self.ordenacao_autores, self.autores_decrescente)
         self.tree_autores.column("id_autor", width=80, anchor="center", stretch=tk.NO)
         self.tree_autores.column("nome", width=300, anchor="w")
 
@@ -129,22 +669,70 @@ class AutoresFrame(ttk.Frame):
         scrollbar_vertical.pack(side="right", fill="y")
 
         self.tree_autores.bind("<<TreeviewSelect>>", self._ao_selecionar_autor)
-
-        self.atualizar_lista_autores() # Carrega dados iniciais na Treeview
+        # Os dados iniciais são pedidos por AppBiblioteca.mostrar_tela
 
     def atualizar_lista_autores(self):
-        """Busca autores do banco e atualiza a Treeview."""
-        # Limpa itens existentes na Treeview
-        for item in self.tree_autores.get_children():
-            self.tree_autores.delete(item)
-        # Busca dados do banco (lista de tuplas)
-        lista_de_autores = db.listar_autores()
-        for autor_tupla in lista_de_autores:
-            self.tree_autores.insert("", "end", values=autor_tupla)
-        # Se a tela de livros já foi criada, atualiza seu combobox de autores
+        """Busca autores do banco (em segundo plano) e aplica na Treeview apenas o que mudou."""
+        self.app_controller.executor.submeter(
+            self._consultar_autores, self.ordenacao_autores, self.autores_decrescente,
+            self.filtro_nome_var.get().strip(), ao_concluir=self._exibir_autores,
+            chave="autores:listar", dono=self)
+
+    @staticmethod
+    def _consultar_autores(ordenar_por, decrescente, nome_prefixo):
+        """Roda na thread de banco: a ordenação padrão sem filtro é servida pelo cache de autores."""
+        if ordenar_por == "nome" and not decrescente and not nome_prefixo:
+            return db.listar_autores()
+        return db.consultar_autores(ordenar_por, decrescente, nome_prefixo)
+
+    def _exibir_autores(self, lista_de_autores):
+        # lista_de_autores é uma lista de tuplas (id_autor, nome)
+        sincronizar_treeview(self.tree_autores, lista_de_autores, self.autores_exibidos)
+        self.app_controller.registrar_dados_exibidos()
+        # Se a tela de livros já foi criada, atualiza seu seletor de autores
         if LivrosFrame in self.app_controller.frames:
              if self.app_controller.frames[LivrosFrame].winfo_exists():
-                self.app_controller.frames[LivrosFrame].atualizar_combobox_autores()
+                self.app_controller.frames[LivrosFrame].atualizar_seletor_autores()
+
+    def aplicar_mudancas(self, mudancas):
+        """Aplica os autores alterados por outra estação (ver AppBiblioteca._aplicar_mudancas)."""
+        ids = list(mudancas["autores"])
+        if not ids:
+            return
+        if len(ids) > db.TAMANHO_BLOCO_IN: # Muitas mudanças de uma vez: mais barato reler a lista
+            self.atualizar_lista_autores()
+            return
+        ordenacao, decrescente = self.ordenacao_autores, self.autores_decrescente
+        self.app_controller.executor.submeter(
+            db.consultar_autores, ordenacao, decrescente,
+            self.filtro_nome_var.get().strip(), None, None, ids, chave="autores:mudancas", dono=self,
+            ao_concluir=lambda autores: self._aplicar_autores_alterados(ids, ordenacao, decrescente, autores))
+
+    def _aplicar_autores_alterados(self, ids, ordenacao, decrescente, autores):
+        if (ordenacao, decrescente) != (self.ordenacao_autores, self.autores_decrescente):
+            return # A ordem mudou nesse meio-tempo: a lista já está sendo relida
+        aplicar_linhas_alteradas(self.tree_autores, ids, autores, self.autores_exibidos,
+                                 lambda valores: db.chave_ordenacao(valores, ordenacao, db.ORDENACOES_AUTORES),
+                                 decrescente)
+
+    def _ordenar_por(self, coluna):
+        """Clique no cabeçalho: ordena pela coluna ou, se ela já ordena a lista, inverte o sentido."""
+        if coluna == self.ordenacao_autores:
+            self.autores_decrescente = not self.autores_decrescente
+        else:
+            self.ordenacao_autores, self.autores_decrescente = coluna, False
+        indicar_ordenacao(self.tree_autores, self.titulos_colunas, self.ordenacao_autores, self.autores_decrescente)
+        self.atualizar_lista_autores()
+
+    def _ao_digitar_filtro(self, *_args):
+        """Reagenda o filtro a cada tecla; ele só é aplicado após uma pausa na digitação."""
+        if self.filtro_agendado is not None:
+            self.after_cancel(self.filtro_agendado)
+        self.filtro_agendado = self.after(ATRASO_BUSCA_MS, self._aplicar_filtro)
+
+    def _aplicar_filtro(self):
+        self.filtro_agendado = None
+        self.atualizar_lista_autores()
 
     def _adicionar_autor(self):
         nome = self.nome_autor_var.get().strip()
@@ -152,7 +740,25 @@ class AutoresFrame(ttk.Frame):
             messagebox.showwarning("Campo Obrigatório", "O nome do autor não pode ser vazio.")
             return
 
-        autor_id = db.adicionar_autor(nome)
+        # Antes de cadastrar, procura autores com nome parecido ("Drummond, Carlos" x
+        # "Carlos Drummond de Andrade"), que provavelmente são a mesma pessoa
+        self.app_controller.executor.submeter(
+            db.autores_semelhantes, nome, dono=self,
+            ao_concluir=lambda parecidos: self._confirmar_autor_semelhante(nome, parecidos))
+
+    def _confirmar_autor_semelhante(self, nome, parecidos):
+        parecidos = [(id_autor, outro) for id_autor, outro, _semelhanca in parecidos if outro != nome]
+        if parecidos:
+            lista = "\n".join(f"  • {outro} (ID {id_autor})" for id_autor, outro in parecidos)
+            if not messagebox.askyesno("Você quis dizer...?",
+                                       f"Já existem autores com nome parecido com '{nome}':\n\n{lista}\n\n"
+                                       "Cadastrar um novo autor mesmo assim?", icon="warning", parent=self):
+                return
+        self.app_controller.executor.submeter(
+            db.adicionar_autor, nome, dono=self,
+            ao_concluir=lambda autor_id: self._ao_adicionar_autor(nome, autor_id))
+
+    def _ao_adicionar_autor(self, nome, autor_id):
         if autor_id: # Se o ID retornado não for None (sucesso)
             messagebox.showinfo("Sucesso", f"Autor '{nome}' adicionado com ID: {autor_id}.")
             self.atualizar_lista_autores()
@@ -170,7 +776,11 @@ class AutoresFrame(ttk.Frame):
             messagebox.showwarning("Campo Obrigatório", "O nome do autor não pode ser vazio.")
             return
 
-        if db.atualizar_autor(self.id_autor_selecionado, novo_nome):
+        self.app_controller.executor.submeter(db.atualizar_autor, self.id_autor_selecionado, novo_nome,
+                                              ao_concluir=self._ao_atualizar_autor, dono=self)
+
+    def _ao_atualizar_autor(self, sucesso):
+        if sucesso:
             messagebox.showinfo("Sucesso", "Autor atualizado com sucesso!")
             self.atualizar_lista_autores()
             self._limpar_campos_autor()
@@ -178,6 +788,9 @@ class AutoresFrame(ttk.Frame):
             messagebox.showerror("Erro ao Atualizar", f"Não foi possível atualizar o autor. Verifique se o novo nome já existe.")
 
     def _deletar_autor(self):
+        if len(self.ids_autores_selecionados) > 1:
+            self._deletar_autores_selecionados()
+            return
         if self.id_autor_selecionado is None:
             messagebox.showwarning("Nenhuma Seleção", "Por favor, selecione um autor da lista para deletar.")
             return
@@ -186,34 +799,70 @@ class AutoresFrame(ttk.Frame):
         confirmacao = messagebox.askyesno("Confirmar Exclusão",
                                           f"Tem certeza que deseja excluir o autor '{nome_autor_para_deletar}' (ID: {self.id_autor_selecionado})?\n\nATENÇÃO: Esta ação não será possível se o autor tiver livros cadastrados.")
         if confirmacao:
-            if db.deletar_autor(self.id_autor_selecionado):
-                messagebox.showinfo("Sucesso", "Autor excluído com sucesso!")
-                self.atualizar_lista_autores()
-                self._limpar_campos_autor()
-            else:
-                # db.deletar_autor já imprime a causa específica (IntegrityError)
-                messagebox.showerror("Erro ao Excluir", "Não foi possível excluir o autor. Verifique se ele possui livros associados.")
+            self.app_controller.executor.submeter(db.deletar_autor, self.id_autor_selecionado,
+                                                  ao_concluir=self._ao_deletar_autor, dono=self)
+
+    def _ao_deletar_autor(self, sucesso):
+        if sucesso:
+            messagebox.showinfo("Sucesso", "Autor excluído com sucesso!")
+            self.atualizar_lista_autores()
+            self._limpar_campos_autor()
+        else:
+            # db.deletar_autor já imprime a causa específica (IntegrityError)
+            messagebox.showerror("Erro ao Excluir", "Não foi possível excluir o autor. Verifique se ele possui livros associados.")
+
+    def _deletar_autores_selecionados(self):
+        """Deleta todos os autores selecionados numa única transação (db.deletar_autores_em_lote)."""
+        ids = list(self.ids_autores_selecionados)
+        confirmacao = messagebox.askyesno("Confirmar Exclusão",
+                                          f"Tem certeza que deseja excluir os {len(ids)} autores selecionados?\n\nATENÇÃO: Autores com livros cadastrados não serão excluídos.")
+        if confirmacao:
+            self.app_controller.executor.submeter(db.deletar_autores_em_lote, ids,
+                                                  ao_concluir=self._ao_deletar_autores, dono=self)
+
+    def _ao_deletar_autores(self, resultado):
+        deletados, rejeitados = resultado
+        self.atualizar_lista_autores() # Uma única atualização da lista para o lote inteiro
+        self._limpar_campos_autor()
+        if not rejeitados:
+            messagebox.showinfo("Sucesso", f"{len(deletados)} autores excluídos com sucesso!")
+            return
+        # Os nomes vêm da lista ainda exibida (a atualização acima roda em segundo plano)
+        detalhes = "\n".join(f"- {self.autores_exibidos.get(str(id_autor), (id_autor, '?'))[1]} (ID: {id_autor}): {motivo}"
+                             for id_autor, motivo in rejeitados[:20])
+        if len(rejeitados) > 20:
+            detalhes += f"\n... e mais {len(rejeitados) - 20}"
+        messagebox.showwarning("Exclusão Parcial",
+                               f"{len(deletados)} autores excluídos; {len(rejeitados)} não puderam ser excluídos:\n\n{detalhes}")
 
     def _limpar_campos_autor(self):
         self.nome_autor_var.set("")
         self.id_autor_selecionado = None
+        self.ids_autores_selecionados = []
         if self.tree_autores.selection(): # Remove seleção da treeview
-            self.tree_autores.selection_remove(self.tree_autores.selection()[0])
+            self.tree_autores.selection_remove(*self.tree_autores.selection())
         self.btn_adicionar.config(state="normal")
         self.btn_atualizar.config(state="disabled")
         self.btn_deletar.config(state="disabled")
         self.entry_nome_autor.focus()
 
     def _ao_selecionar_autor(self, event):
-        """Chamado quando um autor é selecionado na Treeview."""
-        item_selecionado_id = self.tree_autores.focus() # ID interno do item na Treeview
-        if item_selecionado_id:
-            valores_do_item = self.tree_autores.item(item_selecionado_id, "values")
+        """Chamado quando a seleção da Treeview de autores muda."""
+        selecionados = self.tree_autores.selection() # iids = IDs dos autores no banco
+        self.ids_autores_selecionados = [int(iid) for iid in selecionados]
+        if len(selecionados) == 1:
+            valores_do_item = self.tree_autores.item(selecionados[0], "values")
             self.id_autor_selecionado = int(valores_do_item[0]) # ID do autor do banco
             self.nome_autor_var.set(valores_do_item[1])       # Nome do autor
             self.btn_adicionar.config(state="disabled")
             self.btn_atualizar.config(state="normal")
             self.btn_deletar.config(state="normal")
+        elif selecionados: # Vários autores: só a exclusão em lote se aplica
+            self.id_autor_selecionado = None
+            self.nome_autor_var.set("")
+            self.btn_adicionar.config(state="disabled")
+            self.btn_atualizar.config(state="disabled")
+            self.btn_deletar.config(state="normal")
         else: # Caso a seleção seja limpa (clicar fora)
             self._limpar_campos_autor()
 
@@ -224,7 +873,18 @@ class LivrosFrame(ttk.Frame):
         super().__init__(parent_container)
         self.app_controller = app_controller
         self.id_livro_selecionado = None
+        self.ids_livros_selecionados = []  # IDs de todos os livros selecionados (seleção múltipla)
         self.mapa_id_autores = {} # Mapeia Nome do Autor (string) para ID do Autor (int)
+        self.livros_exibidos = {}  # iid -> valores exibidos na Treeview (ver sincronizar_treeview)
+        # Estado da carga sob demanda (paginação por chave) da Treeview de livros
+        self.chave_ultimo_livro = None  # db.chave_ordenacao() da última linha carregada
+        self.fim_lista_livros = False     # True quando não há mais páginas no banco
+        self.carga_livros_agendada = False
+        self.busca_agendada = None  # ID do after() que dispara a busca (debounce da digitação)
+        # Ordenação e filtros da lista, aplicados pelo banco (ver db.consultar_livros)
+        self.ordenacao_livros = "titulo"
+        self.livros_decrescente = False
+        self.filtros_livros = {}  # Filtros da lista carregada; as páginas seguintes usam os mesmos
 
         # --- Widgets do Formulário ---
         frame_formulario = ttk.LabelFrame(self, text="Dados do Livro", padding=(15, 10))
@@ -235,10 +895,10 @@ class LivrosFrame(ttk.Frame):
         self.entry_titulo_livro = ttk.Entry(frame_formulario, textvariable=self.titulo_livro_var, width=50)
         self.entry_titulo_livro.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
 
-        ttk.Label(frame_formulario, text="Autor:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
-        self.nome_autor_combobox_var = tk.StringVar()
-        self.combobox_autores = ttk.Combobox(frame_formulario, textvariable=self.nome_autor_combobox_var, state="readonly", width=47)
-        self.combobox_autores.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
+        ttk.Label(frame_formulario, text="Autor:").grid(row=1, column=0, padx=5, pady=5, sticky="nw")
+        self.nome_autor_var = tk.StringVar()
+        self.seletor_autores = SeletorAutores(frame_formulario, textvariable=self.nome_autor_var, width=50)
+        self.seletor_autores.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
         frame_formulario.columnconfigure(1, weight=1)
 
         # --- Botões de Ação ---
@@ -249,62 +909,222 @@ class LivrosFrame(ttk.Frame):
         self.btn_adicionar.pack(side="left", padx=5)
         self.btn_atualizar = ttk.Button(frame_botoes, text="Atualizar Selecionado", command=self._atualizar_livro, state="disabled")
         self.btn_atualizar.pack(side="left", padx=5)
-        self.btn_deletar = ttk.Button(frame_botoes, text="Deletar Selecionado", command=self._deletar_livro, state="disabled")
+        self.btn_deletar = ttk.Button(frame_botoes, text="Deletar Selecionados", command=self._deletar_livro, state="disabled")
         self.btn_deletar.pack(side="left", padx=5)
+        self.btn_reatribuir = ttk.Button(frame_botoes, text="Mudar Autor dos Selecionados", command=self._reatribuir_livros, state="disabled")
+        self.btn_reatribuir.pack(side="left", padx=5)
         self.btn_limpar = ttk.Button(frame_botoes, text="Limpar Formulário", command=self._limpar_campos_livro)
         self.btn_limpar.pack(side="left", padx=5)
 
+        # --- Busca (título ou autor, enquanto digita) ---
+        frame_busca = ttk.Frame(self)
+        frame_busca.pack(pady=(5, 0), padx=10, fill="x")
+        ttk.Label(frame_busca, text="Buscar:").pack(side="left", padx=5)
+        self.texto_busca_var = tk.StringVar()
+        self.entry_busca = ttk.Entry(frame_busca, textvariable=self.texto_busca_var)
+        self.entry_busca.pack(side="left", padx=5, fill="x", expand=True)
+        self.texto_busca_var.trace_add("write", self._ao_digitar_busca)
+
+        # --- Filtros por coluna (aplicados pelo banco, enquanto digita) ---
+        frame_filtros = ttk.Frame(self)
+        frame_filtros.pack(pady=(5, 0), padx=10, fill="x")
+        self.filtro_titulo_var = tk.StringVar()
+        self.filtro_autor_var = tk.StringVar()
+        self.filtro_id_min_var = tk.StringVar()
+        self.filtro_id_max_var = tk.StringVar()
+        for rotulo, variavel, largura in (("Título começa com:", self.filtro_titulo_var, 20),
+                                          ("Autor começa com:", self.filtro_autor_var, 20),
+                                          ("ID de:", self.filtro_id_min_var, 8),
+                                          ("até:", self.filtro_id_max_var, 8)):
+            ttk.Label(frame_filtros, text=rotulo).pack(side="left", padx=5)
+            ttk.Entry(frame_filtros, textvariable=variavel, width=largura).pack(side="left", padx=(0, 5))
+            variavel.trace_add("write", self._ao_digitar_busca)
+
         # --- Grade (Treeview) para Exibir Livros ---
         frame_treeview = ttk.Frame(self)
         frame_treeview.pack(pady=10, padx=10, fill="both", expand=True)
 
         # Colunas exibidas: id_livro, titulo, nome_autor
         colunas_treeview = ("id_livro", "titulo", "nome_autor")
-        self.tree_livros = ttk.Treeview(frame_treeview, columns=colunas_treeview, show="headings", selectmode="browse")
-        self.tree_livros.heading("id_livro", text="ID Livro")
-        self.tree_livros.heading("titulo", text="Título do Livro")
-        self.tree_livros.heading("nome_autor", text="Nome do Autor")
+        # selectmode="extended": Ctrl/Shift+clique selecionam vários livros para deletar ou mudar de autor
+        self.tree_livros = ttk.Treeview(frame_treeview, columns=colunas_treeview, show="headings", selectmode="extended")
+        # Clicar no cabeçalho ordena pela coluna (chaves de db.ORDENACOES_LIVROS); de novo, inverte o sentido
+        self.titulos_colunas = {"id_livro": "ID Livro", "titulo": "Título do Livro", "nome_autor": "Nome do Autor"}
+        for coluna, titulo in self.titulos_colunas.items():
+            self.tree_livros.heading(coluna, text=titulo, command=lambda c=coluna: self._ordenar_por(c))
+        indicar_ordenacao(self.tree_livros, self.titulos_colunas, self.ordenacao_livros, self.livros_decrescente)
         self.tree_livros.column("id_livro", width=70, anchor="center", stretch=tk.NO)
         self.tree_livros.column("titulo", width=300, anchor="w")
         self.tree_livros.column("nome_autor", width=200, anchor="w")
 
-        scrollbar_vertical = ttk.Scrollbar(frame_treeview, orient="vertical", command=self.tree_livros.yview)
-        self.tree_livros.configure(yscrollcommand=scrollbar_vertical.set)
+        self.scrollbar_livros = ttk.Scrollbar(frame_treeview, orient="vertical", command=self.tree_livros.yview)
+        self.tree_livros.configure(yscrollcommand=self._ao_rolar_livros)
         self.tree_livros.pack(side="left", fill="both", expand=True)
-        scrollbar_vertical.pack(side="right", fill="y")
+        self.scrollbar_livros.pack(side="right", fill="y")
 
         self.tree_livros.bind("<<TreeviewSelect>>", self._ao_selecionar_livro)
+        # O índice do seletor e os livros são pedidos por AppBiblioteca.mostrar_tela
+
+    def atualizar_seletor_autores(self):
+        """Busca autores do banco e monta o índice de prefixos (em segundo plano) para o seletor."""
+        self.app_controller.executor.submeter(self._consultar_autores, ao_concluir=self._preencher_seletor_autores,
+                                              chave="livros:autores", dono=self)
+
+    @staticmethod
+    def _consultar_autores():
+        """Roda na thread de banco: índice de prefixos dos autores, com o mapa Nome -> ID do cache de autores."""
+        return IndicePrefixoAutores(db.listar_autores(), db.mapa_autores_por_nome())
+
+    def _preencher_seletor_autores(self, indice):
+        self.mapa_id_autores = indice.por_nome # Compartilhado com o cache: somente leitura
+        self.seletor_autores.definir_indice(indice)
 
-        self.atualizar_combobox_autores() # Carrega autores no combobox
-        self.atualizar_lista_livros()   # Carrega livros na treeview
-
-    def atualizar_combobox_autores(self):
-        """Busca autores do banco e atualiza o Combobox de autores."""
-        lista_de_autores_tuplas = db.listar_autores() # Lista de (id_autor, nome_autor)
-        self.mapa_id_autores.clear()
-        nomes_autores_para_combobox = []
-        for id_autor, nome_autor in lista_de_autores_tuplas:
-            self.mapa_id_autores[nome_autor] = id_autor # Mapeia Nome para ID
-            nomes_autores_para_combobox.append(nome_autor)
-        self.combobox_autores['values'] = nomes_autores_para_combobox
-        if nomes_autores_para_combobox:
-            self.nome_autor_combobox_var.set('') # Limpa seleção atual
+
+    def atualizar_lista_livros(self, reiniciar=False):
+        """
+        Atualiza a Treeview de livros aplicando apenas as diferenças. Relê do banco
+        o mesmo trecho já carregado (no mínimo uma página); as páginas seguintes
+        continuam sendo buscadas sob demanda, conforme o usuário rola a lista.
+        Depois de gravar livros desta tela, prefira atualizar_livros(ids).
+        Com reiniciar=True (nova ordenação, filtro ou busca) relê só a primeira página.
+        Se houver texto no campo de busca, exibe os resultados da busca (por
+        relevância; a ordenação e os filtros valem para a listagem).
+        """
+        texto_busca = self.texto_busca_var.get().strip()
+        quantidade = db.TAMANHO_PAGINA if reiniciar else max(len(self.livros_exibidos), db.TAMANHO_PAGINA)
+        self.filtros_livros = self._ler_filtros()
+        self.carga_livros_agendada = True # Impede cargas de página até a atualização terminar
+        # A chave "livros" faz esta atualização substituir buscas/páginas ainda pendentes
+        self.app_controller.executor.submeter(
+            self._consultar_livros, texto_busca, quantidade, self.ordenacao_livros,
+            self.livros_decrescente, self.filtros_livros, chave="livros", dono=self,
+            ao_concluir=lambda livros: self._exibir_livros(livros, texto_busca, quantidade, reiniciar))
+
+    def _ler_filtros(self):
+        """Filtros preenchidos, no formato aceito por db.consultar_livros."""
+        filtros = {"titulo_prefixo": self.filtro_titulo_var.get().strip(),
+                   "autor_prefixo": self.filtro_autor_var.get().strip(),
+                   "id_min": inteiro_ou_none(self.filtro_id_min_var.get()),
+                   "id_max": inteiro_ou_none(self.filtro_id_max_var.get())}
+        return {nome: valor for nome, valor in filtros.items() if valor not in (None, "")}
+
+    @staticmethod
+    def _consultar_livros(texto_busca, quantidade, ordenar_por, decrescente, filtros):
+        """Roda na thread de banco: resultados da busca ou as primeiras 'quantidade' linhas."""
+        if texto_busca:
+            return db.buscar_livros(texto_busca)
+        return db.consultar_livros(ordenar_por, decrescente, filtros, limite=quantidade)
+
+    def _exibir_livros(self, livros, texto_busca, quantidade, reiniciar=False):
+        if texto_busca:
+            self.fim_lista_livros = True # Resultados da busca não são paginados
+            self.chave_ultimo_livro = None
         else:
-            self.nome_autor_combobox_var.set('')
+            self.fim_lista_livros = len(livros) < quantidade
+            self.chave_ultimo_livro = db.chave_ordenacao(livros[-1], self.ordenacao_livros) if livros else None
+        # db retorna (id_livro, titulo, nome_autor, id_autor_fk); a Treeview exibe as 3 primeiras
+        sincronizar_treeview(self.tree_livros, [livro[:3] for livro in livros], self.livros_exibidos)
+        if reiniciar:
+            self.tree_livros.yview_moveto(0)
+        self.carga_livros_agendada = False
+        self.app_controller.registrar_dados_exibidos()
 
+    def aplicar_mudancas(self, mudancas):
+        """Aplica os livros alterados por outra estação (ver AppBiblioteca._aplicar_mudancas)."""
+        if mudancas["autores"]:
+            self.atualizar_seletor_autores() # O cache de autores já foi invalidado pelo monitor
+        ids = list(mudancas["livros"])
+        autores_alterados = any(operacao != "I" for operacao in mudancas["autores"].values())
+        if autores_alterados or self.texto_busca_var.get().strip() or len(ids) > db.TAMANHO_BLOCO_IN:
+            # Nome de autor alterado (aparece em vários livros), resultados de busca ou
+            # mudanças demais: relê o trecho carregado, ainda aplicando só as diferenças
+            self.atualizar_lista_livros()
+            return
+        if ids:
+            self.atualizar_livros(ids)
+
+    def atualizar_livros(self, ids):
+        """
+        Relê só os livros 'ids' (gravados por esta tela ou por outra estação) e os
+        coloca, tira ou move na Treeview, sem reler o trecho já carregado. Com
+        resultados de busca na tela, refaz a busca; com ids demais para uma
+        consulta, volta à primeira página.
+        """
+        ids = list(ids)
+        if self.texto_busca_var.get().strip() or len(ids) > db.TAMANHO_BLOCO_IN:
+            self.atualizar_lista_livros(reiniciar=True)
+            return
+        ordenacao, decrescente = self.ordenacao_livros, self.livros_decrescente
+        filtros = dict(self.filtros_livros, ids=ids)
+        self.app_controller.executor.submeter(
+            db.consultar_livros, ordenacao, decrescente, filtros, None, None, dono=self,
+            ao_concluir=lambda livros: self._aplicar_livros_alterados(ids, ordenacao, decrescente, livros))
 
-    def atualizar_lista_livros(self):
-        """Busca livros (com nome do autor) do banco e atualiza a Treeview."""
-        for item in self.tree_livros.get_children():
-            self.tree_livros.delete(item)
-        # db.listar_livros_com_autor() retorna (id_livro, titulo, nome_autor, id_autor_fk)
-        lista_de_livros_tuplas = db.listar_livros_com_autor()
-        for id_l, tit, nome_a, _id_a_fk in lista_de_livros_tuplas:
-            self.tree_livros.insert("", "end", values=(id_l, tit, nome_a))
+    def _aplicar_livros_alterados(self, ids, ordenacao, decrescente, livros):
+        if (ordenacao, decrescente) != (self.ordenacao_livros, self.livros_decrescente):
+            return # A ordem mudou nesse meio-tempo: a lista já está sendo relida
+        # db retorna (id_livro, titulo, nome_autor, id_autor_fk); a Treeview exibe as 3 primeiras
+        aplicar_linhas_alteradas(self.tree_livros, ids, [livro[:3] for livro in livros], self.livros_exibidos,
+                                 lambda valores: db.chave_ordenacao(valores, ordenacao), decrescente,
+                                 None if self.fim_lista_livros else self.chave_ultimo_livro)
+
+    def _ordenar_por(self, coluna):
+        """Clique no cabeçalho: ordena pela coluna ou, se ela já ordena a lista, inverte o sentido."""
+        if coluna == self.ordenacao_livros:
+            self.livros_decrescente = not self.livros_decrescente
+        else:
+            self.ordenacao_livros, self.livros_decrescente = coluna, False
+        indicar_ordenacao(self.tree_livros, self.titulos_colunas, self.ordenacao_livros, self.livros_decrescente)
+        self.atualizar_lista_livros(reiniciar=True)
+
+    def _ao_digitar_busca(self, *_args):
+        """Reagenda a busca (ou o filtro) a cada tecla; ela só roda após uma pausa na digitação."""
+        if self.busca_agendada is not None:
+            self.after_cancel(self.busca_agendada)
+        self.busca_agendada = self.after(ATRASO_BUSCA_MS, self._executar_busca)
+
+    def _executar_busca(self):
+        self.busca_agendada = None
+        self.atualizar_lista_livros(reiniciar=True)
+
+    def _carregar_proxima_pagina_livros(self):
+        """Busca (em segundo plano) a próxima página de livros no banco."""
+        if self.fim_lista_livros:
+            self.carga_livros_agendada = False
+            return
+        self.app_controller.executor.submeter(db.consultar_livros, self.ordenacao_livros, self.livros_decrescente,
+                                              self.filtros_livros, self.chave_ultimo_livro,
+                                              ao_concluir=self._acrescentar_pagina_livros,
+                                              chave="livros", dono=self)
+
+    def _acrescentar_pagina_livros(self, pagina):
+        """Acrescenta uma página de livros ao fim da Treeview."""
+        self.carga_livros_agendada = False
+        # db.consultar_livros() retorna (id_livro, titulo, nome_autor, id_autor_fk)
+        for id_l, tit, nome_a, _id_a_fk in pagina:
+            iid = str(id_l)
+            if iid in self.livros_exibidos: # Já exibido (ex.: alterado por outro usuário)
+                continue
+            self.tree_livros.insert("", "end", iid=iid, values=(id_l, tit, nome_a))
+            self.livros_exibidos[iid] = (id_l, tit, nome_a)
+        if pagina:
+            self.chave_ultimo_livro = db.chave_ordenacao(pagina[-1], self.ordenacao_livros)
+        if len(pagina) < db.TAMANHO_PAGINA:
+            self.fim_lista_livros = True
+
+    def _ao_rolar_livros(self, primeiro, ultimo):
+        """
+        yscrollcommand da Treeview: atualiza a scrollbar e, quando a parte visível
+        chega perto do fim do que já foi carregado, agenda a carga da próxima página.
+        """
+        self.scrollbar_livros.set(primeiro, ultimo)
+        if float(ultimo) > 0.9 and not self.fim_lista_livros and not self.carga_livros_agendada:
+            self.carga_livros_agendada = True
+            self.after_idle(self._carregar_proxima_pagina_livros)
 
     def _adicionar_livro(self):
         titulo = self.titulo_livro_var.get().strip()
-        nome_autor_selecionado = self.nome_autor_combobox_var.get()
+        nome_autor_selecionado = self.nome_autor_var.get().strip()
 
         if not titulo:
             messagebox.showwarning("Campo Obrigatório", "O título do livro não pode ser vazio.")
@@ -314,14 +1134,19 @@ class LivrosFrame(ttk.Frame):
             return
 
         id_autor_para_fk = self.mapa_id_autores.get(nome_autor_selecionado)
-        if id_autor_para_fk is None: # Checagem de segurança
-            messagebox.showerror("Erro Interno", "Autor selecionado não encontrado no mapeamento.")
+        if id_autor_para_fk is None: # O nome é digitado: pode não corresponder a nenhum autor
+            messagebox.showwarning("Autor Não Encontrado",
+                                   f"Não há autor cadastrado com o nome '{nome_autor_selecionado}'. Escolha um autor da lista de sugestões.")
             return
 
-        livro_id = db.adicionar_livro(titulo, id_autor_para_fk)
+        self.app_controller.executor.submeter(
+            db.adicionar_livro, titulo, id_autor_para_fk, dono=self,
+            ao_concluir=lambda livro_id: self._ao_adicionar_livro(titulo, livro_id))
+
+    def _ao_adicionar_livro(self, titulo, livro_id):
         if livro_id:
             messagebox.showinfo("Sucesso", f"Livro '{titulo}' adicionado com ID: {livro_id}.")
-            self.atualizar_lista_livros()
+            self.atualizar_livros([livro_id]) # Só a linha nova, se ela cair no trecho carregado
             self._limpar_campos_livro()
         else:
             messagebox.showerror("Erro ao Adicionar", "Não foi possível adicionar o livro.")
@@ -331,7 +1156,7 @@ class LivrosFrame(ttk.Frame):
             messagebox.showwarning("Nenhuma Seleção", "Por favor, selecione um livro da lista para atualizar.")
             return
         novo_titulo = self.titulo_livro_var.get().strip()
-        novo_nome_autor = self.nome_autor_combobox_var.get()
+        novo_nome_autor = self.nome_autor_var.get().strip()
 
         if not novo_titulo:
             messagebox.showwarning("Campo Obrigatório", "O título do livro não pode ser vazio.")
@@ -342,17 +1167,27 @@ class LivrosFrame(ttk.Frame):
 
         novo_id_autor_para_fk = self.mapa_id_autores.get(novo_nome_autor)
         if novo_id_autor_para_fk is None:
-            messagebox.showerror("Erro Interno", "Novo autor selecionado não encontrado no mapeamento.")
+            messagebox.showwarning("Autor Não Encontrado",
+                                   f"Não há autor cadastrado com o nome '{novo_nome_autor}'. Escolha um autor da lista de sugestões.")
             return
 
-        if db.atualizar_livro(self.id_livro_selecionado, novo_titulo, novo_id_autor_para_fk):
+        id_livro = self.id_livro_selecionado
+        self.app_controller.executor.submeter(
+            db.atualizar_livro, id_livro, novo_titulo, novo_id_autor_para_fk, dono=self,
+            ao_concluir=lambda sucesso: self._ao_atualizar_livro(id_livro, sucesso))
+
+    def _ao_atualizar_livro(self, id_livro, sucesso):
+        if sucesso:
             messagebox.showinfo("Sucesso", "Livro atualizado com sucesso!")
-            self.atualizar_lista_livros()
+            self.atualizar_livros([id_livro])
             self._limpar_campos_livro()
         else:
             messagebox.showerror("Erro ao Atualizar", "Não foi possível atualizar o livro.")
 
     def _deletar_livro(self):
+        if len(self.ids_livros_selecionados) > 1:
+            self._deletar_livros_selecionados()
+            return
         if self.id_livro_selecionado is None:
             messagebox.showwarning("Nenhuma Seleção", "Por favor, selecione um livro da lista para deletar.")
             return
@@ -361,42 +1196,218 @@ class LivrosFrame(ttk.Frame):
         confirmacao = messagebox.askyesno("Confirmar Exclusão",
                                           f"Tem certeza que deseja excluir o livro '{titulo_livro_para_deletar}' (ID: {self.id_livro_selecionado})?")
         if confirmacao:
-            if db.deletar_livro(self.id_livro_selecionado):
-                messagebox.showinfo("Sucesso", "Livro excluído com sucesso!")
-                self.atualizar_lista_livros()
-                self._limpar_campos_livro()
-            else:
-                messagebox.showerror("Erro ao Excluir", "Não foi possível excluir o livro.")
+            id_livro = self.id_livro_selecionado
+            self.app_controller.executor.submeter(
+                db.deletar_livro, id_livro, dono=self,
+                ao_concluir=lambda sucesso: self._ao_deletar_livro(id_livro, sucesso))
+
+    def _ao_deletar_livro(self, id_livro, sucesso):
+        if sucesso:
+            messagebox.showinfo("Sucesso", "Livro excluído com sucesso!")
+            self.atualizar_livros([id_livro])
+            self._limpar_campos_livro()
+        else:
+            messagebox.showerror("Erro ao Excluir", "Não foi possível excluir o livro.")
+
+    def _deletar_livros_selecionados(self):
+        """Deleta todos os livros selecionados numa única transação (db.deletar_livros_em_lote)."""
+        ids = list(self.ids_livros_selecionados)
+        confirmacao = messagebox.askyesno("Confirmar Exclusão",
+                                          f"Tem certeza que deseja excluir os {len(ids)} livros selecionados?")
+        if confirmacao:
+            self.app_controller.executor.submeter(
+                db.deletar_livros_em_lote, ids, dono=self,
+                ao_concluir=lambda quantidade: self._ao_deletar_livros(ids, quantidade))
+
+    def _ao_deletar_livros(self, ids, quantidade):
+        if quantidade:
+            messagebox.showinfo("Sucesso", f"{quantidade} livros excluídos com sucesso!")
+            self.atualizar_livros(ids) # Uma única atualização da lista para o lote inteiro
+            self._limpar_campos_livro()
+        else:
+            messagebox.showerror("Erro ao Excluir", "Não foi possível excluir os livros selecionados.")
+
+    def _reatribuir_livros(self):
+        """Passa todos os livros selecionados para o autor informado, numa única transação."""
+        if not self.ids_livros_selecionados:
+            messagebox.showwarning("Nenhuma Seleção", "Por favor, selecione os livros que mudarão de autor.")
+            return
+        nome_autor = self.nome_autor_var.get().strip()
+        if not nome_autor:
+            messagebox.showwarning("Seleção Obrigatória", "Informe o novo autor dos livros selecionados.")
+            return
+        id_autor = self.mapa_id_autores.get(nome_autor)
+        if id_autor is None:
+            messagebox.showwarning("Autor Não Encontrado",
+                                   f"Não há autor cadastrado com o nome '{nome_autor}'. Escolha um autor da lista de sugestões.")
+            return
+
+        ids = list(self.ids_livros_selecionados)
+        self.app_controller.executor.submeter(
+            db.reatribuir_livros_em_lote, ids, id_autor, dono=self,
+            ao_concluir=lambda quantidade: self._ao_reatribuir_livros(ids, nome_autor, quantidade))
+
+    def _ao_reatribuir_livros(self, ids, nome_autor, quantidade):
+        if quantidade:
+            messagebox.showinfo("Sucesso", f"{quantidade} livros passados para o autor '{nome_autor}'.")
+            self.atualizar_livros(ids) # Uma única atualização da lista para o lote inteiro
+            self._limpar_campos_livro()
+        else:
+            messagebox.showerror("Erro ao Atualizar", "Não foi possível mudar o autor dos livros selecionados.")
 
     def _limpar_campos_livro(self):
         self.titulo_livro_var.set("")
-        self.nome_autor_combobox_var.set("") # Limpa a seleção do combobox
-        self.combobox_autores.set('')      # Limpa o texto exibido no combobox (redundante, mas seguro)
+        self.seletor_autores.limpar()
         self.id_livro_selecionado = None
+        self.ids_livros_selecionados = []
         if self.tree_livros.selection(): # Remove seleção da treeview
-            self.tree_livros.selection_remove(self.tree_livros.selection()[0])
+            self.tree_livros.selection_remove(*self.tree_livros.selection())
         self.btn_adicionar.config(state="normal")
         self.btn_atualizar.config(state="disabled")
         self.btn_deletar.config(state="disabled")
+        self.btn_reatribuir.config(state="disabled")
         self.entry_titulo_livro.focus()
 
     def _ao_selecionar_livro(self, event):
-        """Chamado quando um livro é selecionado na Treeview."""
-        item_selecionado_id = self.tree_livros.focus()
-        if item_selecionado_id:
+        """Chamado quando a seleção da Treeview de livros muda."""
+        selecionados = self.tree_livros.selection() # iids = IDs dos livros no banco
+        self.ids_livros_selecionados = [int(iid) for iid in selecionados]
+        if len(selecionados) == 1:
             # Na Treeview de livros, os valores são (id_livro, titulo, nome_autor)
-            valores_do_item = self.tree_livros.item(item_selecionado_id, "values")
+            valores_do_item = self.tree_livros.item(selecionados[0], "values")
             self.id_livro_selecionado = int(valores_do_item[0])
             self.titulo_livro_var.set(valores_do_item[1])
-            self.nome_autor_combobox_var.set(valores_do_item[2]) # Define o nome do autor no Combobox
+            self.nome_autor_var.set(valores_do_item[2]) # Define o nome do autor no seletor
             self.btn_adicionar.config(state="disabled")
             self.btn_atualizar.config(state="normal")
             self.btn_deletar.config(state="normal")
+            self.btn_reatribuir.config(state="normal")
+        elif selecionados: # Vários livros: exclusão ou troca de autor em lote
+            self.id_livro_selecionado = None
+            self.titulo_livro_var.set("")
+            self.btn_adicionar.config(state="disabled")
+            self.btn_atualizar.config(state="disabled")
+            self.btn_deletar.config(state="normal")
+            self.btn_reatribuir.config(state="normal")
         else:
             self._limpar_campos_livro()
 
 
+# --- TELA (FRAME) COM O PAINEL DE ESTATÍSTICAS DO CATÁLOGO ---
+class PainelFrame(ttk.Frame):
+    """
+    Totais do catálogo e autores com mais livros, lidos dos contadores mantidos
+    por triggers (db.estatisticas_catalogo): abrir o painel não varre a tabela de livros.
+    """
+    def __init__(self, parent_container, app_controller):
+        super().__init__(parent_container)
+        self.app_controller = app_controller
+        self.top_exibidos = {}  # iid -> valores exibidos na Treeview (ver sincronizar_treeview)
+
+        frame_totais = ttk.LabelFrame(self, text="Totais", padding=(15, 10))
+        frame_totais.pack(padx=10, pady=10, fill="x")
+        self.rotulo_livros = ttk.Label(frame_totais, text="Livros: -")
+        self.rotulo_livros.pack(side="left", padx=(0, 30))
+        self.rotulo_autores = ttk.Label(frame_totais, text="Autores: -")
+        self.rotulo_autores.pack(side="left")
+
+        frame_botoes = ttk.Frame(self)
+        frame_botoes.pack(pady=5, padx=10, fill="x")
+        ttk.Button(frame_botoes, text="Atualizar", command=self.atualizar_painel).pack(side="left", padx=5)
+        ttk.Button(frame_botoes, text="Verificar Contadores", command=self._verificar_contadores).pack(side="left", padx=5)
+        ttk.Button(frame_botoes, text="Reconstruir Contadores", command=self._reconstruir_contadores).pack(side="left", padx=5)
+
+        frame_treeview = ttk.LabelFrame(self, text=f"Autores com mais livros (top {db.TOP_AUTORES})", padding=(5, 5))
+        frame_treeview.pack(pady=10, padx=10, fill="both", expand=True)
+        self.tree_top_autores = ttk.Treeview(frame_treeview, columns=("id_autor", "nome", "livros"),
+                                             show="headings", selectmode="browse")
+        self.tree_top_autores.heading("id_autor", text="ID")
+        self.tree_top_autores.heading("nome", text="Nome do Autor")
+        self.tree_top_autores.heading("livros", text="Livros")
+        self.tree_top_autores.column("id_autor", width=80, anchor="center", stretch=tk.NO)
+        self.tree_top_autores.column("nome", width=300, anchor="w")
+        self.tree_top_autores.column("livros", width=100, anchor="e", stretch=tk.NO)
+        self.tree_top_autores.pack(fill="both", expand=True)
+        # Os dados são pedidos por AppBiblioteca.mostrar_tela
+
+    def atualizar_painel(self):
+        """Lê os contadores (em segundo plano) e atualiza totais e ranking."""
+        self.app_controller.executor.submeter(db.estatisticas_catalogo, ao_concluir=self._exibir_painel,
+                                              chave="painel:estatisticas", dono=self)
+
+    def _exibir_painel(self, estatisticas):
+        if estatisticas is None:
+            messagebox.showerror("Erro no Painel", "Não foi possível ler as estatísticas do catálogo.")
+            return
+        self.rotulo_livros.config(text=f"Livros: {estatisticas['livros']}")
+        self.rotulo_autores.config(text=f"Autores: {estatisticas['autores']}")
+        sincronizar_treeview(self.tree_top_autores, estatisticas["top_autores"], self.top_exibidos)
+        self.app_controller.registrar_dados_exibidos()
+
+    def aplicar_mudancas(self, mudancas):
+        """Qualquer mudança em autores ou livros altera os totais: relê os contadores (O(1))."""
+        self.atualizar_painel()
+
+    def _verificar_contadores(self):
+        self.app_controller.executor.submeter(db.verificar_contadores, ao_concluir=self._ao_verificar_contadores, dono=self)
+
+    def _ao_verificar_contadores(self, divergencias):
+        if divergencias is None:
+            messagebox.showerror("Erro na Verificação", "Não foi possível verificar os contadores.")
+        elif not divergencias:
+            messagebox.showinfo("Contadores Corretos", "Todos os contadores conferem com as tabelas.")
+        else:
+            detalhes = "\n".join(f"- {item}: contador {contador}, real {real}" for item, contador, real in divergencias[:20])
+            messagebox.showwarning("Contadores Divergentes",
+                                   f"{len(divergencias)} contadores divergem das tabelas:\n\n{detalhes}\n\n"
+                                   "Use 'Reconstruir Contadores' para corrigi-los.")
+
+    def _reconstruir_contadores(self):
+        confirmacao = messagebox.askyesno("Reconstruir Contadores",
+                                          "Recalcular todos os contadores a partir das tabelas? Em catálogos grandes isso pode levar alguns segundos.")
+        if confirmacao:
+            self.app_controller.executor.submeter(db.reconstruir_contadores, ao_concluir=self._ao_reconstruir_contadores, dono=self)
+
+    def _ao_reconstruir_contadores(self, sucesso):
+        if sucesso:
+            messagebox.showinfo("Sucesso", "Contadores reconstruídos com sucesso!")
+            self.atualizar_painel()
+        else:
+            messagebox.showerror("Erro ao Reconstruir", "Não foi possível reconstruir os contadores.")
+
+
 # --- PONTO DE ENTRADA DA APLICAÇÃO ---
 if __name__ == "__main__":
-    app = AppBiblioteca()
-    app.mainloop()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sistema de Gerenciamento de Biblioteca")
+    parser.add_argument("--concorrente", action="store_true",
+                        help="Modo para várias estações no mesmo arquivo (WAL, busy timeout, retentativas)")
+    parser.add_argument("--busy-timeout", type=int, default=5000, help="Espera por travas, em ms (modo concorrente)")
+    parser.add_argument("--synchronous", default="NORMAL", help="PRAGMA synchronous no modo concorrente")
+    parser.add_argument("--inicio-completo", action="store_true",
+                        help="Roda o DDL e carrega a primeira tela antes de exibir a janela (início antigo)")
+    parser.add_argument("--medir-inicio", action="store_true",
+                        help="Fecha a aplicação assim que a primeira tela tiver dados e imprime os tempos em JSON")
+    parser.add_argument("--espelho", action="store_true",
+                        help="Faz as leituras numa cópia do banco em memória, atualizada a cada escrita")
+    parser.add_argument("--instrumentar", action="store_true",
+                        help="Coleta métricas por função do banco (vistas em Ajuda > Estatísticas)")
+    parser.add_argument("--capturar-sql", action="store_true",
+                        help="Com --instrumentar, registra o SQL das chamadas lentas no log ao lado do banco")
+    parser.add_argument("--perfilar", action="store_true",
+                        help="Mede os handlers da interface (banco x widgets) e os travamentos; relatório ao fechar")
+    parser.add_argument("--limite-travamento", type=float, default=LIMITE_TRAVAMENTO_MS,
+                        help="Atraso do laço de eventos, em ms, registrado como travamento (com --perfilar)")
+    args = parser.parse_args()
+    if args.concorrente:
+        db.configurar_modo_concorrente(busy_timeout_ms=args.busy_timeout, synchronous=args.synchronous)
+    if args.instrumentar:
+        db.configurar_instrumentacao(capturar_sql=args.capturar_sql)
+
+    app = AppBiblioteca(inicio_rapido=not args.inicio_completo, espelho_memoria=args.espelho,
+                        perfil_interface=args.perfilar, limite_travamento_ms=args.limite_travamento)
+    if args.medir_inicio:
+        app.ao_ficar_pronta = lambda: app.after_idle(app.encerrar)
+    app.mainloop()
+    if args.medir_inicio:
+        print(json.dumps({fase: round(ms, 1) for fase, ms in tempos_inicializacao.items()}))
+    db.fechar_conexoes() # Fecha as conexões persistentes do pool ao encerrar
\ No newline at end of file
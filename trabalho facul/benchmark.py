@@ -0,0 +1,618 @@
+"""
+Benchmarks do módulo database.py.
+
+Uso:
+    python benchmark.py conexao [--chamadas N]
+    python benchmark.py planos [--banco ARQUIVO]
+    python benchmark.py treeview [--linhas N]   (precisa de uma tela/DISPLAY)
+    python benchmark.py concorrencia [--threads N] [--escritas N] [--sem-wal]
+    python benchmark.py memoria [--linhas 1000000]
+    python benchmark.py espelho [--livros 100000] [--repeticoes 2000] [--threads 4]
+    python benchmark.py transacao [--fluxos 100] [--livros-por-fluxo 20] [--wal]
+    python benchmark.py suite [--tamanhos 1000 100000 1000000] [--saida resultados.json]
+                              [--comparar base.json]
+
+Os cenários de medição rodam sobre um banco temporário, nunca sobre o biblioteca.db
+real. Apenas 'planos' abre o banco indicado (aplicando as migrações pendentes).
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import database as db
+
+
+def _preparar_banco_temporario():
+    """Aponta o módulo database para um arquivo temporário novo e cria as tabelas."""
+    diretorio = tempfile.mkdtemp(prefix="bench_biblioteca_")
+    db.DB_NAME = os.path.join(diretorio, "benchmark.db")
+    db.criar_tabelas()
+    return db.DB_NAME
+
+
+def _descartar_banco_temporario(caminho):
+    """Fecha as conexões e apaga o diretório criado por _preparar_banco_temporario()."""
+    db.desativar_espelho()
+    db.fechar_conexoes()
+    db.invalidar_cache_autores()
+    shutil.rmtree(os.path.dirname(caminho), ignore_errors=True)
+
+
+def gerar_catalogo(total_livros, total_autores=None, expoente_zipf=1.1, semente=42, tamanho_lote=20000):
+    """
+    Popula o banco atual com um catálogo sintético. Os livros são distribuídos entre
+    os autores por uma lei de Zipf (poucos autores com muitos livros, muitos com
+    poucos), como num acervo real. Retorna a lista de IDs dos autores criados.
+    """
+    aleatorio = random.Random(semente)
+    if total_autores is None:
+        total_autores = max(1, total_livros // 10)
+
+    ids_autores = []
+    for inicio in range(0, total_autores, tamanho_lote):
+        nomes = [f"Autor Sintético {n:07d}" for n in range(inicio, min(inicio + tamanho_lote, total_autores))]
+        ids, _rejeitados = db.adicionar_autores_em_lote(nomes)
+        ids_autores.extend(ids[nome] for nome in nomes if nome in ids)
+
+    # O i-ésimo autor (ordem aleatória) recebe peso 1 / i^s
+    aleatorio.shuffle(ids_autores)
+    pesos_acumulados = list(itertools.accumulate(1 / (posicao ** expoente_zipf)
+                                                 for posicao in range(1, len(ids_autores) + 1)))
+    palavras = ("Memórias", "Sertão", "Cidade", "Noite", "Mar", "Tempo", "Rosa", "Vento",
+                "Caminho", "Silêncio", "Luz", "Terra", "Sonho", "Pedra", "Rio", "Janela")
+    for inicio in range(0, total_livros, tamanho_lote):
+        quantidade = min(tamanho_lote, total_livros - inicio)
+        autores_do_lote = aleatorio.choices(ids_autores, cum_weights=pesos_acumulados, k=quantidade)
+        livros = [(f"{' '.join(aleatorio.sample(palavras, 3))} {inicio + i}", id_autor)
+                  for i, id_autor in enumerate(autores_do_lote)]
+        db.adicionar_livros_em_lote(livros)
+    return ids_autores
+
+
+def _cronometrar(funcao, chamadas):
+    """Executa funcao() 'chamadas' vezes e retorna o tempo total em segundos."""
+    inicio = time.perf_counter()
+    for _ in range(chamadas):
+        funcao()
+    return time.perf_counter() - inicio
+
+
+def _buscar_autor_conexao_por_chamada(id_autor):
+    """Reproduz o comportamento antigo: abre, configura e fecha uma conexão por chamada."""
+    conn = sqlite3.connect(db.DB_NAME)
+    conn.execute("PRAGMA foreign_keys = ON")
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id_autor, nome FROM autor WHERE id_autor = ?", (id_autor,))
+        return cursor.fetchone()
+    finally:
+        conn.close()
+
+
+def bench_conexao(chamadas):
+    """Compara a conexão por chamada (comportamento antigo) com o pool por thread."""
+    _preparar_banco_temporario()
+    id_autor = db.adicionar_autor("Autor de Benchmark")
+
+    tempo_por_chamada = _cronometrar(lambda: _buscar_autor_conexao_por_chamada(id_autor), chamadas)
+    tempo_pool = _cronometrar(lambda: db.buscar_autor_por_id(id_autor), chamadas)
+
+    print(f"Consultas curtas (buscar_autor_por_id), {chamadas} chamadas:")
+    print(f"  conexão por chamada: {tempo_por_chamada * 1e6 / chamadas:8.1f} µs/chamada")
+    print(f"  pool por thread:     {tempo_pool * 1e6 / chamadas:8.1f} µs/chamada")
+    print(f"  ganho: {tempo_por_chamada / tempo_pool:.1f}x")
+    db.fechar_conexoes()
+
+
+def mostrar_planos(banco):
+    """Imprime o EXPLAIN QUERY PLAN das consultas de listagem e se estão usando índices."""
+    db.DB_NAME = banco
+    db.criar_tabelas()
+    print(f"Versão do esquema: {db.versao_esquema()} (esperada: {db.VERSAO_ESQUEMA})")
+    for nome, (plano_ok, detalhes) in db.verificar_planos_consultas().items():
+        print(f"\n{nome}: {'OK' if plano_ok else 'VARREDURA/ORDENAÇÃO SEM ÍNDICE'}")
+        for detalhe in detalhes:
+            print(f"  {detalhe}")
+    db.fechar_conexoes()
+
+
+def bench_treeview(linhas):
+    """
+    Compara, numa Treeview com 'linhas' itens, a atualização antiga (apaga tudo e
+    reinsere) com sincronizar_treeview() quando só uma linha mudou.
+    """
+    import tkinter as tk
+    from tkinter import ttk
+    from app_biblioteca import sincronizar_treeview
+
+    try:
+        raiz = tk.Tk()
+    except tk.TclError as e:
+        print(f"Não foi possível abrir uma janela Tk ({e}); este cenário precisa de uma tela.")
+        return
+    raiz.withdraw()
+    tree = ttk.Treeview(raiz, columns=("id", "nome"), show="headings")
+    dados = [(i, f"Autor {i:06d}") for i in range(1, linhas + 1)]
+
+    def recarregar_tudo(dados_atuais):
+        for item in tree.get_children():
+            tree.delete(item)
+        for linha in dados_atuais:
+            tree.insert("", "end", values=linha)
+
+    recarregar_tudo(dados)
+    inicio = time.perf_counter()
+    dados[linhas // 2] = (dados[linhas // 2][0], "Autor alterado")
+    recarregar_tudo(dados)
+    tempo_completo = time.perf_counter() - inicio
+
+    tree.delete(*tree.get_children())
+    valores_exibidos = {}
+    sincronizar_treeview(tree, dados, valores_exibidos)
+    inicio = time.perf_counter()
+    dados[linhas // 3] = (dados[linhas // 3][0], "Outro autor alterado")
+    sincronizar_treeview(tree, dados, valores_exibidos)
+    tempo_incremental = time.perf_counter() - inicio
+    raiz.destroy()
+
+    print(f"Treeview com {linhas} linhas, uma linha alterada:")
+    print(f"  apagar tudo e reinserir: {tempo_completo * 1000:8.1f} ms")
+    print(f"  sincronização incremental: {tempo_incremental * 1000:6.1f} ms")
+
+
+def bench_concorrencia(threads, escritas_por_thread, usar_wal, busy_timeout_ms):
+    """
+    Várias threads (cada uma com sua conexão, como estações distintas) gravam e leem
+    ao mesmo tempo. Mede a vazão e quantas escritas precisaram de retentativa ou
+    falharam com BancoOcupadoError.
+    """
+    _preparar_banco_temporario()
+    db.configurar_modo_concorrente(ativo=usar_wal, busy_timeout_ms=busy_timeout_ms)
+    id_autor = db.adicionar_autor("Autor Concorrente")
+    falhas = []
+
+    def trabalhar(numero):
+        for i in range(escritas_por_thread):
+            try:
+                db.adicionar_livro(f"Livro {numero}-{i}", id_autor)
+            except db.BancoOcupadoError as e:
+                falhas.append(e)
+            db.listar_livros_pagina(None, 20)
+
+    trabalhadores = [threading.Thread(target=trabalhar, args=(n,)) for n in range(threads)]
+    inicio = time.perf_counter()
+    for t in trabalhadores:
+        t.start()
+    for t in trabalhadores:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    estatisticas = db.estatisticas_concorrencia()
+    total = threads * escritas_por_thread
+    print(f"{threads} threads x {escritas_por_thread} escritas ({'WAL' if usar_wal else 'journal padrão'}, "
+          f"busy_timeout={busy_timeout_ms} ms):")
+    print(f"  vazão: {total / duracao:.0f} escritas/s ({duracao:.2f} s)")
+    print(f"  retentativas: {estatisticas['retentativas']}, falhas por bloqueio: {len(falhas)}")
+    db.fechar_conexoes()
+
+
+def _medir_memoria(funcao):
+    """Executa funcao() sob o tracemalloc. Retorna (resultado, MiB retidos, MiB no pico, segundos)."""
+    tracemalloc.start()
+    try:
+        inicio = time.perf_counter()
+        resultado = funcao()
+        segundos = time.perf_counter() - inicio
+        retidos, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, retidos / 2**20, pico / 2**20, segundos
+
+
+def bench_memoria(linhas):
+    """Memória da listagem completa: lista de tuplas vs. LivrosCompactos."""
+    caminho = _preparar_banco_temporario()
+    try:
+        print(f"Gerando catálogo com {linhas} livros...")
+        gerar_catalogo(linhas)
+        db.listar_autores() # Carrega o cache de autores fora da medição
+
+        print(f"\nlistar_livros_com_autor() com {linhas} livros (medido com tracemalloc):")
+        print(f"  {'formato':<18} {'retido MiB':>11} {'pico MiB':>10} {'carga s':>9} {'iteração s':>11}")
+        for rotulo, compacto in (("lista de tuplas", False), ("LivrosCompactos", True)):
+            livros, retidos, pico, segundos = _medir_memoria(lambda: db.listar_livros_com_autor(compacto=compacto))
+            inicio = time.perf_counter()
+            for _livro in livros: # Custo da visão em tuplas para quem percorre o resultado
+                pass
+            iteracao = time.perf_counter() - inicio
+            print(f"  {rotulo:<18} {retidos:>11.1f} {pico:>10.1f} {segundos:>9.2f} {iteracao:>11.2f}")
+            del livros
+    finally:
+        _descartar_banco_temporario(caminho)
+
+
+def _rss_mib():
+    """Memória residente do processo em MiB (Linux, /proc/self/statm); None em outros sistemas."""
+    try:
+        with open("/proc/self/statm") as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _vazao_em_threads(funcao, threads, chamadas_por_thread):
+    """Várias threads chamam funcao(i) ao mesmo tempo; retorna a vazão total em operações/s."""
+    barreira = threading.Barrier(threads + 1)
+
+    def trabalhar():
+        barreira.wait()
+        for i in range(chamadas_por_thread):
+            funcao(i)
+
+    trabalhadores = [threading.Thread(target=trabalhar) for _ in range(threads)]
+    for t in trabalhadores:
+        t.start()
+    barreira.wait()
+    inicio = time.perf_counter()
+    for t in trabalhadores:
+        t.join()
+    return threads * chamadas_por_thread / (time.perf_counter() - inicio)
+
+
+def bench_espelho(total_livros, repeticoes, threads):
+    """
+    Leituras servidas pelo arquivo vs. pelo espelho em memória (db.ativar_espelho):
+    latência p50/p99 e vazão das consultas mais usadas, vazão com várias threads,
+    custo das escritas (que passam a atualizar também o espelho) e memória ocupada.
+    """
+    caminho = _preparar_banco_temporario()
+    try:
+        print(f"Gerando catálogo com {total_livros} livros...")
+        ids_autores = gerar_catalogo(total_livros)
+        chaves_pagina = [(titulo, id_livro) for id_livro, titulo, _nome, _id_autor
+                         in db.listar_livros_pagina(None, 1000)] or [None]
+        prefixos = [titulo[:3] for titulo, _id_livro in chaves_pagina if titulo] or ["Mem"]
+
+        def cenarios(aleatorio):
+            return {
+                "buscar_livro_por_id": lambda i: db.buscar_livro_por_id(aleatorio.randint(1, total_livros)),
+                "buscar_autor_por_id": lambda i: db.buscar_autor_por_id(aleatorio.choice(ids_autores)),
+                "listar_livros_pagina": lambda i: db.listar_livros_pagina(aleatorio.choice(chaves_pagina)),
+                "consultar_livros (prefixo)": lambda i: db.consultar_livros(
+                    filtros={"titulo_prefixo": aleatorio.choice(prefixos)}),
+                "buscar_livros": lambda i: db.buscar_livros(aleatorio.choice(("memórias", "sert", "rosa vento",
+                                                                              "noite mar", "Autor Sintético 00"))),
+            }
+
+        medicoes = {}
+        memoria = {}
+        for modo in ("arquivo", "espelho"):
+            if modo == "espelho":
+                rss_antes = _rss_mib()
+                copia = db.ativar_espelho()
+                if copia is None:
+                    print("Não foi possível ativar o espelho em memória.")
+                    return
+                rss_depois = _rss_mib()
+                memoria = {"bytes": copia["bytes"], "segundos": copia["segundos"],
+                           "rss_mib": None if rss_antes is None else rss_depois - rss_antes}
+            aleatorio = random.Random(7) # Mesma sequência de argumentos nos dois modos
+            for nome, funcao in cenarios(aleatorio).items():
+                funcao(0) # Aquece a conexão e o cache de páginas
+                medicoes[(nome, modo)] = _resumir(_medir(funcao, repeticoes))
+            leitura = cenarios(random.Random(11))["buscar_livro_por_id"]
+            medicoes[("vazao_threads", modo)] = _vazao_em_threads(leitura, threads, repeticoes)
+            medicoes[("atualizar_livro", modo)] = _resumir(_medir(
+                lambda i: db.atualizar_livro(aleatorio.randint(1, total_livros), f"Livro Alterado {modo} {i}",
+                                             aleatorio.choice(ids_autores)), max(1, repeticoes // 10)))
+
+        print(f"\nLeituras com {total_livros} livros e {len(ids_autores)} autores ({repeticoes} chamadas):")
+        print(f"  {'função':28} {'arquivo p50':>12} {'p99':>8} {'espelho p50':>12} {'p99':>8} "
+              f"{'ops/s arq.':>11} {'ops/s esp.':>11}")
+        for nome in cenarios(random.Random()):
+            arquivo, espelho = medicoes[(nome, "arquivo")], medicoes[(nome, "espelho")]
+            print(f"  {nome:28} {arquivo['p50_ms']:12.3f} {arquivo['p99_ms']:8.3f} {espelho['p50_ms']:12.3f} "
+                  f"{espelho['p99_ms']:8.3f} {arquivo['operacoes_por_s']:11.0f} {espelho['operacoes_por_s']:11.0f}")
+        print(f"\nbuscar_livro_por_id em {threads} threads: "
+              f"arquivo {medicoes[('vazao_threads', 'arquivo')]:.0f} ops/s, "
+              f"espelho {medicoes[('vazao_threads', 'espelho')]:.0f} ops/s")
+        arquivo, espelho = medicoes[("atualizar_livro", "arquivo")], medicoes[("atualizar_livro", "espelho")]
+        print(f"atualizar_livro (escrita no arquivo + espelho): p50 {arquivo['p50_ms']:.3f} -> "
+              f"{espelho['p50_ms']:.3f} ms, p99 {arquivo['p99_ms']:.3f} -> {espelho['p99_ms']:.3f} ms")
+        mib = memoria["bytes"] / 2**20
+        print(f"Espelho: {mib:.1f} MiB ({mib * 100000 / max(1, total_livros):.1f} MiB por 100 mil livros), "
+              f"copiado em {memoria['segundos']:.2f} s"
+              + (f"; RSS do processo +{memoria['rss_mib']:.1f} MiB" if memoria["rss_mib"] is not None else ""))
+    finally:
+        _descartar_banco_temporario(caminho)
+
+
+def _fluxos_de_trabalho(livros_por_fluxo):
+    """
+    Operações de várias etapas feitas na interface, como funções fluxo(i):
+    cada uma chama várias funções do database.py em sequência.
+    """
+    def cadastrar_autor_com_livros(i):
+        id_autor = db.adicionar_autor(f"Autor do Fluxo {i}")
+        for n in range(livros_por_fluxo):
+            db.adicionar_livro(f"Livro {n} do Fluxo {i}", id_autor)
+        return id_autor
+
+    def renomear_autor_e_livros(i):
+        id_autor = db.buscar_ids_autores([f"Autor do Fluxo {i}"])[f"Autor do Fluxo {i}"]
+        db.atualizar_autor(id_autor, f"Autor Renomeado {i}")
+        for id_livro, titulo, _nome, _id_autor in db.consultar_livros(filtros={"id_autor": id_autor},
+                                                                     limite=livros_por_fluxo):
+            db.atualizar_livro(id_livro, f"{titulo} (2ª edição)", id_autor)
+
+    def transferir_livros_e_excluir_autor(i):
+        origem = db.buscar_ids_autores([f"Autor Renomeado {i}"])[f"Autor Renomeado {i}"]
+        destino = db.adicionar_autor(f"Autor Destino {i}")
+        for id_livro, titulo, _nome, _id_autor in db.consultar_livros(filtros={"id_autor": origem},
+                                                                     limite=livros_por_fluxo):
+            db.atualizar_livro(id_livro, titulo, destino)
+        db.deletar_autor(origem)
+
+    return {
+        f"cadastrar autor + {livros_por_fluxo} livros": cadastrar_autor_com_livros,
+        "renomear autor e títulos dos livros": renomear_autor_e_livros,
+        "transferir livros e excluir autor": transferir_livros_e_excluir_autor,
+    }
+
+
+def bench_transacao(fluxos, livros_por_fluxo, usar_wal):
+    """
+    Os mesmos fluxos de várias etapas, com cada função confirmando a própria
+    escrita (um COMMIT por chamada) e agrupados em db.transacao() (um COMMIT por fluxo).
+    """
+    resultados = {}
+    for modo in ("avulsas", "transacao"):
+        caminho = _preparar_banco_temporario()
+        try:
+            if usar_wal:
+                db.configurar_modo_concorrente()
+            for nome, fluxo in _fluxos_de_trabalho(livros_por_fluxo).items():
+                if modo == "avulsas":
+                    executar = fluxo
+                else:
+                    def executar(i, fluxo=fluxo):
+                        with db.transacao():
+                            fluxo(i)
+                latencias = _medir(executar, fluxos)
+                resultados[(nome, modo)] = _resumir(latencias)
+        finally:
+            if usar_wal:
+                db.configurar_modo_concorrente(ativo=False)
+            _descartar_banco_temporario(caminho)
+
+    print(f"{fluxos} fluxos de cada tipo ({'WAL, synchronous=NORMAL' if usar_wal else 'journal padrão'}):")
+    print(f"  {'fluxo':38} {'avulsas p50':>12} {'p99':>8} {'transação p50':>14} {'p99':>8} {'ganho':>7}")
+    for nome in _fluxos_de_trabalho(livros_por_fluxo):
+        avulsas, transacao = resultados[(nome, "avulsas")], resultados[(nome, "transacao")]
+        print(f"  {nome:38} {avulsas['p50_ms']:12.2f} {avulsas['p99_ms']:8.2f} {transacao['p50_ms']:14.2f} "
+              f"{transacao['p99_ms']:8.2f} {avulsas['media_ms'] / transacao['media_ms']:6.1f}x")
+
+
+def _medir(funcao, repeticoes):
+    """Chama funcao(i) 'repeticoes' vezes e retorna as latências individuais em segundos."""
+    latencias = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(i)
+        latencias.append(time.perf_counter() - inicio)
+    return latencias
+
+
+def _resumir(latencias):
+    """Percentis (em ms) e vazão de uma série de latências."""
+    ordenadas = sorted(latencias)
+    def percentil(p):
+        return ordenadas[min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))] * 1000
+    total = sum(latencias)
+    return {
+        "chamadas": len(latencias),
+        "media_ms": statistics.fmean(latencias) * 1000,
+        "p50_ms": percentil(50),
+        "p90_ms": percentil(90),
+        "p99_ms": percentil(99),
+        "max_ms": ordenadas[-1] * 1000,
+        "operacoes_por_s": len(latencias) / total if total > 0 else 0.0,
+    }
+
+
+def _cenarios_suite(ids_autores, total_livros, aleatorio):
+    """
+    Monta {nome: (funcao(i), repeticoes_maximas)} cobrindo as funções públicas do
+    database.py. As funções que percorrem o catálogo inteiro rodam poucas vezes.
+    """
+    autor_com_livros = ids_autores[0] # O mais "popular" na distribuição de Zipf
+    novos_autores = []
+    novos_livros = []
+    primeira_pagina = db.listar_livros_pagina(None, 1000)
+    chaves_pagina = [(titulo, id_livro) for id_livro, titulo, _nome, _id_autor in primeira_pagina] or [None]
+
+    def adicionar_autor(i):
+        novos_autores.append(db.adicionar_autor(f"Autor Novo {i} {aleatorio.random()}"))
+
+    def adicionar_livro(i):
+        novos_livros.append(db.adicionar_livro(f"Livro Novo {i}", aleatorio.choice(ids_autores)))
+
+    def deletar_livro(i):
+        if novos_livros:
+            db.deletar_livro(novos_livros.pop())
+
+    def deletar_autor_livre(i):
+        if novos_autores:
+            db.deletar_autor(novos_autores.pop())
+
+    def listar_autores_sem_cache(i):
+        db.invalidar_cache_autores()
+        db.listar_autores()
+
+    return {
+        "criar_tabelas (esquema já atualizado)": (lambda i: db.criar_tabelas(), 20),
+        "listar_autores (cache)": (lambda i: db.listar_autores(), 200),
+        "listar_autores (sem cache)": (listar_autores_sem_cache, 20),
+        "buscar_autor_por_id": (lambda i: db.buscar_autor_por_id(aleatorio.choice(ids_autores)), 2000),
+        "buscar_ids_autores (100 nomes)": (
+            lambda i: db.buscar_ids_autores([f"Autor Sintético {aleatorio.randrange(len(ids_autores)):07d}"
+                                             for _ in range(100)]), 200),
+        "buscar_livro_por_id": (lambda i: db.buscar_livro_por_id(aleatorio.randint(1, total_livros)), 2000),
+        "listar_livros_com_autor": (lambda i: db.listar_livros_com_autor(), 5),
+        "listar_livros_pagina": (lambda i: db.listar_livros_pagina(aleatorio.choice(chaves_pagina)), 500),
+        "iterar_livros_com_autor (catálogo inteiro)": (lambda i: sum(1 for _ in db.iterar_livros_com_autor(1000)), 3),
+        "buscar_livros": (lambda i: db.buscar_livros(aleatorio.choice(("memórias", "sert", "rosa vento",
+                                                                       "noite mar", "Autor Sintético 00"))), 300),
+        "adicionar_autor": (adicionar_autor, 300),
+        "atualizar_autor": (lambda i: db.atualizar_autor(novos_autores[i % len(novos_autores)],
+                                                         f"Autor Renomeado {i} {aleatorio.random()}"), 300),
+        "adicionar_livro": (adicionar_livro, 300),
+        "atualizar_livro": (lambda i: db.atualizar_livro(novos_livros[i % len(novos_livros)],
+                                                         f"Livro Renomeado {i}", aleatorio.choice(ids_autores)), 300),
+        "adicionar_livros_em_lote (1000 livros)": (
+            lambda i: db.adicionar_livros_em_lote(
+                [(f"Lote {i}-{n}", aleatorio.choice(ids_autores)) for n in range(1000)]), 10),
+        "deletar_livro": (deletar_livro, 300),
+        "deletar_autor (bloqueado pela FK)": (lambda i: db.deletar_autor(autor_com_livros), 300),
+        "deletar_autor (sem livros)": (deletar_autor_livre, 300),
+    }
+
+
+def bench_suite(tamanhos, repeticoes, expoente_zipf, saida, comparar, limite_regressao):
+    """
+    Para cada tamanho de catálogo, gera um banco sintético e mede todas as funções
+    públicas do database.py. Grava os resultados em JSON e, opcionalmente, compara
+    com uma execução anterior.
+    """
+    resultados = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "expoente_zipf": expoente_zipf,
+        "catalogos": {},
+    }
+    for total_livros in tamanhos:
+        caminho = _preparar_banco_temporario()
+        inicio = time.perf_counter()
+        ids_autores = gerar_catalogo(total_livros, expoente_zipf=expoente_zipf)
+        tempo_geracao = time.perf_counter() - inicio
+        print(f"\nCatálogo com {total_livros} livros e {len(ids_autores)} autores "
+              f"(gerado em {tempo_geracao:.1f} s)")
+        print(f"  {'função':45} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'ops/s':>10}")
+
+        aleatorio = random.Random(7)
+        medicoes = {}
+        for nome, (funcao, maximo) in _cenarios_suite(ids_autores, total_livros, aleatorio).items():
+            resumo = _resumir(_medir(funcao, max(1, min(repeticoes, maximo))))
+            medicoes[nome] = resumo
+            print(f"  {nome:45} {resumo['p50_ms']:9.3f} {resumo['p90_ms']:9.3f} "
+                  f"{resumo['p99_ms']:9.3f} {resumo['operacoes_por_s']:10.0f}")
+        resultados["catalogos"][str(total_livros)] = {
+            "autores": len(ids_autores),
+            "segundos_geracao": tempo_geracao,
+            "funcoes": medicoes,
+        }
+        _descartar_banco_temporario(caminho)
+
+    if saida:
+        with open(saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+        print(f"\nResultados gravados em '{saida}'.")
+    if comparar:
+        _comparar_resultados(comparar, resultados, limite_regressao)
+
+
+def _comparar_resultados(caminho_base, atuais, limite_regressao):
+    """Compara o p50 de cada função com uma execução anterior e aponta regressões."""
+    with open(caminho_base, encoding="utf-8") as arquivo:
+        base = json.load(arquivo)
+    print(f"\nComparação com '{caminho_base}' ({base.get('data')}), regressão = p50 {limite_regressao:.0%} pior:")
+    regressoes = 0
+    for tamanho, catalogo in atuais["catalogos"].items():
+        funcoes_base = base.get("catalogos", {}).get(tamanho, {}).get("funcoes", {})
+        for nome, medicao in catalogo["funcoes"].items():
+            anterior = funcoes_base.get(nome)
+            if not anterior or anterior["p50_ms"] <= 0:
+                continue
+            razao = medicao["p50_ms"] / anterior["p50_ms"]
+            if razao > 1 + limite_regressao:
+                regressoes += 1
+                print(f"  [REGRESSÃO] {tamanho} livros, {nome}: {anterior['p50_ms']:.3f} -> "
+                      f"{medicao['p50_ms']:.3f} ms ({razao:.2f}x)")
+    if not regressoes:
+        print("  Nenhuma regressão encontrada.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do módulo database.py")
+    subparsers = parser.add_subparsers(dest="cenario", required=True)
+
+    p_conexao = subparsers.add_parser("conexao", help="Pool de conexões vs. conexão por chamada")
+    p_conexao.add_argument("--chamadas", type=int, default=5000)
+
+    p_planos = subparsers.add_parser("planos", help="Confere os planos de execução das listagens")
+    p_planos.add_argument("--banco", default=db.DB_NAME)
+
+    p_treeview = subparsers.add_parser("treeview", help="Atualização incremental vs. recarga completa")
+    p_treeview.add_argument("--linhas", type=int, default=50000)
+
+    p_concorrencia = subparsers.add_parser("concorrencia", help="Vazão de escritas simultâneas")
+    p_concorrencia.add_argument("--threads", type=int, default=8)
+    p_concorrencia.add_argument("--escritas", type=int, default=200, help="Escritas por thread")
+    p_concorrencia.add_argument("--sem-wal", action="store_true", help="Usa o journal padrão (rollback)")
+    p_concorrencia.add_argument("--busy-timeout", type=int, default=5000)
+
+    p_memoria = subparsers.add_parser("memoria", help="Memória da listagem completa: tuplas vs. colunas")
+    p_memoria.add_argument("--linhas", type=int, default=1000000)
+
+    p_espelho = subparsers.add_parser("espelho", help="Leituras no arquivo vs. no espelho em memória")
+    p_espelho.add_argument("--livros", type=int, default=100000)
+    p_espelho.add_argument("--repeticoes", type=int, default=2000, help="Chamadas por função")
+    p_espelho.add_argument("--threads", type=int, default=4, help="Threads na medição de vazão")
+
+    p_transacao = subparsers.add_parser("transacao", help="Fluxos de várias etapas: avulsos vs. db.transacao()")
+    p_transacao.add_argument("--fluxos", type=int, default=100, help="Execuções de cada fluxo")
+    p_transacao.add_argument("--livros-por-fluxo", type=int, default=20)
+    p_transacao.add_argument("--wal", action="store_true", help="Modo concorrente (WAL, synchronous=NORMAL)")
+
+    p_suite = subparsers.add_parser("suite", help="Mede todas as funções públicas em catálogos sintéticos")
+    p_suite.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 100000], help="Livros por catálogo")
+    p_suite.add_argument("--repeticoes", type=int, default=300, help="Chamadas por função (no máximo)")
+    p_suite.add_argument("--zipf", type=float, default=1.1, help="Expoente da distribuição livros/autor")
+    p_suite.add_argument("--saida", help="Arquivo JSON para gravar os resultados")
+    p_suite.add_argument("--comparar", help="JSON de uma execução anterior para detectar regressões")
+    p_suite.add_argument("--limite-regressao", type=float, default=0.2, help="Piora relativa tolerada no p50")
+
+    args = parser.parse_args()
+    if args.cenario == "conexao":
+        bench_conexao(args.chamadas)
+    elif args.cenario == "planos":
+        mostrar_planos(args.banco)
+    elif args.cenario == "treeview":
+        bench_treeview(args.linhas)
+    elif args.cenario == "concorrencia":
+        bench_concorrencia(args.threads, args.escritas, not args.sem_wal, args.busy_timeout)
+    elif args.cenario == "memoria":
+        bench_memoria(args.linhas)
+    elif args.cenario == "espelho":
+        bench_espelho(args.livros, args.repeticoes, args.threads)
+    elif args.cenario == "transacao":
+        bench_transacao(args.fluxos, args.livros_por_fluxo, args.wal)
+    elif args.cenario == "suite":
+        bench_suite(args.tamanhos, args.repeticoes, args.zipf, args.saida, args.comparar, args.limite_regressao)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Teste de carga do servidor.py: vários clientes simultâneos, cada um com uma
+conexão HTTP persistente, misturando listagens, buscas, consultas por ID e
+inclusões de livros. Ao final imprime requisições/s e latências (p50/p99) por
+tipo de operação.
+
+Uso:
+    python cliente_carga.py [--url http://127.0.0.1:8080] [--clientes 8] [--duracao 10]
+                            [--proporcao-escrita 0.1] [--semente 42]
+
+Use no máximo tantos clientes quanto as threads do servidor (--threads): cada
+conexão keep-alive ocupa uma thread enquanto estiver aberta.
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+PALAVRAS_BUSCA = ("livro", "historia", "mar", "noite", "vida", "tempo", "casa", "amor")
+
+
+def _requisitar(conexao, metodo, caminho, corpo=None):
+    """Envia uma requisição pela conexão persistente e retorna (status, resposta JSON)."""
+    dados = json.dumps(corpo).encode("utf-8") if corpo is not None else None
+    cabecalhos = {"Content-Type": "application/json"} if dados is not None else {}
+    conexao.request(metodo, caminho, body=dados, headers=cabecalhos)
+    resposta = conexao.getresponse()
+    return resposta.status, json.loads(resposta.read() or b"null")
+
+
+def _preparar_autores(host, porta, quantidade=20):
+    """Garante alguns autores no banco e retorna seus IDs."""
+    conexao = http.client.HTTPConnection(host, porta, timeout=30)
+    try:
+        _status, resposta = _requisitar(conexao, "GET", f"/autores?limite={quantidade}")
+        ids = [autor["id_autor"] for autor in resposta["itens"]]
+        sufixo = int(time.time())
+        for i in range(quantidade - len(ids)):
+            status, resposta = _requisitar(conexao, "POST", "/autores", {"nome": f"Autor de Carga {sufixo}-{i}"})
+            if status == 201:
+                ids.append(resposta["id_autor"])
+        return ids
+    finally:
+        conexao.close()
+
+
+def _cliente(host, porta, ids_autores, prazo, proporcao_escrita, semente, medicoes):
+    """Laço de um cliente: sorteia operações até o prazo e guarda (operacao, segundos, status)."""
+    aleatorio = random.Random(semente)
+    conexao = http.client.HTTPConnection(host, porta, timeout=30)
+    proxima_pagina = None
+    ids_livros = []
+    minhas = []
+    try:
+        while time.perf_counter() < prazo:
+            sorteio = aleatorio.random()
+            if sorteio < proporcao_escrita:
+                operacao, metodo, corpo = "incluir_livro", "POST", {
+                    "titulo": f"Livro de carga {aleatorio.randrange(10**9)}",
+                    "id_autor": aleatorio.choice(ids_autores)}
+                caminho = "/livros"
+            else:
+                corpo, metodo = None, "GET"
+                sorteio = (sorteio - proporcao_escrita) / (1 - proporcao_escrita)
+                if sorteio < 0.5:
+                    operacao = "listar_livros"
+                    caminho = "/livros?limite=50"
+                    if proxima_pagina:
+                        caminho += (f"&apos_titulo={quote(proxima_pagina['apos_titulo'])}"
+                                    f"&apos_id={proxima_pagina['apos_id']}")
+                elif sorteio < 0.75:
+                    operacao = "buscar_livros"
+                    caminho = f"/livros?limite=20&busca={aleatorio.choice(PALAVRAS_BUSCA)}"
+                elif sorteio < 0.9 and ids_livros:
+                    operacao = "obter_livro"
+                    caminho = f"/livros/{aleatorio.choice(ids_livros)}"
+                else:
+                    operacao = "listar_autores"
+                    caminho = "/autores?limite=50"
+
+            inicio = time.perf_counter()
+            try:
+                status, resposta = _requisitar(conexao, metodo, caminho, corpo)
+            except (OSError, http.client.HTTPException):
+                status, resposta = 0, None
+                conexao.close() # Reabre na próxima requisição
+            minhas.append((operacao, time.perf_counter() - inicio, status))
+
+            if operacao == "listar_livros" and status == 200:
+                proxima_pagina = resposta["proximo"]
+                ids_livros = [livro["id_livro"] for livro in resposta["itens"]] or ids_livros
+    finally:
+        conexao.close()
+        medicoes.extend(minhas)
+
+
+def _percentil(ordenadas, p):
+    return ordenadas[min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))] * 1000
+
+
+def _imprimir_relatorio(medicoes, segundos):
+    print(f"\n{'operação':<16} {'req':>8} {'erros':>6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'máx ms':>8}")
+    grupos = {}
+    for operacao, duracao, status in medicoes:
+        grupos.setdefault(operacao, []).append((duracao, status))
+    grupos["TOTAL"] = [(duracao, status) for _operacao, duracao, status in medicoes]
+    for operacao, linhas in grupos.items():
+        duracoes = sorted(duracao for duracao, _status in linhas)
+        erros = sum(1 for _duracao, status in linhas if status == 0 or status >= 500)
+        print(f"{operacao:<16} {len(linhas):>8} {erros:>6} {len(linhas) / segundos:>9.1f} "
+              f"{_percentil(duracoes, 50):>8.2f} {_percentil(duracoes, 99):>8.2f} {duracoes[-1] * 1000:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor HTTP da biblioteca.")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--clientes", type=int, default=8, help="Conexões simultâneas")
+    parser.add_argument("--duracao", type=float, default=10.0, help="Segundos de carga")
+    parser.add_argument("--proporcao-escrita", type=float, default=0.1,
+                        help="Fração das requisições que incluem livros (0 a 1)")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    endereco = urlsplit(args.url)
+    host, porta = endereco.hostname, endereco.port or 80
+    ids_autores = _preparar_autores(host, porta)
+    if not ids_autores:
+        parser.error("não foi possível obter nem cadastrar autores no servidor")
+
+    print(f"{args.clientes} clientes por {args.duracao:.0f} s contra {args.url} "
+          f"({args.proporcao_escrita:.0%} de escritas)...")
+    medicoes = []
+    inicio = time.perf_counter()
+    prazo = inicio + args.duracao
+    threads = [threading.Thread(target=_cliente,
+                                args=(host, porta, ids_autores, prazo, args.proporcao_escrita,
+                                      args.semente + i, medicoes))
+               for i in range(args.clientes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    segundos = time.perf_counter() - inicio
+
+    if not medicoes:
+        print("Nenhuma requisição concluída.")
+        return
+    _imprimir_relatorio(medicoes, segundos)
+
+    conexao = http.client.HTTPConnection(host, porta, timeout=30)
+    try:
+        _status, retrato = _requisitar(conexao, "GET", "/estatisticas")
+        agrupador = retrato.get("agrupador_escritas", {})
+        if agrupador.get("lotes"):
+            print(f"\nEscritas agrupadas: {agrupador['escritas']} em {agrupador['lotes']} transações "
+                  f"(maior lote: {agrupador['maior_lote']}).")
+    finally:
+        conexao.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,370 @@
+import atexit
+import bisect
+import contextlib
+import csv
+import functools
+import gzip
+import json
+import os
+import random
+import re
 import sqlite3
+import threading
+import time
+from array import array
+from collections.abc import Sequence
+
+import indice_trigramas  # Semelhança de nomes (autores quase duplicados)
+import instrumentacao  # Métricas por função e log de consultas lentas
 
 # Nome do arquivo do banco de dados SQLite
 DB_NAME = 'biblioteca.db'
+ARQUIVO_LOG_LENTO = 'consultas_lentas.log'  # Log de consultas lentas, criado ao lado de DB_NAME
+
+# --- Gerenciamento de Conexões (uma conexão persistente por thread) ---
+# Abrir e fechar uma conexão a cada chamada custa mais do que as próprias consultas
+# curtas. Cada thread mantém a sua conexão aberta; todas são registradas para que
+# possam ser fechadas de uma vez quando a aplicação terminar.
+_conexoes_por_thread = threading.local()
+_conexoes_abertas = []
+_trava_conexoes = threading.Lock()
+_geracao_pool = 0  # Incrementada por fechar_conexoes(); invalida as conexões antigas das threads
+
+def _abrir_conexao():
+    """Abre uma nova conexão com o banco e aplica os PRAGMAs (uma única vez por conexão)."""
+    # check_same_thread=False permite que fechar_conexoes() feche, a partir da thread
+    # principal, conexões criadas por outras threads. Cada conexão continua sendo
+    # usada apenas pela thread dona dela.
+    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+    conn.execute("PRAGMA foreign_keys = ON")  # Ativa a checagem de chaves estrangeiras
+    if CONFIG_CONCORRENCIA["ativo"]:
+        conn.execute(f"PRAGMA busy_timeout = {int(CONFIG_CONCORRENCIA['busy_timeout_ms'])}")
+        conn.execute(f"PRAGMA synchronous = {CONFIG_CONCORRENCIA['synchronous']}")
+    return conn
+
+def obter_conexao():
+    """
+    Retorna a conexão persistente da thread atual, abrindo-a na primeira chamada.
+    Se DB_NAME tiver sido alterado desde a abertura, a conexão antiga é descartada.
+    """
+    conn = getattr(_conexoes_por_thread, 'conn', None)
+    if conn is not None:
+        if _conexoes_por_thread.geracao != _geracao_pool:
+            conn = None  # Já fechada por fechar_conexoes()
+        elif _conexoes_por_thread.db_name == DB_NAME:
+            if _conexoes_por_thread.capturando_sql != instrumentacao.CONFIG_INSTRUMENTACAO["capturar_sql"]:
+                _conexoes_por_thread.capturando_sql = _aplicar_captura_sql(conn)
+            return conn
+        else:
+            _descartar_conexao(conn)
+
+    conn = _abrir_conexao()
+    with _trava_conexoes:
+        _conexoes_abertas.append(conn)
+        _conexoes_por_thread.geracao = _geracao_pool
+    _conexoes_por_thread.conn = conn
+    _conexoes_por_thread.db_name = DB_NAME
+    _conexoes_por_thread.capturando_sql = _aplicar_captura_sql(conn)
+    return conn
 
-def conectar_db():
+def _aplicar_captura_sql(conn):
     """
-    Estabelece e retorna uma conexão com o banco de dados SQLite e um cursor.
-    Habilita o suporte a chaves estrangeiras.
+    Liga ou desliga o rastreio de SQL da conexão conforme CONFIG_INSTRUMENTACAO.
+    Cada thread faz isso na própria conexão, ao pegá-la (ver configurar_instrumentacao).
+    """
+    capturar = instrumentacao.CONFIG_INSTRUMENTACAO["capturar_sql"]
+    conn.set_trace_callback(instrumentacao.rastrear_sql if capturar else None)
+    return capturar
+
+def _descartar_conexao(conn):
+    """Fecha uma conexão do pool e a remove do registro."""
+    with _trava_conexoes:
+        if conn in _conexoes_abertas:
+            _conexoes_abertas.remove(conn)
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+@instrumentacao.instrumentado
+def conectar_db(leitura=False):
+    """
+    Retorna a conexão persistente da thread atual e um cursor novo.
+    O suporte a chaves estrangeiras já vem habilitado na conexão.
+    Com leitura=True e o espelho em memória ativo (ver ativar_espelho), a
+    conexão é a do espelho: use-a só para consultas.
+    Após o uso, devolva a conexão com liberar_conexao(conn, cursor).
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        conn.execute("PRAGMA foreign_keys = ON")  # Ativa a checagem de chaves estrangeiras
+        transacao_atual = getattr(_conexoes_por_thread, "transacao", None)
+        if transacao_atual is not None:
+            # Dentro de transacao(): a operação roda num SAVEPOINT da transação em curso
+            # (as leituras também, para enxergar o que ainda não foi confirmado)
+            conn = _OperacaoEmTransacao(transacao_atual)
+        elif leitura and _espelho_ativo():
+            conn = _obter_conexao_espelho()
+        else:
+            if leitura and getattr(_conexoes_espelho, "conn", None) is not None:
+                _descartar_conexao_espelho() # Espelho desativado: solta a cópia antiga em memória
+            conn = obter_conexao()
         cursor = conn.cursor()
         return conn, cursor
     except sqlite3.Error as e:
         print(f"Erro ao conectar ao banco de dados: {e}")
         return None, None
 
+def liberar_conexao(conn, cursor):
+    """
+    Devolve a conexão ao pool sem fechá-la: fecha o cursor e desfaz qualquer
+    transação deixada pendente por um erro, para não segurar travas do banco.
+    """
+    try:
+        if cursor is not None:
+            cursor.close()
+        if conn.in_transaction:
+            conn.rollback()
+    except sqlite3.Error as e:
+        print(f"Erro ao liberar conexão: {e}")
+        if isinstance(conn, _OperacaoEmTransacao):
+            return # A conexão é a da transação: quem decide o destino dela é transacao()
+        _descartar_conexao(conn)
+        _conexoes_por_thread.conn = None
+
+def fechar_conexoes():
+    """Fecha todas as conexões abertas pelo pool (chamada na saída da aplicação)."""
+    global _geracao_pool
+    with _trava_conexoes:
+        conexoes = list(_conexoes_abertas)
+        _conexoes_abertas.clear()
+        _geracao_pool += 1
+    for conn in conexoes:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _conexoes_por_thread.conn = None
+
+atexit.register(fechar_conexoes)
+
+# --- Acesso Concorrente (várias estações usando o mesmo arquivo) ---
+
+class BancoOcupadoError(sqlite3.OperationalError):
+    """
+    O banco continuou travado por outra conexão (SQLITE_BUSY/SQLITE_LOCKED) mesmo
+    após todas as retentativas. Diferente de IntegrityError: a operação é válida
+    e pode ser repetida mais tarde.
+    """
+
+CONFIG_CONCORRENCIA = {
+    "ativo": False,           # Modo concorrente: WAL + busy_timeout + synchronous
+    "busy_timeout_ms": 5000,  # Quanto o SQLite espera por uma trava antes de desistir
+    "synchronous": "NORMAL",  # Em WAL, NORMAL só sincroniza no checkpoint
+    "tentativas": 3,          # Execuções de uma escrita antes de lançar BancoOcupadoError
+    "espera_inicial": 0.05,   # Segundos antes da 1ª retentativa (dobra a cada nova tentativa)
+}
+_estatisticas_concorrencia = {"escritas": 0, "retentativas": 0, "falhas_por_bloqueio": 0}
+_trava_estatisticas_concorrencia = threading.Lock()
+
+def configurar_modo_concorrente(ativo=True, busy_timeout_ms=5000, synchronous="NORMAL",
+                                tentativas=3, espera_inicial=0.05):
+    """
+    Liga (ou desliga) o modo para várias instâncias compartilhando o mesmo arquivo:
+    journal em WAL (leitores não bloqueiam o escritor e vice-versa), busy_timeout
+    e nível de synchronous configuráveis. As conexões do pool são reabertas com a
+    nova configuração. Retorna o journal_mode em vigor.
+    """
+    synchronous = synchronous.upper()
+    if synchronous not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+        raise ValueError(f"Nível de synchronous inválido: {synchronous}")
+    CONFIG_CONCORRENCIA.update(ativo=ativo, busy_timeout_ms=int(busy_timeout_ms), synchronous=synchronous,
+                               tentativas=max(1, int(tentativas)), espera_inicial=float(espera_inicial))
+    fechar_conexoes()
+
+    conn, cursor = conectar_db()
+    if conn is None: return None
+    try:
+        # O journal_mode fica gravado no arquivo: vale para todos os processos
+        cursor.execute(f"PRAGMA journal_mode = {'WAL' if ativo else 'DELETE'}")
+        return cursor.fetchone()[0]
+    except sqlite3.Error as e:
+        print(f"Erro ao configurar o modo concorrente: {e}")
+        return None
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+def _erro_de_bloqueio(erro):
+    """Indica se o erro é SQLITE_BUSY/SQLITE_LOCKED (banco travado por outra conexão)."""
+    if not isinstance(erro, sqlite3.OperationalError):
+        return False
+    codigo = getattr(erro, "sqlite_errorcode", None)
+    if codigo is not None:
+        return codigo & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    mensagem = str(erro).lower()
+    return "locked" in mensagem or "busy" in mensagem
+
+def _relancar_se_bloqueio(erro):
+    """Usada nos 'except sqlite3.Error' das escritas: travas viram BancoOcupadoError."""
+    if _erro_de_bloqueio(erro):
+        raise BancoOcupadoError(str(erro)) from erro
+
+def _com_retentativa(funcao_escrita):
+    """
+    Decorador das funções de escrita: se a escrita lançar BancoOcupadoError, ela é
+    repetida com espera exponencial (com um pouco de aleatoriedade, para que
+    várias estações não tentem de novo no mesmo instante). Esgotadas as
+    tentativas, o BancoOcupadoError é propagado a quem chamou.
+    """
+    @functools.wraps(funcao_escrita)
+    def envoltorio(*args, **kwargs):
+        espera = CONFIG_CONCORRENCIA["espera_inicial"]
+        for tentativa in range(1, CONFIG_CONCORRENCIA["tentativas"] + 1):
+            try:
+                resultado = funcao_escrita(*args, **kwargs)
+                with _trava_estatisticas_concorrencia:
+                    _estatisticas_concorrencia["escritas"] += 1
+                if _espelho_ativo() and getattr(_conexoes_por_thread, "transacao", None) is None:
+                    sincronizar_espelho() # Escrita já confirmada no arquivo: leva-a também ao espelho
+                return resultado
+            except BancoOcupadoError:
+                if tentativa >= CONFIG_CONCORRENCIA["tentativas"]:
+                    with _trava_estatisticas_concorrencia:
+                        _estatisticas_concorrencia["falhas_por_bloqueio"] += 1
+                    raise
+                with _trava_estatisticas_concorrencia:
+                    _estatisticas_concorrencia["retentativas"] += 1
+                time.sleep(espera * random.uniform(0.5, 1.5))
+                espera *= 2
+    return envoltorio
+
+def configurar_instrumentacao(ativo=True, capturar_sql=False, limite_lento_ms=None):
+    """
+    Liga (ou desliga) as métricas por função e, opcionalmente, a captura do SQL
+    executado. Com a captura ligada, as chamadas mais lentas que limite_lento_ms
+    vão para ARQUIVO_LOG_LENTO, ao lado do arquivo do banco em uso. Cada thread
+    passa a rastrear (ou não) o SQL na próxima vez que pegar a sua conexão.
+    """
+    config = instrumentacao.CONFIG_INSTRUMENTACAO
+    config.update(ativo=ativo, capturar_sql=ativo and capturar_sql,
+                  arquivo_log_lento=os.path.join(os.path.dirname(os.path.abspath(DB_NAME)), ARQUIVO_LOG_LENTO))
+    if limite_lento_ms is not None:
+        config["limite_lento_ms"] = float(limite_lento_ms)
+
+def estatisticas_banco():
+    """
+    Retrato de todas as métricas do módulo: por função (chamadas, latência,
+    histograma, linhas), comandos SQL mais executados, cache de autores e
+    contadores de concorrência.
+    """
+    retrato = instrumentacao.estatisticas()
+    retrato["cache_autores"] = estatisticas_cache_autores()
+    retrato["concorrencia"] = estatisticas_concorrencia()
+    retrato["espelho"] = estatisticas_espelho()
+    return retrato
+
+def estatisticas_concorrencia():
+    """Retorna os contadores de escritas concluídas, retentativas e falhas por bloqueio."""
+    with _trava_estatisticas_concorrencia:
+        return dict(_estatisticas_concorrencia)
+
+# --- Transações com várias operações (unidade de trabalho) ---
+# Cada função deste módulo confirma a própria escrita. Para gravar várias delas
+# de uma vez (ex.: um autor e os seus 20 livros), com um único COMMIT e tudo
+# desfeito se algo der errado no meio:
+#
+#     with db.transacao() as tx:
+#         id_autor = db.adicionar_autor("Cecília Meireles")
+#         for titulo in titulos:
+#             db.adicionar_livro(titulo, id_autor)
+#
+# Fora do 'with' as funções continuam se comportando como antes.
+
+class Transacao:
+    """Transação aberta por transacao() na thread atual."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.operacoes = 0      # Chamadas ao banco feitas dentro da transação
+        self.desfeita = False
+
+    def desfazer(self):
+        """Descarta tudo ao sair do 'with', sem precisar lançar uma exceção."""
+        self.desfeita = True
+
+class _OperacaoEmTransacao:
+    """
+    O que conectar_db() devolve dentro de transacao(): cada função roda num
+    SAVEPOINT próprio. O commit() da função só libera o savepoint (o COMMIT de
+    verdade é o do fim do 'with'); o rollback() desfaz só aquela operação, como
+    aconteceria fora da transação. Os BEGIN das funções são ignorados.
+    """
+
+    def __init__(self, transacao_atual):
+        self.conn = transacao_atual.conn
+        self.conn.execute("SAVEPOINT operacao")
+        self.in_transaction = True # Savepoint ainda aberto
+        transacao_atual.operacoes += 1
+
+    def cursor(self):
+        return self.conn.cursor(_CursorEmTransacao)
+
+    def commit(self):
+        if self.in_transaction:
+            self.in_transaction = False
+            self.conn.execute("RELEASE operacao")
+
+    def rollback(self):
+        if self.in_transaction:
+            self.in_transaction = False
+            self.conn.execute("ROLLBACK TO operacao")
+            self.conn.execute("RELEASE operacao")
+
+class _CursorEmTransacao(sqlite3.Cursor):
+    def execute(self, sql, parametros=()):
+        if sql.lstrip()[:5].upper() == "BEGIN":
+            return self # A transação já foi aberta por transacao()
+        return super().execute(sql, parametros)
+
+@contextlib.contextmanager
+def transacao(imediata=True):
+    """
+    Agrupa as chamadas às funções deste módulo feitas pela thread atual dentro do
+    'with' numa única transação: mesma conexão, um só COMMIT na saída e ROLLBACK
+    de tudo se o bloco lançar uma exceção (ou se tx.desfazer() for chamado).
+    Uma função que falhar dentro do bloco retorna o valor de erro de sempre e só
+    a parte dela é desfeita; para desistir de tudo, lance uma exceção.
+    Com imediata=True a trava de escrita é obtida já no início (BEGIN IMMEDIATE),
+    então as escritas do bloco não esbarram em outra estação no meio do caminho.
+    Um 'with transacao()' dentro de outro participa da transação de fora.
+    """
+    atual = getattr(_conexoes_por_thread, "transacao", None)
+    if atual is not None:
+        yield atual
+        return
+
+    conn = obter_conexao()
+    try:
+        conn.execute("BEGIN IMMEDIATE" if imediata else "BEGIN")
+    except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
+        raise
+    tx = Transacao(conn)
+    _conexoes_por_thread.transacao = tx
+    confirmada = False
+    try:
+        yield tx
+        if not tx.desfeita:
+            conn.commit()
+            confirmada = True
+    finally:
+        _conexoes_por_thread.transacao = None
+        if not confirmada:
+            conn.rollback()
+            invalidar_cache_autores() # Pode ter recebido correções de escritas desfeitas
+    if _espelho_ativo():
+        sincronizar_espelho()
+
+@instrumentacao.instrumentado
 def criar_tabelas():
     """
     Cria as tabelas 'autor' e 'livro' no banco de dados, se elas ainda não existirem.
@@ -52,12 +400,536 @@ def criar_tabelas():
         print(f"Tabelas 'autor' e 'livro' verificadas/criadas com sucesso no arquivo '{DB_NAME}'.")
     except sqlite3.Error as e:
         print(f"Erro ao criar as tabelas: {e}")
+        return
     finally:
         if conn:
-            conn.close()
+            liberar_conexao(conn, cursor)
+
+    aplicar_migracoes()
+
+# --- Migrações de Esquema (versão registrada em PRAGMA user_version) ---
+# Cada migração é uma função que recebe um cursor e altera o esquema. Elas são
+# aplicadas em ordem, cada uma na sua própria transação, e a versão do banco só
+# avança quando a migração inteira dá certo. Nunca altere uma migração já
+# publicada: acrescente uma nova ao fim da lista.
+
+def _migracao_001_indices(cursor):
+    # JOIN livro -> autor e checagem do ON DELETE RESTRICT em deletar_autor
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_livro_id_autor ON livro(id_autor)")
+    # ORDER BY l.titulo (o rowid/id_livro fica implícito no fim do índice)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_livro_titulo ON livro(titulo)")
+
+def _fts5_disponivel(cursor):
+    """Indica se o SQLite em uso foi compilado com o módulo FTS5."""
+    cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    return bool(cursor.fetchone()[0])
+
+def _migracao_002_busca_textual(cursor):
+    # Sem FTS5 a migração não cria nada e buscar_livros() usa LIKE como alternativa.
+    if not _fts5_disponivel(cursor):
+        print("Aviso: SQLite sem FTS5; a busca textual usará LIKE (mais lenta).")
+        return
+    # Índice textual de título + nome do autor; rowid = id_livro.
+    # prefix='2 3' guarda índices de prefixo para acelerar a busca enquanto se digita.
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS livro_fts USING fts5(
+            titulo, nome_autor,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS livro_fts_ai AFTER INSERT ON livro BEGIN
+            INSERT INTO livro_fts (rowid, titulo, nome_autor)
+            SELECT new.id_livro, new.titulo, nome FROM autor WHERE id_autor = new.id_autor;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS livro_fts_ad AFTER DELETE ON livro BEGIN
+            DELETE FROM livro_fts WHERE rowid = old.id_livro;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS livro_fts_au AFTER UPDATE OF titulo, id_autor ON livro BEGIN
+            DELETE FROM livro_fts WHERE rowid = old.id_livro;
+            INSERT INTO livro_fts (rowid, titulo, nome_autor)
+            SELECT new.id_livro, new.titulo, nome FROM autor WHERE id_autor = new.id_autor;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS autor_fts_au AFTER UPDATE OF nome ON autor BEGIN
+            UPDATE livro_fts SET nome_autor = new.nome
+            WHERE rowid IN (SELECT id_livro FROM livro WHERE id_autor = new.id_autor);
+        END
+    ''')
+    cursor.execute("DELETE FROM livro_fts")
+    cursor.execute('''
+        INSERT INTO livro_fts (rowid, titulo, nome_autor)
+        SELECT l.id_livro, l.titulo, a.nome
+        FROM livro l
+        INNER JOIN autor a ON l.id_autor = a.id_autor
+    ''')
+
+def _migracao_003_indice_autor_titulo(cursor):
+    # Filtro por autor com ordenação por título e ordenação por autor (nome, título, id)
+    # em consultar_livros; substitui idx_livro_id_autor, que é prefixo deste índice
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_livro_autor_titulo ON livro(id_autor, titulo)")
+    cursor.execute("DROP INDEX IF EXISTS idx_livro_id_autor")
+
+def _migracao_004_contadores(cursor):
+    # Contadores mantidos por triggers: livros por autor (autor.livros_count) e
+    # totais do catálogo (estatisticas_catalogo), lidos sem varrer 'livro'.
+    cursor.execute("ALTER TABLE autor ADD COLUMN livros_count INTEGER NOT NULL DEFAULT 0")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS estatisticas_catalogo (
+            chave TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    # Autores com mais livros (painel) sem ordenar a tabela inteira
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_autor_livros_count ON autor(livros_count)")
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS livro_contadores_ai AFTER INSERT ON livro BEGIN
+            UPDATE autor SET livros_count = livros_count + 1 WHERE id_autor = new.id_autor;
+            UPDATE estatisticas_catalogo SET valor = valor + 1 WHERE chave = 'livros';
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS livro_contadores_ad AFTER DELETE ON livro BEGIN
+            UPDATE autor SET livros_count = livros_count - 1 WHERE id_autor = old.id_autor;
+            UPDATE estatisticas_catalogo SET valor = valor - 1 WHERE chave = 'livros';
+        END
+    ''')
+    # Quando o próprio id_autor muda (ON UPDATE CASCADE), o contador já foi junto com a
+    # linha do autor e o id antigo não existe mais: o EXISTS evita contar de novo
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS livro_contadores_au AFTER UPDATE OF id_autor ON livro
+        WHEN old.id_autor != new.id_autor AND EXISTS (SELECT 1 FROM autor WHERE id_autor = old.id_autor)
+        BEGIN
+            UPDATE autor SET livros_count = livros_count - 1 WHERE id_autor = old.id_autor;
+            UPDATE autor SET livros_count = livros_count + 1 WHERE id_autor = new.id_autor;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS autor_contadores_ai AFTER INSERT ON autor BEGIN
+            UPDATE estatisticas_catalogo SET valor = valor + 1 WHERE chave = 'autores';
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS autor_contadores_ad AFTER DELETE ON autor BEGIN
+            UPDATE estatisticas_catalogo SET valor = valor - 1 WHERE chave = 'autores';
+        END
+    ''')
+    _recalcular_contadores(cursor)
+
+def _recalcular_contadores(cursor):
+    """Recalcula todos os contadores a partir das tabelas (migração 4 e reconstruir_contadores)."""
+    cursor.execute('''
+        UPDATE autor SET livros_count = (SELECT COUNT(*) FROM livro WHERE livro.id_autor = autor.id_autor)
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO estatisticas_catalogo (chave, valor)
+        VALUES ('livros', (SELECT COUNT(*) FROM livro)), ('autores', (SELECT COUNT(*) FROM autor))
+    ''')
+
+MAX_LOG_MUDANCAS = 10000  # Linhas mantidas em log_mudancas; as mais antigas são podadas por trigger
+
+def _migracao_005_log_mudancas(cursor):
+    # Registro das alterações em autor/livro com número de sequência crescente, para
+    # que outras instâncias apliquem só o que mudou (ver mudancas_desde).
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS log_mudancas (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabela TEXT NOT NULL,
+            id_registro INTEGER NOT NULL,
+            operacao TEXT NOT NULL
+        )
+    ''')
+    for tabela, coluna, colunas_alteradas in (("autor", "id_autor", "nome, id_autor"),
+                                              ("livro", "id_livro", "titulo, id_autor, id_livro")):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {tabela}_log_ai AFTER INSERT ON {tabela} BEGIN
+                INSERT INTO log_mudancas (tabela, id_registro, operacao) VALUES ('{tabela}', new.{coluna}, 'I');
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {tabela}_log_ad AFTER DELETE ON {tabela} BEGIN
+                INSERT INTO log_mudancas (tabela, id_registro, operacao) VALUES ('{tabela}', old.{coluna}, 'D');
+            END
+        ''')
+        # Só as colunas exibidas: livros_count (contador) muda a cada livro e não interessa aqui
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {tabela}_log_au AFTER UPDATE OF {colunas_alteradas} ON {tabela} BEGIN
+                INSERT INTO log_mudancas (tabela, id_registro, operacao)
+                SELECT '{tabela}', old.{coluna}, 'D' WHERE old.{coluna} != new.{coluna};
+                INSERT INTO log_mudancas (tabela, id_registro, operacao) VALUES ('{tabela}', new.{coluna}, 'U');
+            END
+        ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS log_mudancas_poda AFTER INSERT ON log_mudancas BEGIN
+            DELETE FROM log_mudancas WHERE seq <= new.seq - {int(MAX_LOG_MUDANCAS)};
+        END
+    ''')
+
+MIGRACOES = [
+    (1, "Índices em livro(id_autor) e livro(titulo)", _migracao_001_indices),
+    (2, "Busca textual (FTS5) sobre título e nome do autor", _migracao_002_busca_textual),
+    (3, "Índice em livro(id_autor, titulo) para ordenação e filtro por autor", _migracao_003_indice_autor_titulo),
+    (4, "Contadores de livros por autor e totais do catálogo mantidos por triggers", _migracao_004_contadores),
+    (5, "Registro de mudanças (log_mudancas) para atualização entre instâncias", _migracao_005_log_mudancas),
+]
+VERSAO_ESQUEMA = MIGRACOES[-1][0]  # Versão esperada após aplicar todas as migrações
+
+def versao_esquema():
+    """Retorna a versão atual do esquema do banco (PRAGMA user_version)."""
+    conn, cursor = conectar_db()
+    if conn is None: return None
+
+    try:
+        cursor.execute("PRAGMA user_version")
+        return cursor.fetchone()[0]
+    except sqlite3.Error as e:
+        print(f"Erro ao ler a versão do esquema: {e}")
+        return None
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+@instrumentacao.instrumentado
+def aplicar_migracoes():
+    """
+    Aplica, em ordem, as migrações com versão maior que a do banco.
+    Retorna True se o esquema ficou na versão VERSAO_ESQUEMA.
+    """
+    versao_atual = versao_esquema()
+    if versao_atual is None: return False
+
+    conn, cursor = conectar_db()
+    if conn is None: return False
+
+    try:
+        for versao, descricao, migracao in MIGRACOES:
+            if versao <= versao_atual:
+                continue
+            try:
+                cursor.execute("BEGIN")
+                migracao(cursor)
+                cursor.execute(f"PRAGMA user_version = {int(versao)}")
+                conn.commit()
+                print(f"Migração {versao} aplicada: {descricao}")
+            except sqlite3.Error as e:
+                conn.rollback()
+                print(f"Erro ao aplicar a migração {versao} ({descricao}): {e}")
+                return False
+        return True
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+@instrumentacao.instrumentado
+def preparar_banco():
+    """
+    Versão rápida de criar_tabelas() para o início da aplicação: se PRAGMA
+    user_version já é VERSAO_ESQUEMA, tabelas e índices existem e nenhum DDL
+    nem commit é feito (só a leitura do cabeçalho do arquivo). Caso contrário
+    (banco novo ou desatualizado), roda criar_tabelas(), que aplica as migrações.
+    Retorna True se o esquema ficou na versão VERSAO_ESQUEMA.
+    """
+    if versao_esquema() == VERSAO_ESQUEMA:
+        return True
+    criar_tabelas()
+    return versao_esquema() == VERSAO_ESQUEMA
+
+# Consultas críticas de listagem, usadas para conferir os planos de execução
+CONSULTAS_MONITORADAS = {
+    "listar_livros_com_autor": ("""
+        SELECT l.id_livro, l.titulo, a.nome, l.id_autor
+        FROM livro l
+        INNER JOIN autor a ON l.id_autor = a.id_autor
+        ORDER BY l.titulo ASC
+    """, ()),
+    "listar_livros_pagina": ("""
+        SELECT l.id_livro, l.titulo, a.nome, l.id_autor
+        FROM livro l
+        INNER JOIN autor a ON l.id_autor = a.id_autor
+        WHERE (l.titulo, l.id_livro) > (?, ?)
+        ORDER BY l.titulo ASC, l.id_livro ASC
+        LIMIT ?
+    """, ("", 0, 200)),
+    "deletar_autor (checagem da FK)": ("SELECT 1 FROM livro WHERE id_autor = ?", (0,)),
+    "consultar_livros (por autor, decrescente)": ("""
+        SELECT l.id_livro, l.titulo, a.nome, l.id_autor
+        FROM livro l
+        INNER JOIN autor a ON l.id_autor = a.id_autor
+        WHERE (a.nome, l.titulo, l.id_livro) < (?, ?, ?)
+        ORDER BY a.nome DESC, l.titulo DESC, l.id_livro DESC
+        LIMIT ?
+    """, ("~", "", 0, 200)),
+    "consultar_livros (filtro por autor, por título)": ("""
+        SELECT l.id_livro, l.titulo, a.nome, l.id_autor
+        FROM livro l
+        INNER JOIN autor a ON l.id_autor = a.id_autor
+        WHERE l.id_autor = ?
+        ORDER BY l.titulo ASC, l.id_livro ASC
+        LIMIT ?
+    """, (1, 200)),
+    "estatisticas_catalogo (top autores)": (
+        "SELECT id_autor, nome, livros_count FROM autor ORDER BY livros_count DESC LIMIT ?", (10,)),
+}
+
+def explicar_consulta(sql, parametros=()):
+    """Retorna as linhas de detalhe do EXPLAIN QUERY PLAN de uma consulta."""
+    conn, cursor = conectar_db()
+    if conn is None: return []
+
+    try:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, parametros)
+        return [linha[3] for linha in cursor.fetchall()]
+    except sqlite3.Error as e:
+        print(f"Erro ao obter o plano da consulta: {e}")
+        return []
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+def verificar_planos_consultas():
+    """
+    Confere o plano de cada consulta em CONSULTAS_MONITORADAS. Retorna um dicionário
+    {nome: (plano_ok, detalhes)}; o plano é considerado ruim se varrer uma tabela
+    inteira sem índice ("SCAN livro") ou ordenar numa B-tree temporária.
+    """
+    resultado = {}
+    for nome, (sql, parametros) in CONSULTAS_MONITORADAS.items():
+        detalhes = explicar_consulta(sql, parametros)
+        varredura_sem_indice = any(d.startswith("SCAN") and "INDEX" not in d for d in detalhes)
+        ordenacao_temporaria = any("TEMP B-TREE" in d for d in detalhes)
+        resultado[nome] = (bool(detalhes) and not varredura_sem_indice and not ordenacao_temporaria, detalhes)
+    return resultado
+
+# --- Cache de Autores ---
+# A lista de autores é lida várias vezes para os mesmos dados (Treeview de autores,
+# combobox da tela de livros, navegação entre telas). Ela fica em memória,
+# junto com os índices por nome e por ID, e é corrigida pelas funções de
+# escrita deste módulo. Alterações feitas por outros processos chegam pelo
+# MonitorMudancas (só os autores alterados são relidos) ou, se preciso, por
+# invalidar_cache_autores().
+_cache_autores = {
+    "db_name": None,   # Banco ao qual o conteúdo do cache se refere
+    "lista": None,     # [(id_autor, nome)] ordenada por nome, como em listar_autores()
+    "por_nome": None,  # {nome: id_autor}
+    "por_id": None,    # {id_autor: nome}
+    "trigramas": None, # IndiceTrigramas dos nomes, montado numa thread própria (preparar_indice_semelhanca)
+}
+# Montagem do índice de trigramas: a thread em andamento e as correções que
+# chegaram ao cache enquanto ela montava o índice a partir de uma cópia da lista
+_montagem_trigramas = {"thread": None, "pendentes": None}
+_trava_montagem_trigramas = threading.Lock()
+_estatisticas_cache_autores = {"acertos": 0, "faltas": 0, "invalidacoes": 0}
+_trava_cache_autores = threading.RLock()
+
+def _cache_autores_valido():
+    return _cache_autores["lista"] is not None and _cache_autores["db_name"] == DB_NAME
+
+def _carregar_cache_autores():
+    """Garante o cache carregado (uma consulta ao banco em caso de falta). Retorna True se válido."""
+    with _trava_cache_autores:
+        if _cache_autores_valido():
+            _estatisticas_cache_autores["acertos"] += 1
+            return True
+        _estatisticas_cache_autores["faltas"] += 1
+
+        conn, cursor = conectar_db()
+        if conn is None: return False
+        try:
+            cursor.execute("SELECT id_autor, nome FROM autor ORDER BY nome ASC")
+            autores = cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Erro ao buscar autores: {e}")
+            return False
+        finally:
+            if conn:
+                liberar_conexao(conn, cursor)
+
+        _cache_autores["lista"] = autores
+        _cache_autores["por_nome"] = {nome: id_autor for id_autor, nome in autores}
+        _cache_autores["por_id"] = dict(autores)
+        _cache_autores["db_name"] = DB_NAME
+        return True
+
+def _corrigir_cache_autores(id_autor, nome=None):
+    """
+    Aplica uma escrita ao cache sem recarregá-lo: remove o autor 'id_autor' e, se
+    'nome' for informado, (re)insere-o na posição certa da ordem por nome.
+    A ordem de strings do Python coincide com a colação BINARY do SQLite.
+    """
+    with _trava_cache_autores:
+        if not _cache_autores_valido():
+            return
+        lista = _cache_autores["lista"]
+        nome_antigo = _cache_autores["por_id"].pop(id_autor, None)
+        if nome_antigo is not None:
+            del _cache_autores["por_nome"][nome_antigo]
+            posicao = bisect.bisect_left(lista, nome_antigo, key=lambda autor: autor[1])
+            if posicao < len(lista) and lista[posicao][0] == id_autor:
+                del lista[posicao]
+        if nome is not None:
+            bisect.insort(lista, (id_autor, nome), key=lambda autor: autor[1])
+            _cache_autores["por_nome"][nome] = id_autor
+            _cache_autores["por_id"][id_autor] = nome
+        indice = _cache_autores["trigramas"]
+        if indice is not None:
+            if nome is None:
+                indice.remover(id_autor)
+            else:
+                indice.adicionar(id_autor, nome)
+        if _montagem_trigramas["pendentes"] is not None: # Reaplicada no índice quando ele ficar pronto
+            _montagem_trigramas["pendentes"].append((id_autor, nome))
+
+def _aplicar_mudancas_cache_autores(ids_autores):
+    """
+    Leva ao cache de autores (e ao índice de trigramas) as mudanças feitas por
+    outras instâncias, relendo do arquivo só os autores 'ids_autores'. Se a
+    leitura falhar, o cache é descartado.
+    """
+    with _trava_cache_autores:
+        if not _cache_autores_valido():
+            return
+        try:
+            atuais = _ler_linhas_espelhadas("autor", "id_autor, nome", "id_autor", ids_autores)
+        except sqlite3.Error as e:
+            print(f"Erro ao atualizar o cache de autores: {e}")
+            invalidar_cache_autores()
+            return
+        # Primeiro retira todos: dois autores podem ter trocado de nome entre si
+        for id_autor in ids_autores:
+            _corrigir_cache_autores(id_autor)
+        for id_autor, nome in atuais:
+            _corrigir_cache_autores(id_autor, nome)
+
+def invalidar_cache_autores():
+    """Descarta o cache de autores; a próxima leitura consulta o banco."""
+    with _trava_cache_autores:
+        _cache_autores["lista"] = None
+        _cache_autores["por_nome"] = None
+        _cache_autores["por_id"] = None
+        _cache_autores["trigramas"] = None
+        _estatisticas_cache_autores["invalidacoes"] += 1
+
+def estatisticas_cache_autores():
+    """Retorna os contadores do cache de autores: acertos, faltas e invalidações."""
+    with _trava_cache_autores:
+        return dict(_estatisticas_cache_autores)
+
+@instrumentacao.instrumentado
+def mapa_autores_por_nome():
+    """
+    Retorna um dicionário {nome: id_autor} com todos os autores (a partir do cache).
+    O dicionário é compartilhado: trate-o como somente leitura.
+    """
+    with _trava_cache_autores:
+        if not _carregar_cache_autores(): return {}
+        return _cache_autores["por_nome"]
+
+LIMIAR_UNIFICACAO = 0.6  # Semelhança mínima para a carga em lote usar um autor já cadastrado
+
+def _indice_trigramas_pronto():
+    """IndiceTrigramas dos autores do cache, ou None se ainda não foi montado. Chame com a trava do cache."""
+    return _cache_autores["trigramas"] if _cache_autores_valido() else None
+
+def _montar_indice_trigramas():
+    """
+    Thread de montagem do índice. A trava do cache só é mantida para copiar a
+    lista e, no fim, para instalar o índice: os segundos da montagem (100 mil
+    autores) não seguram quem lê ou grava autores nesse meio tempo. As correções
+    feitas no cache durante a montagem são reaplicadas ao índice antes de instalá-lo.
+    """
+    try:
+        with _trava_cache_autores:
+            if not _carregar_cache_autores() or _cache_autores["trigramas"] is not None:
+                return
+            lista = _cache_autores["lista"]
+            autores = list(lista)
+            _montagem_trigramas["pendentes"] = []
+        indice = indice_trigramas.IndiceTrigramas(autores)
+        with _trava_cache_autores:
+            pendentes, _montagem_trigramas["pendentes"] = _montagem_trigramas["pendentes"], None
+            if _cache_autores_valido() and _cache_autores["lista"] is lista: # Não foi recarregado nem descartado
+                for id_autor, nome in pendentes:
+                    if nome is None:
+                        indice.remover(id_autor)
+                    else:
+                        indice.adicionar(id_autor, nome)
+                _cache_autores["trigramas"] = indice
+    finally:
+        conn = getattr(_conexoes_por_thread, "conn", None)
+        if conn is not None: # Aberta só para carregar o cache: a thread termina aqui
+            _descartar_conexao(conn)
+            _conexoes_por_thread.conn = None
+        with _trava_montagem_trigramas:
+            _montagem_trigramas["thread"] = None
+
+def preparar_indice_semelhanca(esperar=False):
+    """
+    Monta o índice de trigramas dos autores numa thread própria, fora da fila do
+    ExecutorBanco (com 100 mil autores leva alguns segundos). Sem 'esperar',
+    retorna logo; chamadas repetidas durante a montagem não a repetem.
+    """
+    with _trava_montagem_trigramas:
+        thread = _montagem_trigramas["thread"]
+        if thread is None:
+            thread = threading.Thread(target=_montar_indice_trigramas, name="IndiceTrigramas", daemon=True)
+            _montagem_trigramas["thread"] = thread
+            thread.start()
+    if esperar:
+        thread.join()
+
+def _indice_trigramas_autores(esperar):
+    """Índice pronto (chame sem a trava do cache); sem 'esperar', só dispara a montagem e retorna None."""
+    with _trava_cache_autores:
+        indice = _indice_trigramas_pronto()
+    if indice is None:
+        preparar_indice_semelhanca(esperar)
+    return indice
+
+@instrumentacao.instrumentado
+def autores_semelhantes(nome, limite=indice_trigramas.MAX_SEMELHANTES, limiar=indice_trigramas.LIMIAR_SEMELHANCA,
+                        esperar=False):
+    """
+    Autores cadastrados com nome parecido com 'nome' ("Drummond, Carlos" acha
+    "Carlos Drummond de Andrade"), do mais para o menos parecido: lista de
+    (id_autor, nome, semelhanca), com semelhança entre 'limiar' e 1.0.
+    Usa um índice de trigramas em memória (ver indice_trigramas.py) que acompanha
+    o cache de autores; com 100 mil autores a consulta leva poucos milissegundos.
+    Enquanto o índice não fica pronto, retorna [] (ou espera por ele, com esperar=True).
+    """
+    _indice_trigramas_autores(esperar)
+    with _trava_cache_autores:
+        indice = _indice_trigramas_pronto()
+        if indice is None: return []
+        return indice.semelhantes(nome, limite, limiar)
+
+@instrumentacao.instrumentado
+def resolver_autores_semelhantes(nomes, limiar=LIMIAR_UNIFICACAO):
+    """
+    Para cargas em lote: o autor cadastrado mais parecido com cada um dos 'nomes',
+    como {nome: (id_autor, nome_cadastrado, semelhanca)}. Nomes sem nenhum autor
+    com semelhança >= 'limiar' ficam de fora do resultado. Espera o índice ficar pronto.
+    """
+    resolvidos = {}
+    _indice_trigramas_autores(esperar=True)
+    with _trava_cache_autores:
+        indice = _indice_trigramas_pronto()
+        if indice is None: return resolvidos
+        for nome in nomes:
+            parecidos = indice.semelhantes(nome, 1, limiar)
+            if parecidos:
+                resolvidos[nome] = parecidos[0]
+    return resolvidos
 
 # --- Funções CRUD para a Tabela AUTOR ---
 
+@instrumentacao.instrumentado
+@_com_retentativa
 def adicionar_autor(nome):
     """Adiciona um novo autor ao banco de dados."""
     conn, cursor = conectar_db()
@@ -67,34 +939,29 @@ def adicionar_autor(nome):
         cursor.execute("INSERT INTO autor (nome) VALUES (?)", (nome,))
         conn.commit()
         last_id = cursor.lastrowid
+        _corrigir_cache_autores(last_id, nome)
         # print(f"Autor '{nome}' adicionado com ID: {last_id}.") # Opcional: para debug no console
         return last_id
     except sqlite3.IntegrityError:
         # print(f"Erro de integridade: O autor '{nome}' já está cadastrado.") # Opcional
         return None
     except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
         print(f"Erro ao adicionar autor '{nome}': {e}")
         return None
     finally:
         if conn:
-            conn.close()
+            liberar_conexao(conn, cursor)
 
+@instrumentacao.instrumentado
 def listar_autores():
-    """Retorna uma lista de todos os autores, ordenados por nome."""
-    conn, cursor = conectar_db()
-    if conn is None: return []
-
-    try:
-        cursor.execute("SELECT id_autor, nome FROM autor ORDER BY nome ASC")
-        autores = cursor.fetchall()
-        return autores
-    except sqlite3.Error as e:
-        print(f"Erro ao buscar autores: {e}")
-        return []
-    finally:
-        if conn:
-            conn.close()
+    """Retorna uma lista de todos os autores, ordenados por nome (servida pelo cache)."""
+    with _trava_cache_autores:
+        if not _carregar_cache_autores(): return []
+        return list(_cache_autores["lista"])
 
+@instrumentacao.instrumentado
+@_com_retentativa
 def atualizar_autor(id_autor, novo_nome):
     """Atualiza o nome de um autor existente."""
     conn, cursor = conectar_db()
@@ -104,6 +971,7 @@ def atualizar_autor(id_autor, novo_nome):
         cursor.execute("UPDATE autor SET nome = ? WHERE id_autor = ?", (novo_nome, id_autor))
         conn.commit()
         if cursor.rowcount > 0:
+            _corrigir_cache_autores(id_autor, novo_nome)
             # print(f"Autor ID {id_autor} atualizado para '{novo_nome}'.") # Opcional
             return True
         else:
@@ -113,12 +981,15 @@ def atualizar_autor(id_autor, novo_nome):
         # print(f"Erro de integridade: O nome '{novo_nome}' já existe para outro autor.") # Opcional
         return False
     except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
         print(f"Erro ao atualizar autor ID {id_autor}: {e}")
         return False
     finally:
         if conn:
-            conn.close()
+            liberar_conexao(conn, cursor)
 
+@instrumentacao.instrumentado
+@_com_retentativa
 def deletar_autor(id_autor):
     """Deleta um autor, somente se ele não tiver livros associados."""
     conn, cursor = conectar_db()
@@ -128,6 +999,7 @@ def deletar_autor(id_autor):
         cursor.execute("DELETE FROM autor WHERE id_autor = ?", (id_autor,))
         conn.commit()
         if cursor.rowcount > 0:
+            _corrigir_cache_autores(id_autor)
             # print(f"Autor ID {id_autor} deletado com sucesso.") # Opcional
             return True
         else:
@@ -137,15 +1009,17 @@ def deletar_autor(id_autor):
         # print(f"Erro de integridade: Não é possível deletar o autor ID {id_autor}, pois ele possui livros cadastrados. ({e})") # Opcional
         return False
     except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
         print(f"Erro ao deletar autor ID {id_autor}: {e}")
         return False
     finally:
         if conn:
-            conn.close()
+            liberar_conexao(conn, cursor)
 
+@instrumentacao.instrumentado
 def buscar_autor_por_id(id_autor): # Esta função não estava sendo usada na GUI, mas é útil
     """Busca um autor específico pelo seu ID."""
-    conn, cursor = conectar_db()
+    conn, cursor = conectar_db(leitura=True)
     if conn is None: return None
 
     try:
@@ -157,10 +1031,69 @@ def buscar_autor_por_id(id_autor): # Esta função não estava sendo usada na GU
         return None
     finally:
         if conn:
-            conn.close()
+            liberar_conexao(conn, cursor)
+
+# --- Resultado compacto para listagens grandes ---
+
+class LivrosCompactos(Sequence):
+    """
+    Lista de livros guardada por colunas: ids em array('q'), títulos num único
+    bloco UTF-8 (com os deslocamentos em array('q')) e um nome por autor, em vez
+    de uma tupla e uma string de autor por linha. Ocupa bem menos memória que a
+    lista de tuplas em catálogos grandes.
+
+    Para os chamadores antigos se comporta como a lista: len(), índices, fatias e
+    iteração devolvem tuplas (id_livro, titulo, nome_autor, id_autor), criadas sob demanda.
+    """
+    __slots__ = ("ids_livro", "ids_autor", "nomes_autores", "_titulos", "_inicios_titulos")
+
+    def __init__(self, linhas=()):
+        self.ids_livro = array("q")
+        self.ids_autor = array("q")
+        self.nomes_autores = {}  # id_autor -> nome (uma única string por autor)
+        self._titulos = bytearray()
+        self._inicios_titulos = array("q", [0])
+        for linha in linhas:
+            self.acrescentar(*linha)
+
+    def acrescentar(self, id_livro, titulo, nome_autor, id_autor):
+        self.ids_livro.append(id_livro)
+        self.ids_autor.append(id_autor)
+        self.nomes_autores.setdefault(id_autor, nome_autor)
+        self._titulos += titulo.encode("utf-8")
+        self._inicios_titulos.append(len(self._titulos))
+
+    def titulo(self, indice):
+        inicio, fim = self._inicios_titulos[indice], self._inicios_titulos[indice + 1]
+        return self._titulos[inicio:fim].decode("utf-8")
+
+    def __len__(self):
+        return len(self.ids_livro)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("índice fora do intervalo")
+        id_autor = self.ids_autor[indice]
+        return (self.ids_livro[indice], self.titulo(indice), self.nomes_autores[id_autor], id_autor)
+
+    def __iter__(self):
+        for indice in range(len(self)):
+            yield self[indice]
+
+def _ler_livros(cursor, compacto):
+    """Lê o resultado de uma listagem de livros como lista de tuplas ou, se 'compacto', como LivrosCompactos."""
+    if compacto:
+        return LivrosCompactos(cursor) # Consome o cursor linha a linha, sem a lista intermediária
+    return cursor.fetchall()
 
 # --- Funções CRUD para a Tabela LIVRO ---
 
+@instrumentacao.instrumentado
+@_com_retentativa
 def adicionar_livro(titulo, id_autor):
     """Adiciona um novo livro ao banco de dados, associado a um autor."""
     conn, cursor = conectar_db()
@@ -176,19 +1109,22 @@ def adicionar_livro(titulo, id_autor):
         # print(f"Erro de integridade ao adicionar livro '{titulo}' (verifique se o autor ID {id_autor} existe): {e}") # Opcional
         return None
     except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
         print(f"Erro ao adicionar livro '{titulo}': {e}")
         return None
     finally:
         if conn:
-            conn.close()
+            liberar_conexao(conn, cursor)
 
-def listar_livros_com_autor():
+@instrumentacao.instrumentado
+def listar_livros_com_autor(compacto=False):
     """
     Retorna uma lista de todos os livros, incluindo o ID do livro, título,
     o NOME do autor e o ID do autor. Ordenados por título do livro.
+    Com compacto=True o resultado é um LivrosCompactos (mesmas tuplas, menos memória).
     """
-    conn, cursor = conectar_db()
-    if conn is None: return []
+    conn, cursor = conectar_db(leitura=True)
+    if conn is None: return LivrosCompactos() if compacto else []
 
     try:
         # A ordem das colunas no SELECT deve corresponder à forma como são usadas na GUI
@@ -198,15 +1134,280 @@ def listar_livros_com_autor():
             INNER JOIN autor a ON l.id_autor = a.id_autor
             ORDER BY l.titulo ASC
         ''')
-        livros = cursor.fetchall()
+        livros = _ler_livros(cursor, compacto)
         return livros
     except sqlite3.Error as e:
         print(f"Erro ao buscar livros com nomes dos autores: {e}")
+        return LivrosCompactos() if compacto else []
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+TAMANHO_PAGINA = 200  # Livros por página na listagem paginada
+
+@instrumentacao.instrumentado
+def listar_livros_pagina(apos=None, limite=TAMANHO_PAGINA, compacto=False):
+    """
+    Retorna uma página de livros (id_livro, titulo, nome_autor, id_autor) ordenada
+    por (titulo, id_livro). 'apos' é a chave (titulo, id_livro) da última linha da
+    página anterior; None busca a primeira página. A paginação por chave (keyset)
+    não usa OFFSET, então o custo de cada página não cresce com o tamanho do catálogo.
+    Com compacto=True a página é um LivrosCompactos.
+    """
+    conn, cursor = conectar_db(leitura=True)
+    if conn is None: return LivrosCompactos() if compacto else []
+
+    try:
+        if apos is None:
+            cursor.execute('''
+                SELECT l.id_livro, l.titulo, a.nome, l.id_autor
+                FROM livro l
+                INNER JOIN autor a ON l.id_autor = a.id_autor
+                ORDER BY l.titulo ASC, l.id_livro ASC
+                LIMIT ?
+            ''', (limite,))
+        else:
+            titulo_apos, id_livro_apos = apos
+            cursor.execute('''
+                SELECT l.id_livro, l.titulo, a.nome, l.id_autor
+                FROM livro l
+                INNER JOIN autor a ON l.id_autor = a.id_autor
+                WHERE (l.titulo, l.id_livro) > (?, ?)
+                ORDER BY l.titulo ASC, l.id_livro ASC
+                LIMIT ?
+            ''', (titulo_apos, id_livro_apos, limite))
+        return _ler_livros(cursor, compacto)
+    except sqlite3.Error as e:
+        print(f"Erro ao buscar página de livros: {e}")
+        return LivrosCompactos() if compacto else []
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+def iterar_livros_com_autor(tamanho_pagina=TAMANHO_PAGINA):
+    """
+    Gera todos os livros (mesmo formato de listar_livros_com_autor), buscando-os
+    página a página. Só uma página fica em memória por vez.
+    """
+    apos = None
+    while True:
+        pagina = listar_livros_pagina(apos, tamanho_pagina)
+        yield from pagina
+        if len(pagina) < tamanho_pagina:
+            return
+        ultimo = pagina[-1]
+        apos = (ultimo[1], ultimo[0])
+
+# --- Ordenação e filtros das listagens (montados só com colunas da lista branca) ---
+
+# Ordenação -> colunas do ORDER BY; as últimas desempatam e tornam a chave da
+# paginação única. Cada combinação é atendida por um índice (ver MIGRACOES).
+ORDENACOES_LIVROS = {
+    "id_livro": ("l.id_livro",),
+    "titulo": ("l.titulo", "l.id_livro"),
+    "nome_autor": ("a.nome", "l.titulo", "l.id_livro"),
+}
+ORDENACOES_AUTORES = {
+    "id_autor": ("id_autor",),
+    "nome": ("nome",),
+}
+_POSICAO_COLUNA = {"l.id_livro": 0, "l.titulo": 1, "a.nome": 2, "id_autor": 0, "nome": 1}  # Coluna -> posição na linha
+
+def _intervalo_prefixo(prefixo):
+    """
+    Limites [inicio, fim) das strings que começam com 'prefixo'. Uma comparação por
+    intervalo usa o índice da coluna, ao contrário de LIKE 'prefixo%' (que no SQLite
+    ignora maiúsculas/minúsculas e, por isso, não usa índices comuns).
+    """
+    return prefixo, prefixo + "\U0010ffff"
+
+def _montar_consulta(select, ordenacoes, ordenar_por, decrescente, condicoes, parametros, apos, limite):
+    """
+    Completa 'select' com WHERE, ORDER BY e LIMIT. Só nomes de colunas da lista
+    branca 'ordenacoes' entram no texto do SQL; os valores vão como parâmetros.
+    'apos' é a chave de ordenação da última linha da página anterior (paginação por chave).
+    """
+    if ordenar_por not in ordenacoes:
+        raise ValueError(f"Ordenação inválida: {ordenar_por!r}")
+    colunas = ordenacoes[ordenar_por]
+    condicoes, parametros = list(condicoes), list(parametros)
+    if apos is not None:
+        condicoes.append(f"({', '.join(colunas)}) {'<' if decrescente else '>'} ({', '.join('?' * len(colunas))})")
+        parametros.extend(apos)
+    direcao = "DESC" if decrescente else "ASC"
+    sql = select
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+    sql += " ORDER BY " + ", ".join(f"{coluna} {direcao}" for coluna in colunas)
+    if limite is not None:
+        sql += " LIMIT ?"
+        parametros.append(limite)
+    return sql, parametros
+
+def chave_ordenacao(linha, ordenar_por, ordenacoes=ORDENACOES_LIVROS):
+    """Chave 'apos' para pedir a página seguinte à 'linha' (livro ou autor) na ordenação indicada."""
+    return tuple(linha[_POSICAO_COLUNA[coluna]] for coluna in ordenacoes[ordenar_por])
+
+def _condicoes_filtros_livros(filtros):
+    """
+    Traduz os filtros aceitos em consultar_livros para SQL:
+        titulo_prefixo, autor_prefixo (texto), id_autor, id_min, id_max (inteiros),
+        ids (lista de id_livro, no máximo TAMANHO_BLOCO_IN).
+    """
+    desconhecidos = set(filtros) - {"titulo_prefixo", "autor_prefixo", "id_autor", "id_min", "id_max", "ids"}
+    if desconhecidos:
+        raise ValueError(f"Filtros inválidos: {sorted(desconhecidos)}")
+    condicoes, parametros = [], []
+    if filtros.get("titulo_prefixo"):
+        condicoes.append("l.titulo >= ? AND l.titulo < ?")
+        parametros.extend(_intervalo_prefixo(filtros["titulo_prefixo"]))
+    if filtros.get("autor_prefixo"):
+        condicoes.append("a.nome >= ? AND a.nome < ?")
+        parametros.extend(_intervalo_prefixo(filtros["autor_prefixo"]))
+    if filtros.get("id_autor") is not None:
+        condicoes.append("l.id_autor = ?")
+        parametros.append(int(filtros["id_autor"]))
+    if filtros.get("id_min") is not None:
+        condicoes.append("l.id_livro >= ?")
+        parametros.append(int(filtros["id_min"]))
+    if filtros.get("id_max") is not None:
+        condicoes.append("l.id_livro <= ?")
+        parametros.append(int(filtros["id_max"]))
+    if filtros.get("ids") is not None:
+        condicoes.append(_condicao_ids("l.id_livro", filtros["ids"]))
+        parametros.extend(int(id_livro) for id_livro in filtros["ids"])
+    return condicoes, parametros
+
+def _condicao_ids(coluna, ids):
+    """'coluna IN (?, ...)' para até TAMANHO_BLOCO_IN ids (os valores vão como parâmetros)."""
+    if len(ids) > TAMANHO_BLOCO_IN:
+        raise ValueError(f"No máximo {TAMANHO_BLOCO_IN} ids por consulta")
+    return f"{coluna} IN ({', '.join('?' * len(ids))})" if ids else "0"
+
+@instrumentacao.instrumentado
+def consultar_livros(ordenar_por="titulo", decrescente=False, filtros=None, apos=None,
+                     limite=TAMANHO_PAGINA, compacto=False):
+    """
+    Página de livros (id_livro, titulo, nome_autor, id_autor) com ordenação e
+    filtros feitos pelo banco. 'ordenar_por' é uma chave de ORDENACOES_LIVROS;
+    'filtros' é um dicionário (ver _condicoes_filtros_livros); 'apos' é a
+    chave_ordenacao() da última linha da página anterior. Ordenação ou filtro
+    fora da lista branca geram ValueError.
+    """
+    condicoes, parametros = _condicoes_filtros_livros(filtros or {})
+    sql, parametros = _montar_consulta('''
+        SELECT l.id_livro, l.titulo, a.nome, l.id_autor
+        FROM livro l
+        INNER JOIN autor a ON l.id_autor = a.id_autor''',
+        ORDENACOES_LIVROS, ordenar_por, decrescente, condicoes, parametros, apos, limite)
+
+    conn, cursor = conectar_db(leitura=True)
+    if conn is None: return LivrosCompactos() if compacto else []
+
+    try:
+        cursor.execute(sql, parametros)
+        return _ler_livros(cursor, compacto)
+    except sqlite3.Error as e:
+        print(f"Erro ao consultar livros: {e}")
+        return LivrosCompactos() if compacto else []
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+@instrumentacao.instrumentado
+def consultar_autores(ordenar_por="nome", decrescente=False, nome_prefixo=None, apos=None, limite=None, ids=None):
+    """
+    Autores (id_autor, nome) com ordenação e filtro por prefixo do nome feitos
+    pelo banco. 'ordenar_por' é uma chave de ORDENACOES_AUTORES; sem 'limite'
+    retorna todos; 'ids' restringe a esses autores. Ordenação fora da lista
+    branca gera ValueError.
+    """
+    condicoes, parametros = [], []
+    if nome_prefixo:
+        condicoes.append("nome >= ? AND nome < ?")
+        parametros.extend(_intervalo_prefixo(nome_prefixo))
+    if ids is not None:
+        condicoes.append(_condicao_ids("id_autor", ids))
+        parametros.extend(int(id_autor) for id_autor in ids)
+    sql, parametros = _montar_consulta("SELECT id_autor, nome FROM autor", ORDENACOES_AUTORES,
+                                       ordenar_por, decrescente, condicoes, parametros, apos, limite)
+
+    conn, cursor = conectar_db(leitura=True)
+    if conn is None: return []
+
+    try:
+        cursor.execute(sql, parametros)
+        return cursor.fetchall()
+    except sqlite3.Error as e:
+        print(f"Erro ao consultar autores: {e}")
         return []
     finally:
         if conn:
-            conn.close()
+            liberar_conexao(conn, cursor)
+
+LIMITE_BUSCA = 100  # Máximo de resultados retornados por buscar_livros
+MAX_CANDIDATOS_BUSCA = 2000  # Máximo de resultados ordenados por relevância em buscar_livros
+
+def _expressao_fts(texto):
+    """
+    Converte o texto digitado numa consulta FTS5: cada palavra vira um prefixo
+    ("machad"* casa com "Machado") e todas precisam aparecer (AND implícito).
+    """
+    palavras = re.findall(r"\w+", texto)
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+def _tabela_fts_existe(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'livro_fts'")
+    return cursor.fetchone() is not None
 
+@instrumentacao.instrumentado
+def buscar_livros(texto, limite=LIMITE_BUSCA):
+    """
+    Busca livros cujo título ou nome do autor contenha as palavras de 'texto'
+    (também por prefixo). Retorna até 'limite' linhas (id_livro, titulo,
+    nome_autor, id_autor), das mais relevantes para as menos relevantes.
+    """
+    expressao = _expressao_fts(texto)
+    if not expressao: return []
+
+    conn, cursor = conectar_db(leitura=True)
+    if conn is None: return []
+
+    try:
+        if _tabela_fts_existe(cursor):
+            # A relevância (bm25) só é calculada para os primeiros MAX_CANDIDATOS_BUSCA
+            # resultados: prefixos muito comuns ("li"*) casariam com quase todo o
+            # catálogo, e ordenar todos eles deixaria a busca lenta demais para o
+            # "buscar enquanto digita".
+            cursor.execute('''
+                SELECT l.id_livro, l.titulo, a.nome, l.id_autor
+                FROM (SELECT rowid, rank FROM livro_fts WHERE livro_fts MATCH ? LIMIT ?) AS f
+                INNER JOIN livro l ON l.id_livro = f.rowid
+                INNER JOIN autor a ON l.id_autor = a.id_autor
+                ORDER BY f.rank
+                LIMIT ?
+            ''', (expressao, MAX_CANDIDATOS_BUSCA, limite))
+        else:
+            # Alternativa sem FTS5: varre a tabela, mas mantém o mesmo contrato.
+            padrao = f"%{texto.strip()}%"
+            cursor.execute('''
+                SELECT l.id_livro, l.titulo, a.nome, l.id_autor
+                FROM livro l
+                INNER JOIN autor a ON l.id_autor = a.id_autor
+                WHERE l.titulo LIKE ? OR a.nome LIKE ?
+                ORDER BY l.titulo ASC
+                LIMIT ?
+            ''', (padrao, padrao, limite))
+        return cursor.fetchall()
+    except sqlite3.Error as e:
+        print(f"Erro ao buscar livros por '{texto}': {e}")
+        return []
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+@instrumentacao.instrumentado
+@_com_retentativa
 def atualizar_livro(id_livro, novo_titulo, novo_id_autor):
     """Atualiza o título e/ou o autor de um livro existente."""
     conn, cursor = conectar_db()
@@ -226,12 +1427,15 @@ def atualizar_livro(id_livro, novo_titulo, novo_id_autor):
         # print(f"Erro de integridade ao atualizar livro ID {id_livro} (verifique se o autor ID {novo_id_autor} existe): {e}") # Opcional
         return False
     except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
         print(f"Erro ao atualizar livro ID {id_livro}: {e}")
         return False
     finally:
         if conn:
-            conn.close()
+            liberar_conexao(conn, cursor)
 
+@instrumentacao.instrumentado
+@_com_retentativa
 def deletar_livro(id_livro):
     """Deleta um livro do banco de dados."""
     conn, cursor = conectar_db()
@@ -247,15 +1451,17 @@ def deletar_livro(id_livro):
             # print(f"Livro ID {id_livro} não encontrado para deleção.") # Opcional
             return False
     except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
         print(f"Erro ao deletar livro ID {id_livro}: {e}")
         return False
     finally:
         if conn:
-            conn.close()
+            liberar_conexao(conn, cursor)
 
+@instrumentacao.instrumentado
 def buscar_livro_por_id(id_livro): # Esta função não estava sendo usada na GUI, mas é útil
     """Busca um livro específico pelo seu ID, incluindo o nome do autor."""
-    conn, cursor = conectar_db()
+    conn, cursor = conectar_db(leitura=True)
     if conn is None: return None
 
     try:
@@ -270,10 +1476,985 @@ def buscar_livro_por_id(id_livro): # Esta função não estava sendo usada na GU
     except sqlite3.Error as e:
         print(f"Erro ao buscar livro por ID {id_livro}: {e}")
         return None
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+# --- Inserção em Lote (uma única transação por chamada) ---
+
+TAMANHO_BLOCO_IN = 500  # Máximo de parâmetros por cláusula IN (...) nas consultas em lote
+
+def _inserir_em_lote(cursor, sql, linhas):
+    """
+    Insere 'linhas' com executemany dentro de um SAVEPOINT. Se alguma linha violar
+    uma restrição, desfaz o bloco e reinsere linha a linha para isolar as rejeitadas.
+    Retorna a lista de (indice, motivo) das linhas rejeitadas.
+    """
+    cursor.execute("SAVEPOINT lote")
+    try:
+        cursor.executemany(sql, linhas)
+        cursor.execute("RELEASE lote")
+        return []
+    except sqlite3.IntegrityError:
+        cursor.execute("ROLLBACK TO lote")
+
+    rejeitadas = []
+    for indice, linha in enumerate(linhas):
+        try:
+            cursor.execute(sql, linha)
+        except sqlite3.IntegrityError as e:
+            rejeitadas.append((indice, str(e)))
+    cursor.execute("RELEASE lote")
+    return rejeitadas
+
+@instrumentacao.instrumentado
+def buscar_ids_autores(nomes):
+    """Retorna um dicionário {nome: id_autor} para os nomes informados que existem no banco."""
+    conn, cursor = conectar_db()
+    if conn is None: return {}
+
+    nomes = list(dict.fromkeys(nomes)) # Remove repetidos mantendo a ordem
+    try:
+        ids = {}
+        for i in range(0, len(nomes), TAMANHO_BLOCO_IN):
+            bloco = nomes[i:i + TAMANHO_BLOCO_IN]
+            marcadores = ", ".join("?" * len(bloco))
+            cursor.execute(f"SELECT nome, id_autor FROM autor WHERE nome IN ({marcadores})", bloco)
+            ids.update(cursor.fetchall())
+        return ids
+    except sqlite3.Error as e:
+        print(f"Erro ao buscar IDs de autores: {e}")
+        return {}
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+@instrumentacao.instrumentado
+@_com_retentativa
+def adicionar_autores_em_lote(nomes):
+    """
+    Adiciona vários autores numa única transação.
+    Retorna (ids, rejeitados): 'ids' mapeia nome -> id_autor dos autores inseridos e
+    'rejeitados' é uma lista de (indice, nome, motivo), ex.: nome já cadastrado (UNIQUE).
+    """
+    nomes = list(nomes)
+    conn, cursor = conectar_db()
+    if conn is None: return {}, [(i, nome, "sem conexão com o banco") for i, nome in enumerate(nomes)]
+
+    try:
+        cursor.execute("BEGIN")
+        rejeitadas = _inserir_em_lote(cursor, "INSERT INTO autor (nome) VALUES (?)",
+                                      [(nome,) for nome in nomes])
+        conn.commit()
+    except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
+        print(f"Erro ao adicionar autores em lote: {e}")
+        return {}, [(i, nome, str(e)) for i, nome in enumerate(nomes)]
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+    rejeitados = [(indice, nomes[indice], motivo) for indice, motivo in rejeitadas]
+    indices_rejeitados = {indice for indice, _motivo in rejeitadas}
+    inseridos = [nome for i, nome in enumerate(nomes) if i not in indices_rejeitados]
+    ids = buscar_ids_autores(inseridos)
+    if len(ids) == len(inseridos):
+        # Corrige o cache (e o índice de trigramas) em vez de descartá-lo: numa importação
+        # em blocos, recarregá-lo a cada bloco custaria mais que as próprias inserções
+        for nome, id_autor in ids.items():
+            _corrigir_cache_autores(id_autor, nome)
+    else:
+        invalidar_cache_autores()
+    return ids, rejeitados
+
+@instrumentacao.instrumentado
+@_com_retentativa
+def adicionar_livros_em_lote(livros):
+    """
+    Adiciona vários livros, dados como pares (titulo, id_autor), numa única transação.
+    Retorna (quantidade_inserida, rejeitados), onde 'rejeitados' é uma lista de
+    (indice, (titulo, id_autor), motivo), ex.: autor inexistente (FOREIGN KEY).
+    """
+    livros = [tuple(livro) for livro in livros]
+    conn, cursor = conectar_db()
+    if conn is None: return 0, [(i, livro, "sem conexão com o banco") for i, livro in enumerate(livros)]
+
+    try:
+        cursor.execute("BEGIN")
+        rejeitadas = _inserir_em_lote(cursor, "INSERT INTO livro (titulo, id_autor) VALUES (?, ?)", livros)
+        conn.commit()
+        rejeitados = [(indice, livros[indice], motivo) for indice, motivo in rejeitadas]
+        return len(livros) - len(rejeitados), rejeitados
+    except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
+        print(f"Erro ao adicionar livros em lote: {e}")
+        return 0, [(i, livro, str(e)) for i, livro in enumerate(livros)]
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+def _inserir_linhas_com_ids(cursor, sql, linhas):
+    """
+    Insere as linhas uma a uma (na transação já aberta) e retorna, para cada uma,
+    o id gerado ou None se ela violou uma restrição. Uma violação desfaz só o
+    comando que falhou, não a transação.
+    """
+    ids = []
+    for linha in linhas:
+        try:
+            cursor.execute(sql, linha)
+            ids.append(cursor.lastrowid)
+        except sqlite3.IntegrityError:
+            ids.append(None)
+    return ids
+
+@instrumentacao.instrumentado
+@_com_retentativa
+def adicionar_autores_com_ids(nomes):
+    """
+    Como várias chamadas a adicionar_autor, mas numa única transação (um único
+    commit). Retorna a lista de ids na ordem de 'nomes' (None para os rejeitados).
+    """
+    nomes = list(nomes)
+    conn, cursor = conectar_db()
+    if conn is None: return [None] * len(nomes)
+
+    try:
+        cursor.execute("BEGIN")
+        ids = _inserir_linhas_com_ids(cursor, "INSERT INTO autor (nome) VALUES (?)", [(nome,) for nome in nomes])
+        conn.commit()
+        for nome, id_autor in zip(nomes, ids):
+            if id_autor is not None:
+                _corrigir_cache_autores(id_autor, nome)
+        return ids
+    except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
+        print(f"Erro ao adicionar autores em lote: {e}")
+        return [None] * len(nomes)
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+@instrumentacao.instrumentado
+@_com_retentativa
+def adicionar_livros_com_ids(livros):
+    """
+    Como várias chamadas a adicionar_livro, com pares (titulo, id_autor), mas numa
+    única transação. Retorna a lista de ids na ordem de 'livros' (None para os rejeitados).
+    """
+    livros = [tuple(livro) for livro in livros]
+    conn, cursor = conectar_db()
+    if conn is None: return [None] * len(livros)
+
+    try:
+        cursor.execute("BEGIN")
+        ids = _inserir_linhas_com_ids(cursor, "INSERT INTO livro (titulo, id_autor) VALUES (?, ?)", livros)
+        conn.commit()
+        return ids
+    except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
+        print(f"Erro ao adicionar livros em lote: {e}")
+        return [None] * len(livros)
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+# --- Estatísticas do catálogo (contadores mantidos por triggers; ver migração 4) ---
+
+TOP_AUTORES = 10  # Autores listados no painel de estatísticas
+
+@instrumentacao.instrumentado
+def estatisticas_catalogo(top=TOP_AUTORES):
+    """
+    Totais do catálogo e os 'top' autores com mais livros, lidos dos contadores:
+    nenhuma consulta varre ou agrupa a tabela 'livro'.
+    Retorna {"livros", "autores", "top_autores": [(id_autor, nome, livros), ...]} ou None em caso de erro.
+    """
+    conn, cursor = conectar_db(leitura=True)
+    if conn is None: return None
+
+    try:
+        cursor.execute("SELECT chave, valor FROM estatisticas_catalogo")
+        totais = dict(cursor.fetchall())
+        cursor.execute('''
+            SELECT id_autor, nome, livros_count FROM autor
+            ORDER BY livros_count DESC
+            LIMIT ?
+        ''', (top,))
+        return {"livros": totais.get("livros", 0), "autores": totais.get("autores", 0),
+                "top_autores": cursor.fetchall()}
+    except sqlite3.Error as e:
+        print(f"Erro ao ler as estatísticas do catálogo: {e}")
+        return None
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+@instrumentacao.instrumentado
+def contar_livros_do_autor(id_autor):
+    """Quantidade de livros do autor (pelo contador), ou None se o autor não existir."""
+    conn, cursor = conectar_db(leitura=True)
+    if conn is None: return None
+
+    try:
+        cursor.execute("SELECT livros_count FROM autor WHERE id_autor = ?", (id_autor,))
+        linha = cursor.fetchone()
+        return linha[0] if linha else None
+    except sqlite3.Error as e:
+        print(f"Erro ao contar os livros do autor ID {id_autor}: {e}")
+        return None
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+@instrumentacao.instrumentado
+def verificar_contadores():
+    """
+    Compara os contadores com as contagens reais (varre 'livro': uso de manutenção).
+    Retorna a lista de divergências (item, contador, real), onde 'item' é 'livros',
+    'autores' ou o id_autor; lista vazia significa contadores corretos. None em caso de erro.
+    """
+    conn, cursor = conectar_db()
+    if conn is None: return None
+
+    try:
+        cursor.execute('''
+            SELECT a.id_autor, a.livros_count, COUNT(l.id_livro)
+            FROM autor a
+            LEFT JOIN livro l ON l.id_autor = a.id_autor
+            GROUP BY a.id_autor
+            HAVING a.livros_count != COUNT(l.id_livro)
+        ''')
+        divergencias = cursor.fetchall()
+        cursor.execute('''
+            SELECT 'livros', (SELECT valor FROM estatisticas_catalogo WHERE chave = 'livros'), (SELECT COUNT(*) FROM livro)
+            UNION ALL
+            SELECT 'autores', (SELECT valor FROM estatisticas_catalogo WHERE chave = 'autores'), (SELECT COUNT(*) FROM autor)
+        ''')
+        divergencias.extend(linha for linha in cursor.fetchall() if linha[1] != linha[2])
+        return divergencias
+    except sqlite3.Error as e:
+        print(f"Erro ao verificar os contadores: {e}")
+        return None
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+@instrumentacao.instrumentado
+@_com_retentativa
+def reconstruir_contadores():
+    """Recalcula todos os contadores a partir das tabelas, numa única transação. Retorna True se deu certo."""
+    conn, cursor = conectar_db()
+    if conn is None: return False
+
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        _recalcular_contadores(cursor)
+        conn.commit()
+        if _espelho_ativo():
+            recarregar_espelho() # Os contadores não passam pelo registro de mudanças
+        return True
+    except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
+        print(f"Erro ao reconstruir os contadores: {e}")
+        return False
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+# --- Detecção de mudanças feitas por outras instâncias (ver migração 5) ---
+
+@instrumentacao.instrumentado
+def versao_dados():
+    """
+    PRAGMA data_version da conexão da thread atual: muda quando outra conexão
+    (de outro processo ou thread) confirma uma alteração no arquivo. Custa uma
+    leitura em memória, sem acessar as tabelas. None em caso de erro.
+    """
+    conn, cursor = conectar_db()
+    if conn is None: return None
+
+    try:
+        cursor.execute("PRAGMA data_version")
+        return cursor.fetchone()[0]
+    except sqlite3.Error as e:
+        print(f"Erro ao ler PRAGMA data_version: {e}")
+        return None
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+@instrumentacao.instrumentado
+def ultima_mudanca():
+    """Número de sequência da última mudança registrada (0 se não houver nenhuma), ou None em caso de erro."""
+    conn, cursor = conectar_db()
+    if conn is None: return None
+
+    try:
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM log_mudancas")
+        return cursor.fetchone()[0]
+    except sqlite3.Error as e:
+        print(f"Erro ao ler o registro de mudanças: {e}")
+        return None
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+@instrumentacao.instrumentado
+def mudancas_desde(seq):
+    """
+    Mudanças registradas depois de 'seq', resumidas à última operação de cada registro.
+    Retorna {"seq", "completo", "autores": {id_autor: op}, "livros": {id_livro: op}},
+    com op 'I' (inclusão), 'U' (alteração) ou 'D' (exclusão) e 'seq' para a próxima
+    chamada. completo=False indica que parte das mudanças já foi podada do
+    registro (MAX_LOG_MUDANCAS): recarregue tudo. None em caso de erro.
+    """
+    conn, cursor = conectar_db()
+    if conn is None: return None
+
+    try:
+        cursor.execute("SELECT MIN(seq), MAX(seq) FROM log_mudancas")
+        menor, maior = cursor.fetchone()
+        if maior is None or seq >= maior:
+            return {"seq": max(seq, maior or 0), "completo": True, "autores": {}, "livros": {}}
+        completo = menor <= seq + 1
+        cursor.execute("SELECT tabela, id_registro, operacao FROM log_mudancas WHERE seq > ? ORDER BY seq",
+                       (seq,))
+        mudancas = {"autor": {}, "livro": {}}
+        for tabela, id_registro, operacao in cursor:
+            if operacao == "U" and mudancas[tabela].get(id_registro) == "I":
+                continue # Incluído e alterado depois: para quem lê, continua sendo uma inclusão
+            mudancas[tabela][id_registro] = operacao
+        return {"seq": maior, "completo": completo, "autores": mudancas["autor"], "livros": mudancas["livro"]}
+    except sqlite3.Error as e:
+        print(f"Erro ao ler o registro de mudanças: {e}")
+        return None
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+class MonitorMudancas:
+    """
+    Verificação periódica e barata de mudanças feitas por outras instâncias:
+    consulta PRAGMA data_version e só lê log_mudancas quando ele muda.
+    Chame verificar() sempre da mesma thread (data_version é por conexão).
+    """
+
+    def __init__(self):
+        self.versao = None  # Última data_version vista
+        self.seq = None     # Última mudança já entregue
+
+    def verificar(self):
+        """
+        Retorna o resultado de mudancas_desde() quando há mudanças novas, ou None.
+        Os autores alterados são relidos e corrigidos no cache de autores deste
+        processo (e no índice de trigramas); se o registro foi podado, o cache é descartado.
+        """
+        if self.seq is None: # Primeira chamada: o ponto de partida é o estado atual
+            self.seq = ultima_mudanca()
+            self.versao = versao_dados()
+            return None
+        versao = versao_dados()
+        if versao is None or versao == self.versao:
+            return None
+        self.versao = versao
+        mudancas = mudancas_desde(self.seq)
+        if mudancas is None:
+            return None
+        self.seq = mudancas["seq"]
+        if _espelho_ativo():
+            sincronizar_espelho() # Antes de as telas consultarem o espelho
+        if not mudancas["completo"]:
+            invalidar_cache_autores()
+        elif mudancas["autores"]:
+            _aplicar_mudancas_cache_autores(list(mudancas["autores"]))
+        if mudancas["autores"] or mudancas["livros"] or not mudancas["completo"]:
+            return mudancas
+        return None
+
+# --- Espelho de leitura em memória (opcional; ver ativar_espelho) ---
+# Com catálogos grandes, as leituras da interface e do servidor podem ser atendidas
+# por uma cópia do banco em memória (VFS "memdb" do SQLite, compartilhado por todas
+# as conexões do processo), sem E/S de disco. O arquivo continua sendo a fonte da
+# verdade: as escritas vão para ele e, depois de cada escrita confirmada (e sempre
+# que o MonitorMudancas percebe mudanças de outras instâncias), o espelho recebe só
+# as linhas alteradas, a partir de log_mudancas.
+CONFIG_ESPELHO = {
+    "nome": "biblioteca_espelho",  # Nome do banco em memória (file:/<nome>_<geração>?vfs=memdb)
+    "busy_timeout_ms": 5000,       # Leitores esperam a aplicação de mudanças em vez de falhar
+}
+_espelho = {
+    "ancora": None,   # Conexão que mantém o banco em memória vivo e aplica as mudanças
+    "uri": None,
+    "db_name": None,  # Arquivo espelhado; se DB_NAME mudar, as leituras voltam ao arquivo
+    "seq": 0,         # Última mudança de log_mudancas já aplicada ao espelho
+    "geracao": 0,     # Incrementada a cada ativação e desativação; invalida as conexões antigas das threads
+}
+_estatisticas_espelho = {"sincronizacoes": 0, "registros_aplicados": 0, "recargas": 0, "falhas": 0}
+_trava_espelho = threading.RLock()
+_conexoes_espelho = threading.local()
+
+def _espelho_ativo():
+    return _espelho["ancora"] is not None and _espelho["db_name"] == DB_NAME
+
+def _obter_conexao_espelho():
+    """
+    Conexão persistente da thread atual com o espelho em memória (somente para leitura).
+    Quando o espelho é recarregado ou desativado, cada thread fecha a própria conexão
+    antiga aqui, na próxima leitura; a de outra thread nunca é fechada, porque ela
+    pode estar no meio de uma consulta. Cada carga tem o seu próprio nome em memória,
+    então a cópia antiga só é liberada quando o último desses leitores a larga.
+    """
+    conn = getattr(_conexoes_espelho, "conn", None)
+    if conn is not None:
+        if _conexoes_espelho.geracao == _espelho["geracao"]:
+            if _conexoes_espelho.capturando_sql != instrumentacao.CONFIG_INSTRUMENTACAO["capturar_sql"]:
+                _conexoes_espelho.capturando_sql = _aplicar_captura_sql(conn)
+            return conn
+        _descartar_conexao_espelho()
+    with _trava_espelho:
+        if not _espelho_ativo():
+            return obter_conexao() # Desativado depois da checagem em conectar_db: lê do arquivo
+        conn = sqlite3.connect(_espelho["uri"], uri=True, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {int(CONFIG_ESPELHO['busy_timeout_ms'])}")
+        _conexoes_espelho.geracao = _espelho["geracao"]
+    _conexoes_espelho.conn = conn
+    _conexoes_espelho.capturando_sql = _aplicar_captura_sql(conn)
+    return conn
+
+def _descartar_conexao_espelho():
+    """Fecha a conexão da thread atual com o espelho, se houver (só a dela)."""
+    conn = getattr(_conexoes_espelho, "conn", None)
+    _conexoes_espelho.conn = None
+    if conn is not None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+@instrumentacao.instrumentado
+def ativar_espelho():
+    """
+    Copia o banco inteiro para a memória (API de backup do SQLite) e passa a
+    atender por essa cópia as leituras feitas com conectar_db(leitura=True).
+    Os triggers de log_mudancas são removidos do espelho; os de contadores e da
+    busca textual continuam, para que as linhas aplicadas os mantenham em dia.
+    Retorna {"paginas", "bytes", "segundos"} ou None em caso de erro (nesse caso
+    as leituras continuam indo para o arquivo).
+    """
+    with _trava_espelho:
+        desativar_espelho()
+        inicio = time.perf_counter()
+        # Lida antes da cópia: o que mudar durante ela é reaplicado logo depois
+        seq = ultima_mudanca()
+        if seq is None: return None
+
+        geracao = _espelho["geracao"] + 1
+        uri = f"file:/{CONFIG_ESPELHO['nome']}_{geracao}?vfs=memdb"
+        origem = ancora = None
+        try:
+            origem = _abrir_conexao() # Conexão própria: a do pool desta thread fica livre
+            ancora = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            origem.backup(ancora)
+            ancora.execute("PRAGMA foreign_keys = ON")
+            gatilhos = ancora.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%\\_log\\_%' ESCAPE '\\'"
+            ).fetchall()
+            for (nome,) in gatilhos:
+                ancora.execute(f"DROP TRIGGER {nome}")
+            ancora.commit()
+            paginas, tamanho_pagina = (ancora.execute(f"PRAGMA {pragma}").fetchone()[0]
+                                       for pragma in ("page_count", "page_size"))
+        except sqlite3.Error as e:
+            print(f"Erro ao criar o espelho em memória de '{DB_NAME}': {e}")
+            if ancora is not None:
+                ancora.close()
+            return None
+        finally:
+            if origem is not None:
+                origem.close()
+
+        _espelho.update(ancora=ancora, uri=uri, db_name=DB_NAME, seq=seq, geracao=geracao)
+        try:
+            if not _aplicar_mudancas_espelho():
+                raise sqlite3.OperationalError("mudanças demais durante a cópia")
+        except sqlite3.Error as e:
+            print(f"Erro ao atualizar o espelho em memória após a cópia: {e}")
+            desativar_espelho()
+            return None
+        return {"paginas": paginas, "bytes": paginas * tamanho_pagina, "segundos": time.perf_counter() - inicio}
+
+def desativar_espelho():
+    """
+    Descarta o espelho em memória; as leituras voltam a ir para o arquivo.
+    Só a âncora e a conexão da thread atual são fechadas aqui: as das outras
+    threads são fechadas por elas mesmas (ver _obter_conexao_espelho).
+    """
+    with _trava_espelho:
+        ancora = _espelho["ancora"]
+        _espelho.update(ancora=None, db_name=None, geracao=_espelho["geracao"] + 1)
+        _descartar_conexao_espelho()
+        if ancora is not None:
+            try:
+                ancora.close()
+            except sqlite3.Error:
+                pass
+
+atexit.register(desativar_espelho)
+
+def recarregar_espelho():
+    """Refaz a cópia completa do espelho (registro de mudanças podado ou falha ao aplicar). Retorna True se deu certo."""
+    with _trava_espelho:
+        _estatisticas_espelho["recargas"] += 1
+        return ativar_espelho() is not None
+
+def _ler_linhas_espelhadas(tabela, colunas, coluna_id, ids):
+    """Linhas atuais de 'tabela' no arquivo para os 'ids' informados, lidas em blocos IN."""
+    conn, cursor = conectar_db()
+    if conn is None: raise sqlite3.OperationalError("sem conexão com o banco")
+    try:
+        linhas = []
+        for bloco, marcadores in _blocos_in(ids):
+            cursor.execute(f"SELECT {colunas} FROM {tabela} WHERE {coluna_id} IN ({marcadores})", bloco)
+            linhas.extend(cursor.fetchall())
+        return linhas
+    finally:
+        liberar_conexao(conn, cursor)
+
+def _aplicar_mudancas_espelho():
+    """
+    Aplica ao espelho as mudanças do arquivo desde _espelho["seq"], numa única
+    transação da conexão âncora. Só o estado atual de cada registro importa:
+    quem ainda existe no arquivo é regravado, quem não existe é apagado, então
+    aplicar a mesma mudança duas vezes não causa diferença. Retorna False se o
+    registro já foi podado (é preciso recarregar); lança sqlite3.Error em falhas.
+    """
+    mudancas = mudancas_desde(_espelho["seq"])
+    if mudancas is None:
+        raise sqlite3.OperationalError("falha ao ler o registro de mudanças")
+    if not mudancas["completo"]:
+        return False
+    ids_autores, ids_livros = list(mudancas["autores"]), list(mudancas["livros"])
+    if ids_autores or ids_livros:
+        autores = _ler_linhas_espelhadas("autor", "id_autor, nome", "id_autor", ids_autores)
+        livros = _ler_linhas_espelhadas("livro", "id_livro, titulo, id_autor", "id_livro", ids_livros)
+        existentes = {id_autor for id_autor, _ in autores}
+        ancora = _espelho["ancora"]
+        try:
+            ancora.execute("BEGIN IMMEDIATE")
+            # Livros primeiro: um autor excluído não pode ter livros no espelho (ON DELETE RESTRICT)
+            for bloco, marcadores in _blocos_in(ids_livros):
+                ancora.execute(f"DELETE FROM livro WHERE id_livro IN ({marcadores})", bloco)
+            removidos = [id_autor for id_autor in ids_autores if id_autor not in existentes]
+            for bloco, marcadores in _blocos_in(removidos):
+                ancora.execute(f"DELETE FROM autor WHERE id_autor IN ({marcadores})", bloco)
+            # UPDATE em vez de DELETE + INSERT: dispara autor_fts_au e preserva livros_count
+            ancora.executemany('''
+                INSERT INTO autor (id_autor, nome) VALUES (?, ?)
+                ON CONFLICT(id_autor) DO UPDATE SET nome = excluded.nome
+            ''', autores)
+            ancora.executemany("INSERT INTO livro (id_livro, titulo, id_autor) VALUES (?, ?, ?)", livros)
+            ancora.commit()
+        except sqlite3.Error:
+            ancora.rollback()
+            raise
+        _estatisticas_espelho["registros_aplicados"] += len(ids_autores) + len(ids_livros)
+    _espelho["seq"] = mudancas["seq"]
+    _estatisticas_espelho["sincronizacoes"] += 1
+    return True
+
+@instrumentacao.instrumentado
+def sincronizar_espelho():
+    """
+    Leva ao espelho as mudanças confirmadas no arquivo desde a última sincronização
+    (chamada pelas funções de escrita e pelo MonitorMudancas). Se o registro de
+    mudanças já tiver sido podado, ou a aplicação falhar, o espelho é recarregado
+    por inteiro; se nem isso der certo, ele é desativado e as leituras voltam ao
+    arquivo. Retorna True se o espelho está em dia, False caso contrário.
+    """
+    with _trava_espelho:
+        if not _espelho_ativo(): return False
+        try:
+            if _aplicar_mudancas_espelho():
+                return True
+        except sqlite3.Error as e:
+            print(f"Erro ao sincronizar o espelho em memória: {e}")
+            _estatisticas_espelho["falhas"] += 1
+        if recarregar_espelho():
+            return True
+        print("Espelho em memória desativado: as leituras voltam a ser feitas no arquivo.")
+        return False
+
+def estatisticas_espelho():
+    """Estado do espelho em memória: ativo, tamanho em bytes, última mudança aplicada e contadores."""
+    with _trava_espelho:
+        retrato = dict(_estatisticas_espelho, ativo=_espelho_ativo(), seq=_espelho["seq"], bytes=0)
+        if retrato["ativo"]:
+            try:
+                paginas, tamanho_pagina = (_espelho["ancora"].execute(f"PRAGMA {pragma}").fetchone()[0]
+                                           for pragma in ("page_count", "page_size"))
+                retrato["bytes"] = paginas * tamanho_pagina
+            except sqlite3.Error as e:
+                print(f"Erro ao ler o tamanho do espelho em memória: {e}")
+        return retrato
+
+# --- Alterações em lote (seleção múltipla na interface; uma transação por chamada) ---
+
+def _blocos_in(valores):
+    """Divide 'valores' em blocos de até TAMANHO_BLOCO_IN, com os marcadores '?, ?, ...' de cada um."""
+    for i in range(0, len(valores), TAMANHO_BLOCO_IN):
+        bloco = valores[i:i + TAMANHO_BLOCO_IN]
+        yield bloco, ", ".join("?" * len(bloco))
+
+@instrumentacao.instrumentado
+@_com_retentativa
+def deletar_livros_em_lote(ids_livros):
+    """
+    Deleta vários livros numa única transação (DELETE ... IN (...) em blocos).
+    Retorna a quantidade de livros deletados; IDs inexistentes são ignorados.
+    """
+    ids_livros = list(dict.fromkeys(ids_livros))
+    conn, cursor = conectar_db()
+    if conn is None: return 0
+
+    try:
+        cursor.execute("BEGIN")
+        deletados = 0
+        for bloco, marcadores in _blocos_in(ids_livros):
+            cursor.execute(f"DELETE FROM livro WHERE id_livro IN ({marcadores})", bloco)
+            deletados += cursor.rowcount
+        conn.commit()
+        return deletados
+    except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
+        print(f"Erro ao deletar livros em lote: {e}")
+        return 0
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+@instrumentacao.instrumentado
+@_com_retentativa
+def reatribuir_livros_em_lote(ids_livros, novo_id_autor):
+    """
+    Passa vários livros para o autor 'novo_id_autor' numa única transação.
+    Retorna a quantidade de livros alterados; se o autor não existir (FOREIGN KEY),
+    nada é alterado e o retorno é 0.
+    """
+    ids_livros = list(dict.fromkeys(ids_livros))
+    conn, cursor = conectar_db()
+    if conn is None: return 0
+
+    try:
+        cursor.execute("BEGIN")
+        alterados = 0
+        for bloco, marcadores in _blocos_in(ids_livros):
+            cursor.execute(f"UPDATE livro SET id_autor = ? WHERE id_livro IN ({marcadores})", [novo_id_autor, *bloco])
+            alterados += cursor.rowcount
+        conn.commit()
+        return alterados
+    except sqlite3.IntegrityError: # Autor inexistente: a transação inteira é desfeita
+        return 0
+    except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
+        print(f"Erro ao reatribuir livros em lote: {e}")
+        return 0
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+@instrumentacao.instrumentado
+@_com_retentativa
+def deletar_autores_em_lote(ids_autores):
+    """
+    Deleta vários autores numa única transação. Autores com livros cadastrados
+    (o ON DELETE RESTRICT recusaria) e IDs inexistentes não são deletados.
+    Retorna (deletados, rejeitados): a lista de IDs deletados e uma lista de
+    (id_autor, motivo) dos que ficaram.
+    """
+    ids_autores = list(dict.fromkeys(ids_autores))
+    conn, cursor = conectar_db()
+    if conn is None: return [], [(id_autor, "sem conexão com o banco") for id_autor in ids_autores]
+
+    try:
+        # IMMEDIATE: ninguém cadastra livros para esses autores entre a checagem e o DELETE
+        cursor.execute("BEGIN IMMEDIATE")
+        existentes, com_livros = set(), set()
+        for bloco, marcadores in _blocos_in(ids_autores):
+            # livros_count (mantido por triggers) responde sem consultar 'livro'
+            cursor.execute(f"SELECT id_autor, livros_count FROM autor WHERE id_autor IN ({marcadores})", bloco)
+            for id_autor, livros_count in cursor.fetchall():
+                existentes.add(id_autor)
+                if livros_count > 0:
+                    com_livros.add(id_autor)
+
+        deletados, rejeitados = [], []
+        for id_autor in ids_autores:
+            if id_autor not in existentes:
+                rejeitados.append((id_autor, "autor não encontrado"))
+            elif id_autor in com_livros:
+                rejeitados.append((id_autor, "possui livros cadastrados"))
+            else:
+                deletados.append(id_autor)
+        for bloco, marcadores in _blocos_in(deletados):
+            cursor.execute(f"DELETE FROM autor WHERE id_autor IN ({marcadores})", bloco)
+        conn.commit()
+        for id_autor in deletados:
+            _corrigir_cache_autores(id_autor)
+        return deletados, rejeitados
+    except sqlite3.Error as e:
+        _relancar_se_bloqueio(e)
+        print(f"Erro ao deletar autores em lote: {e}")
+        return [], [(id_autor, str(e)) for id_autor in ids_autores]
+    finally:
+        if conn:
+            liberar_conexao(conn, cursor)
+
+# --- Exportação do catálogo (CSV / JSON Lines, opcionalmente com gzip) ---
+
+COLUNAS_EXPORTACAO = ("id_livro", "titulo", "autor", "id_autor")  # Mesmos nomes lidos por importacao.py
+TAMANHO_BLOCO_EXPORTACAO = 5000  # Linhas lidas do banco e gravadas por vez
+
+def _formato_exportacao(caminho):
+    """Deduz (formato, comprimir) da extensão: .csv, .jsonl/.ndjson, com ou sem .gz."""
+    nome = caminho.lower()
+    comprimir = nome.endswith(".gz")
+    if comprimir:
+        nome = nome[:-3]
+    return ("jsonl" if nome.endswith((".jsonl", ".ndjson", ".json")) else "csv"), comprimir
+
+def _abrir_para_exportacao(caminho, comprimir):
+    if comprimir: # Nível 6: bem mais rápido que o padrão (9) e quase do mesmo tamanho
+        return gzip.open(caminho, "wt", compresslevel=6, encoding="utf-8", newline="")
+    return open(caminho, "w", encoding="utf-8", newline="")
+
+@instrumentacao.instrumentado
+def exportar_catalogo(caminho, formato=None, comprimir=None, tamanho_bloco=TAMANHO_BLOCO_EXPORTACAO,
+                      ao_progredir=None):
+    """
+    Exporta todos os livros com o nome do autor para 'caminho' em CSV ou JSON Lines
+    (deduzidos da extensão quando não informados; '.gz' liga a compressão).
+
+    Os livros são lidos em blocos de 'tamanho_bloco' linhas, por ordem de id_livro
+    e com paginação por chave. Cada bloco é uma consulta curta, então a memória não
+    depende do tamanho do catálogo e as escritas de outras threads não ficam presas
+    atrás da exportação. 'ao_progredir(exportadas, total)' é chamado após cada bloco,
+    na thread que exporta; se retornar False, a exportação é cancelada.
+
+    O arquivo é gravado com outro nome e só substitui 'caminho' no final.
+    Retorna {"exportadas", "segundos", "linhas_por_segundo", "concluida"} ou None em caso de erro.
+    """
+    formato_deduzido, comprimir_deduzido = _formato_exportacao(caminho)
+    formato = formato or formato_deduzido
+    comprimir = comprimir_deduzido if comprimir is None else comprimir
+    if formato not in ("csv", "jsonl"):
+        print(f"Formato de exportação desconhecido: {formato}")
+        return None
+    # Total para a barra de progresso: vem dos contadores mantidos por triggers, sem COUNT(*) em 'livro'
+    totais = estatisticas_catalogo(top=0)
+    total = totais["livros"] if totais else 0
+
+    conn, cursor = conectar_db(leitura=True)
+    if conn is None: return None
+
+    inicio = time.perf_counter()
+    caminho_parcial = caminho + ".parcial"
+    exportadas = 0
+    concluida = False
+    try:
+        with _abrir_para_exportacao(caminho_parcial, comprimir) as arquivo:
+            escritor = csv.writer(arquivo) if formato == "csv" else None
+            if escritor:
+                escritor.writerow(COLUNAS_EXPORTACAO)
+            ultimo_id = -1
+            while True:
+                cursor.execute('''
+                    SELECT l.id_livro, l.titulo, a.nome, l.id_autor
+                    FROM livro l
+                    INNER JOIN autor a ON l.id_autor = a.id_autor
+                    WHERE l.id_livro > ?
+                    ORDER BY l.id_livro
+                    LIMIT ?
+                ''', (ultimo_id, tamanho_bloco))
+                bloco = cursor.fetchall()
+                if not bloco:
+                    concluida = True
+                    break
+                if escritor:
+                    escritor.writerows(bloco)
+                else:
+                    arquivo.writelines(json.dumps(dict(zip(COLUNAS_EXPORTACAO, livro)), ensure_ascii=False) + "\n"
+                                       for livro in bloco)
+                exportadas += len(bloco)
+                ultimo_id = bloco[-1][0]
+                if ao_progredir and ao_progredir(exportadas, max(total, exportadas)) is False:
+                    break
+        if concluida:
+            os.replace(caminho_parcial, caminho)
+        segundos = time.perf_counter() - inicio
+        return {
+            "exportadas": exportadas,
+            "segundos": segundos,
+            "linhas_por_segundo": exportadas / segundos if segundos > 0 else 0.0,
+            "concluida": concluida,
+        }
+    except (sqlite3.Error, OSError) as e:
+        print(f"Erro ao exportar o catálogo para '{caminho}': {e}")
+        return None
+    finally:
+        if not concluida and os.path.exists(caminho_parcial):
+            os.remove(caminho_parcial)
+        if conn:
+            liberar_conexao(conn, cursor)
+
+# --- Backup online (API de backup do SQLite, em pequenos passos) ---
+
+PAGINAS_POR_PASSO_BACKUP = 64   # Páginas copiadas por passo; entre passos o banco fica livre para escritas
+PAUSA_ENTRE_PASSOS_BACKUP = 0.005  # Segundos de pausa entre passos, para as escritas seguirem
+MAX_REINICIOS_BACKUP = 3  # Reinícios (o banco mudou durante a cópia) antes de copiar tudo de uma vez
+MANTER_BACKUPS = 10  # Quantos backups manter; os mais antigos são apagados
+
+class _BackupCancelado(Exception):
+    """Lançada no callback de progresso para interromper Connection.backup()."""
+
+class _MuitosReinicios(Exception):
+    """Lançada no callback de progresso quando a cópia recomeçou vezes demais."""
+
+def diretorio_backups():
+    """Pasta padrão dos backups: 'backups', ao lado do arquivo do banco."""
+    return os.path.join(os.path.dirname(os.path.abspath(DB_NAME)), "backups")
+
+def _prefixo_backup():
+    return os.path.splitext(os.path.basename(DB_NAME))[0] + "-"
+
+def listar_backups(diretorio=None):
+    """Caminhos dos backups do banco atual em 'diretorio', do mais antigo para o mais novo."""
+    diretorio = diretorio or diretorio_backups()
+    if not os.path.isdir(diretorio):
+        return []
+    prefixo = _prefixo_backup()
+    # O carimbo de data/hora no nome (AAAAMMDD-HHMMSS) faz a ordem alfabética ser a cronológica
+    nomes = sorted(nome for nome in os.listdir(diretorio) if nome.startswith(prefixo) and nome.endswith(".db"))
+    return [os.path.join(diretorio, nome) for nome in nomes]
+
+def _caminho_novo_backup(diretorio):
+    base = os.path.join(diretorio, _prefixo_backup() + time.strftime("%Y%m%d-%H%M%S"))
+    caminho, sufixo = base + ".db", 2
+    while os.path.exists(caminho): # Dois backups no mesmo segundo
+        caminho, sufixo = f"{base}-{sufixo}.db", sufixo + 1
+    return caminho
+
+def _aplicar_retencao(diretorio, manter):
+    """Apaga os backups mais antigos além dos 'manter' mais novos. Retorna os caminhos apagados."""
+    removidos = listar_backups(diretorio)[:-manter] if manter > 0 else []
+    for caminho in removidos:
+        os.remove(caminho)
+    return removidos
+
+@instrumentacao.instrumentado
+def verificar_backup(caminho):
+    """
+    Roda PRAGMA integrity_check no arquivo de backup (aberto somente para leitura).
+    Retorna a lista de mensagens: ['ok'] quando o arquivo está íntegro.
+    """
+    conn = None
+    try:
+        conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+        return [linha[0] for linha in conn.execute("PRAGMA integrity_check")]
+    except sqlite3.Error as e:
+        print(f"Erro ao verificar o backup '{caminho}': {e}")
+        return [str(e)]
     finally:
         if conn:
             conn.close()
 
+def _copiar_em_passos(origem, destino, paginas_por_passo, pausa, ao_progredir):
+    """Copia 'origem' para 'destino' com Connection.backup, passo a passo. Retorna o total de páginas."""
+    estado = {"restantes": None, "reinicios": 0, "total": 0}
+
+    def progresso(_status, restantes, total):
+        if estado["restantes"] is not None and restantes > estado["restantes"]:
+            # Outra conexão escreveu no banco: o SQLite recomeça a cópia do início
+            estado["reinicios"] += 1
+            if estado["reinicios"] > MAX_REINICIOS_BACKUP:
+                raise _MuitosReinicios()
+        estado["restantes"], estado["total"] = restantes, total
+        if ao_progredir and ao_progredir(total - restantes, total) is False:
+            raise _BackupCancelado()
+        time.sleep(pausa) # 'sleep' de backup() só vale para SQLITE_BUSY; a pausa entre passos é feita aqui
+
+    try:
+        origem.backup(destino, pages=paginas_por_passo, progress=progresso)
+    except _MuitosReinicios:
+        # Banco com escritas contínuas: copia o restante num único passo. Em WAL a
+        # leitura não bloqueia os escritores; no modo padrão eles esperam essa cópia.
+        origem.backup(destino, pages=-1)
+    return estado["total"]
+
+@instrumentacao.instrumentado
+def fazer_backup(diretorio=None, paginas_por_passo=PAGINAS_POR_PASSO_BACKUP, pausa=PAUSA_ENTRE_PASSOS_BACKUP,
+                 manter=MANTER_BACKUPS, verificar=True, ao_progredir=None):
+    """
+    Faz um backup consistente do banco, com a aplicação em uso, num arquivo com
+    data e hora no nome dentro de 'diretorio' (padrão: diretorio_backups()).
+
+    A cópia usa a API de backup do SQLite em passos de 'paginas_por_passo'
+    páginas, com uma pausa entre eles: a trava de leitura só é mantida durante
+    cada passo, então os outros usuários continuam gravando. Rode numa thread
+    própria. 'ao_progredir(copiadas, total)' é chamado após cada passo (em
+    páginas); se retornar False, o backup é cancelado.
+
+    Com verificar=True o arquivo passa por PRAGMA integrity_check, e só então os
+    backups mais antigos além dos 'manter' mais novos são apagados.
+    Retorna {"caminho", "paginas", "segundos", "concluido", "integridade", "removidos"}
+    ('integridade' é a lista de verificar_backup(), ou None sem verificação) ou None em caso de erro.
+    """
+    diretorio = diretorio or diretorio_backups()
+    inicio = time.perf_counter()
+    origem = destino = None
+    caminho = caminho_parcial = None
+    concluido = False
+    try:
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = _caminho_novo_backup(diretorio)
+        caminho_parcial = caminho + ".parcial"
+        origem = _abrir_conexao() # Conexão própria: a do pool desta thread fica livre
+        destino = sqlite3.connect(caminho_parcial)
+        try:
+            paginas = _copiar_em_passos(origem, destino, paginas_por_passo, pausa, ao_progredir)
+        except _BackupCancelado:
+            return {"caminho": None, "paginas": 0, "segundos": time.perf_counter() - inicio,
+                    "concluido": False, "integridade": None, "removidos": []}
+        destino.close()
+        destino = None
+        os.replace(caminho_parcial, caminho)
+        concluido = True
+    except (sqlite3.Error, OSError) as e:
+        print(f"Erro ao fazer o backup do banco '{DB_NAME}': {e}")
+        return None
+    finally:
+        for conexao in (destino, origem):
+            if conexao is not None:
+                conexao.close()
+        if not concluido and caminho_parcial and os.path.exists(caminho_parcial):
+            os.remove(caminho_parcial)
+
+    integridade = verificar_backup(caminho) if verificar else None
+    removidos = []
+    if integridade in (None, ["ok"]): # Um backup com problema não tira o lugar dos anteriores
+        try:
+            removidos = _aplicar_retencao(diretorio, manter)
+        except OSError as e:
+            print(f"Erro ao apagar backups antigos em '{diretorio}': {e}")
+    return {
+        "caminho": caminho,
+        "paginas": paginas,
+        "segundos": time.perf_counter() - inicio,
+        "concluido": True,
+        "integridade": integridade,
+        "removidos": removidos,
+    }
+
 # --- Bloco para execução de teste (opcional) ---
 if __name__ == '__main__':
     print("--- Executando testes do módulo database.py ---")
@@ -0,0 +1,148 @@
+"""
+Execução das operações de banco de dados fora da thread do Tkinter.
+
+As funções do módulo database são enfileiradas para uma thread de trabalho; os
+resultados voltam por outra fila, que a thread da interface consulta
+periodicamente com after(). Assim, uma consulta lenta ou um banco travado não
+congela a janela.
+"""
+import queue
+import threading
+import time
+import tkinter as tk
+
+import instrumentacao
+
+INTERVALO_VERIFICACAO_MS = 30  # Frequência com que a interface busca respostas prontas
+
+
+class ExecutorBanco:
+    """
+    Fila de pedidos atendida por uma única thread de trabalho (que, pelo pool do
+    módulo database, usa sempre a mesma conexão).
+
+    Pedidos submetidos com a mesma 'chave' se substituem: se um pedido mais novo
+    chegar antes de o anterior terminar, o anterior é descartado (ou nem chega a
+    rodar) e seu callback não é chamado. Use isso para atualizações de listas.
+    """
+
+    def __init__(self, raiz_tk, ao_mudar_ocupado=None, ao_falhar_padrao=None, perfil=None):
+        self.raiz = raiz_tk
+        self.ao_mudar_ocupado = ao_mudar_ocupado  # Recebe True/False quando há/não há trabalho pendente
+        self.ao_falhar_padrao = ao_falhar_padrao  # Trata exceções de pedidos submetidos sem ao_falhar
+        self.perfil = perfil  # PerfilInterface (opcional): mede pedidos e respostas
+        self.pedidos = queue.Queue()
+        self.respostas = queue.Queue()
+        self.geracoes = {}  # chave -> geração do pedido mais recente com essa chave
+        self.trava = threading.Lock()
+        self.pendentes = 0  # Só é alterado na thread da interface
+        self.encerrado = False
+
+        self.thread = threading.Thread(target=self._atender_pedidos, name="ExecutorBanco", daemon=True)
+        self.thread.start()
+        self.id_verificacao = self.raiz.after(INTERVALO_VERIFICACAO_MS, self._verificar_respostas)
+
+    def submeter(self, funcao, *args, ao_concluir=None, ao_falhar=None, chave=None, dono=None, silencioso=False):
+        """
+        Enfileira funcao(*args) para rodar na thread de trabalho.
+        ao_concluir(resultado) / ao_falhar(excecao) são chamados depois, na thread
+        da interface. Se 'dono' (um widget) já tiver sido destruído quando a
+        resposta chegar, os callbacks são ignorados. Pedidos silenciosos (ex.:
+        verificações periódicas) não acionam o indicador de atividade.
+        """
+        geracao = None
+        if chave is not None:
+            with self.trava:
+                geracao = self.geracoes.get(chave, 0) + 1
+                self.geracoes[chave] = geracao
+        self.pedidos.put((funcao, args, ao_concluir, ao_falhar, chave, geracao, dono, silencioso, time.perf_counter()))
+        if not silencioso:
+            self._alterar_pendentes(+1)
+
+    def _obsoleto(self, chave, geracao):
+        """Indica se um pedido com essa chave foi substituído por outro mais novo."""
+        if chave is None:
+            return False
+        with self.trava:
+            return self.geracoes.get(chave) != geracao
+
+    def _atender_pedidos(self):
+        """Laço da thread de trabalho."""
+        while True:
+            pedido = self.pedidos.get()
+            if pedido is None: # Sinal de encerramento
+                return
+            funcao, args, ao_concluir, ao_falhar, chave, geracao, dono, silencioso, enviado = pedido
+            if self._obsoleto(chave, geracao):
+                self.respostas.put((None, None, None, None, chave, geracao, dono, silencioso))
+                continue
+            inicio, banco_antes = time.perf_counter(), instrumentacao.tempo_banco_thread()
+            try:
+                resultado, erro = funcao(*args), None
+            except Exception as e: # Repassado à interface; a thread continua atendendo
+                resultado, erro = None, e
+            if self.perfil is not None:
+                self.perfil.registrar_segundo_plano(funcao, inicio - enviado, time.perf_counter() - inicio,
+                                                    instrumentacao.tempo_banco_thread() - banco_antes)
+            self.respostas.put((resultado, erro, ao_concluir, ao_falhar, chave, geracao, dono, silencioso))
+
+    def _verificar_respostas(self):
+        """
+        Chamado periodicamente pela thread da interface via after(). A próxima
+        verificação é agendada mesmo que algo dê errado aqui: se ela parasse, as
+        respostas seguintes ficariam presas na fila e o indicador de atividade, ligado.
+        """
+        try:
+            while True:
+                try:
+                    resposta = self.respostas.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    self._entregar_resposta(*resposta)
+                except Exception as e: # Ex.: TclError de um widget destruído, sem 'dono' informado
+                    print(f"Erro no callback de uma operação de banco de dados: {e!r}")
+        finally:
+            if not self.encerrado:
+                self.id_verificacao = self.raiz.after(INTERVALO_VERIFICACAO_MS, self._verificar_respostas)
+
+    def _entregar_resposta(self, resultado, erro, ao_concluir, ao_falhar, chave, geracao, dono, silencioso):
+        """Chama, na thread da interface, o callback correspondente a uma resposta."""
+        if not silencioso:
+            self._alterar_pendentes(-1)
+        if self._obsoleto(chave, geracao):
+            return
+        if dono is not None and not dono.winfo_exists():
+            return
+        if erro is not None:
+            if ao_falhar:
+                self._chamar(ao_falhar, erro)
+            elif self.ao_falhar_padrao:
+                self._chamar(self.ao_falhar_padrao, erro)
+            else:
+                print(f"Erro em operação de banco de dados em segundo plano: {erro!r}")
+        elif ao_concluir:
+            self._chamar(ao_concluir, resultado)
+
+    def _chamar(self, callback, valor):
+        if self.perfil is None:
+            callback(valor)
+        else:
+            self.perfil.medir_resposta(callback, valor)
+
+    def _alterar_pendentes(self, delta):
+        ocupado_antes = self.pendentes > 0
+        self.pendentes += delta
+        ocupado_agora = self.pendentes > 0
+        if ocupado_antes != ocupado_agora and self.ao_mudar_ocupado:
+            self.ao_mudar_ocupado(ocupado_agora)
+
+    def encerrar(self, tempo_limite=5.0):
+        """Para de verificar respostas e espera a thread de trabalho terminar o pedido atual."""
+        self.encerrado = True
+        try:
+            self.raiz.after_cancel(self.id_verificacao)
+        except tk.TclError:
+            pass # A janela já foi destruída
+        self.pedidos.put(None)
+        self.thread.join(tempo_limite)
@@ -0,0 +1,296 @@
+"""
+Importação em massa de autores e livros a partir de arquivos CSV ou JSON Lines.
+
+Cada registro pode ter as chaves:
+    autor     -> nome do autor (resolvido para id_autor durante a carga)
+    titulo    -> título do livro (se ausente, o registro cadastra apenas o autor)
+    id_autor  -> alternativa a 'autor' quando o ID já é conhecido
+
+O arquivo é lido em blocos de tamanho fixo, então a memória usada não depende do
+tamanho do arquivo. Linhas problemáticas (autor duplicado, autor inexistente,
+campos vazios) são rejeitadas e relatadas, sem interromper o restante da carga.
+
+Com --unificar-semelhantes, os livros cujo autor não existe com o nome exato,
+mas tem um nome parecido ("Drummond, Carlos" x "Carlos Drummond de Andrade",
+ver indice_trigramas.py), vão para o autor já cadastrado em vez de criar outro;
+variações do mesmo nome novo dentro do arquivo também viram um único autor.
+Cada unificação aparece no relatório.
+
+Uso:
+    python importacao.py catalogo.csv [--formato csv|jsonl] [--lote 5000] [--nao-criar-autores]
+                         [--unificar-semelhantes [LIMIAR]]
+"""
+import argparse
+import collections
+import csv
+import itertools
+import json
+import time
+
+import database as db
+from indice_trigramas import IndiceTrigramas
+
+MAX_REJEICOES_GUARDADAS = 1000  # Limita a memória usada pelo relatório de rejeições
+MAX_AUTORES_EM_CACHE = 10000    # Nomes de autores resolvidos guardados de um bloco para o outro
+
+
+def ler_registros(caminho, formato=None):
+    """Gera (numero_linha, registro) lendo o arquivo sob demanda, um registro por vez."""
+    if formato is None:
+        formato = "jsonl" if caminho.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        if formato == "csv":
+            leitor = csv.DictReader(arquivo)
+            for registro in leitor:
+                yield leitor.line_num, registro
+        elif formato == "jsonl":
+            for numero_linha, linha in enumerate(arquivo, start=1):
+                if not linha.strip():
+                    continue
+                try:
+                    yield numero_linha, json.loads(linha)
+                except json.JSONDecodeError as e:
+                    yield numero_linha, {"_erro": f"JSON inválido: {e}"}
+        else:
+            raise ValueError(f"Formato desconhecido: {formato}")
+
+
+def _texto(registro, chave):
+    """Retorna o campo como texto sem espaços nas pontas ('' se ausente)."""
+    valor = registro.get(chave)
+    return str(valor).strip() if valor is not None else ""
+
+
+class _CacheAutores(collections.OrderedDict):
+    """
+    Cache nome -> id_autor da carga, do usado há mais tempo ao mais recente.
+    Durante um bloco ele guarda todos os autores do bloco; ao fim de cada bloco,
+    aparar() descarta os mais antigos além de 'limite', para que a memória dependa
+    do tamanho do bloco e não de quantos autores diferentes o arquivo tem. Um nome
+    descartado volta a ser procurado no banco (db.buscar_ids_autores, em lote).
+    """
+
+    def __init__(self, limite=None):
+        super().__init__()
+        self.limite = MAX_AUTORES_EM_CACHE if limite is None else limite
+
+    def usar(self, nomes):
+        """Marca como usados agora os 'nomes' que já estão no cache."""
+        for nome in nomes:
+            if nome in self:
+                self.move_to_end(nome)
+
+    def aparar(self):
+        while len(self) > self.limite:
+            self.popitem(last=False)
+
+
+class _Relatorio:
+    """Acumula contadores e rejeições de uma importação."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.lidas = 0
+        self.autores_inseridos = 0
+        self.livros_inseridos = 0
+        self.total_rejeitadas = 0
+        self.rejeitadas = [] # (numero_linha, motivo), limitada a MAX_REJEICOES_GUARDADAS
+        self.autores_unificados = 0
+        self.unificacoes = [] # (nome no arquivo, nome usado, semelhança), também limitada
+
+    def rejeitar(self, numero_linha, motivo):
+        self.total_rejeitadas += 1
+        if len(self.rejeitadas) < MAX_REJEICOES_GUARDADAS:
+            self.rejeitadas.append((numero_linha, motivo))
+
+    def unificar(self, nome, nome_usado, semelhanca):
+        self.autores_unificados += 1
+        if len(self.unificacoes) < MAX_REJEICOES_GUARDADAS:
+            self.unificacoes.append((nome, nome_usado, semelhanca))
+
+    def como_dicionario(self):
+        segundos = time.perf_counter() - self.inicio
+        return {
+            "lidas": self.lidas,
+            "autores_inseridos": self.autores_inseridos,
+            "livros_inseridos": self.livros_inseridos,
+            "total_rejeitadas": self.total_rejeitadas,
+            "rejeitadas": self.rejeitadas,
+            "autores_unificados": self.autores_unificados,
+            "unificacoes": self.unificacoes,
+            "segundos": segundos,
+            "linhas_por_segundo": self.lidas / segundos if segundos > 0 else 0.0,
+        }
+
+
+def _agrupar_semelhantes(nomes, limiar):
+    """
+    Agrupa as variações de um mesmo nome dentro de 'nomes' (autores ainda não
+    cadastrados). Retorna {variação: (nome escolhido, semelhança)}; o escolhido é o
+    primeiro nome do grupo em ordem alfabética, e só ele será cadastrado.
+    """
+    indice = IndiceTrigramas()
+    variacoes = {}
+    for nome in sorted(nomes):
+        parecidos = indice.semelhantes(nome, 1, limiar)
+        if parecidos:
+            _posicao, escolhido, semelhanca = parecidos[0]
+            variacoes[nome] = (escolhido, semelhanca)
+        else:
+            indice.adicionar(len(indice), nome)
+    return variacoes
+
+
+def _processar_bloco(bloco, ids_autores, criar_autores, relatorio, limiar_semelhanca=None):
+    """Resolve os autores de um bloco de registros e insere autores e livros em lote."""
+    somente_autores = []   # (numero_linha, nome)
+    livros_pendentes = []  # (numero_linha, titulo, nome_autor ou None, id_autor ou None)
+
+    for numero_linha, registro in bloco:
+        if "_erro" in registro:
+            relatorio.rejeitar(numero_linha, registro["_erro"])
+            continue
+        titulo = _texto(registro, "titulo")
+        nome_autor = _texto(registro, "autor")
+        id_autor = _texto(registro, "id_autor")
+
+        if not titulo:
+            if nome_autor:
+                somente_autores.append((numero_linha, nome_autor))
+            else:
+                relatorio.rejeitar(numero_linha, "registro sem título e sem autor")
+        elif nome_autor: # O nome tem precedência: arquivos exportados trazem os dois, e os IDs
+                         # de outro banco não valem neste
+            livros_pendentes.append((numero_linha, titulo, nome_autor, None))
+        elif id_autor:
+            if id_autor.isdigit():
+                livros_pendentes.append((numero_linha, titulo, None, int(id_autor)))
+            else:
+                relatorio.rejeitar(numero_linha, f"id_autor inválido: {id_autor!r}")
+        else:
+            relatorio.rejeitar(numero_linha, "livro sem autor")
+
+    # Autores citados no bloco que ainda não estão no cache local: primeiro procura
+    # no banco; os que faltarem são criados (ou rejeitados, se criar_autores=False).
+    citados = {nome for _n, _t, nome, _i in livros_pendentes if nome}
+    ids_autores.usar(citados)
+    desconhecidos = citados - ids_autores.keys()
+    if desconhecidos:
+        ids_autores.update(db.buscar_ids_autores(desconhecidos))
+        desconhecidos -= ids_autores.keys()
+    variacoes = {}
+    if desconhecidos and limiar_semelhanca:
+        # Nome quase igual ao de um autor cadastrado (índice de trigramas): usa esse autor
+        for nome, (id_autor, nome_usado, semelhanca) in db.resolver_autores_semelhantes(
+                desconhecidos, limiar_semelhanca).items():
+            ids_autores[nome] = id_autor
+            relatorio.unificar(nome, nome_usado, semelhanca)
+        desconhecidos -= ids_autores.keys()
+        variacoes = _agrupar_semelhantes(desconhecidos, limiar_semelhanca)
+        desconhecidos -= variacoes.keys()
+    if desconhecidos and criar_autores:
+        novos, _rejeitados = db.adicionar_autores_em_lote(sorted(desconhecidos))
+        ids_autores.update(novos)
+        relatorio.autores_inseridos += len(novos)
+    for nome, (nome_usado, semelhanca) in variacoes.items():
+        if nome_usado in ids_autores:
+            ids_autores[nome] = ids_autores[nome_usado]
+            relatorio.unificar(nome, nome_usado, semelhanca)
+
+    # Registros que cadastram apenas o autor: nome já existente é uma rejeição (UNIQUE).
+    if somente_autores:
+        novos, rejeitados = db.adicionar_autores_em_lote([nome for _n, nome in somente_autores])
+        ids_autores.update(novos)
+        relatorio.autores_inseridos += len(novos)
+        for indice, nome, motivo in rejeitados:
+            relatorio.rejeitar(somente_autores[indice][0], f"autor '{nome}' rejeitado: {motivo}")
+
+    livros = []
+    linhas_livros = []
+    for numero_linha, titulo, nome_autor, id_autor in livros_pendentes:
+        if id_autor is None:
+            id_autor = ids_autores.get(nome_autor)
+            if id_autor is None:
+                relatorio.rejeitar(numero_linha, f"autor '{nome_autor}' não encontrado")
+                continue
+        livros.append((titulo, id_autor))
+        linhas_livros.append(numero_linha)
+
+    if livros:
+        inseridos, rejeitados = db.adicionar_livros_em_lote(livros)
+        relatorio.livros_inseridos += inseridos
+        for indice, (titulo, id_autor), motivo in rejeitados:
+            relatorio.rejeitar(linhas_livros[indice], f"livro '{titulo}' (autor ID {id_autor}) rejeitado: {motivo}")
+
+
+def importar_catalogo(caminho, formato=None, tamanho_lote=5000, criar_autores=True, ao_progredir=None,
+                      limiar_semelhanca=None):
+    """
+    Importa autores e livros do arquivo em blocos de 'tamanho_lote' registros, cada
+    bloco numa única transação. 'ao_progredir', se informado, recebe o relatório
+    parcial (dicionário) após cada bloco. Com 'limiar_semelhanca' (0 a 1), autores
+    de livros com nome parecido a partir desse limiar são unificados (ver o início
+    do módulo). Retorna o relatório final.
+    """
+    relatorio = _Relatorio()
+    ids_autores = _CacheAutores() # Nome -> id_autor dos autores resolvidos nos blocos recentes
+    registros = ler_registros(caminho, formato)
+
+    while True:
+        bloco = list(itertools.islice(registros, tamanho_lote))
+        if not bloco:
+            break
+        relatorio.lidas += len(bloco)
+        _processar_bloco(bloco, ids_autores, criar_autores, relatorio, limiar_semelhanca)
+        ids_autores.aparar()
+        if ao_progredir:
+            ao_progredir(relatorio.como_dicionario())
+
+    return relatorio.como_dicionario()
+
+
+def _imprimir_progresso(parcial):
+    print(f"  {parcial['lidas']} linhas lidas, {parcial['livros_inseridos']} livros, "
+          f"{parcial['autores_inseridos']} autores, {parcial['total_rejeitadas']} rejeitadas "
+          f"({parcial['linhas_por_segundo']:.0f} linhas/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa autores e livros de um arquivo CSV ou JSON Lines.")
+    parser.add_argument("arquivo")
+    parser.add_argument("--formato", choices=("csv", "jsonl"))
+    parser.add_argument("--lote", type=int, default=5000, help="Registros por transação")
+    parser.add_argument("--nao-criar-autores", action="store_true",
+                        help="Rejeita livros cujo autor ainda não está cadastrado")
+    parser.add_argument("--unificar-semelhantes", type=float, nargs="?", const=db.LIMIAR_UNIFICACAO,
+                        metavar="LIMIAR", help="Usa o autor já cadastrado quando o nome for parecido "
+                                               f"(semelhança de 0 a 1; padrão {db.LIMIAR_UNIFICACAO})")
+    parser.add_argument("--banco", default=db.DB_NAME, help="Arquivo do banco de dados")
+    args = parser.parse_args()
+
+    db.DB_NAME = args.banco
+    db.criar_tabelas()
+    print(f"Importando '{args.arquivo}'...")
+    relatorio = importar_catalogo(args.arquivo, args.formato, args.lote,
+                                  criar_autores=not args.nao_criar_autores,
+                                  ao_progredir=_imprimir_progresso,
+                                  limiar_semelhanca=args.unificar_semelhantes)
+
+    print(f"\nConcluído em {relatorio['segundos']:.2f} s ({relatorio['linhas_por_segundo']:.0f} linhas/s).")
+    print(f"Autores inseridos: {relatorio['autores_inseridos']}")
+    print(f"Livros inseridos:  {relatorio['livros_inseridos']}")
+    if args.unificar_semelhantes:
+        print(f"Autores unificados: {relatorio['autores_unificados']}")
+        for nome, nome_usado, semelhanca in relatorio["unificacoes"][:20]:
+            print(f"  '{nome}' -> '{nome_usado}' ({semelhanca:.0%})")
+    print(f"Linhas rejeitadas: {relatorio['total_rejeitadas']}")
+    for numero_linha, motivo in relatorio["rejeitadas"][:20]:
+        print(f"  linha {numero_linha}: {motivo}")
+    if relatorio["total_rejeitadas"] > 20:
+        print(f"  ... e mais {relatorio['total_rejeitadas'] - 20} rejeições.")
+    db.fechar_conexoes()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Semelhança de nomes por trigramas, para achar autores quase duplicados
+("Drummond, Carlos" x "Carlos Drummond de Andrade") no cadastro e na importação.
+
+Cada nome vira o conjunto dos trigramas das suas palavras normalizadas (sem
+acentos nem pontuação, em minúsculas, com espaços nas bordas como no pg_trgm
+do PostgreSQL), então a ordem das palavras não importa. A semelhança é o
+coeficiente de Jaccard entre os dois conjuntos (1.0 = mesmos trigramas).
+
+O índice é invertido (trigrama -> autores que o têm) e a consulta só conta, para
+cada autor, quantos trigramas ele compartilha com o nome procurado, sem comparar
+o nome com todos os autores um a um. Trigramas raros guardam os autores num set;
+trigramas frequentes (' de', '  s', ...) guardam um mapa de bits num int do
+Python (bit i = autor na posição i), e as contagens desses trigramas são somadas
+todas de uma vez, bit a bit, com operações de inteiros (ver _ContadorDeBits).
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+
+LIMIAR_SEMELHANCA = 0.4  # Semelhança mínima (Jaccard) para um autor ser sugerido
+MAX_SEMELHANTES = 5      # Sugestões devolvidas por consulta
+FRACAO_FREQUENTE = 1 / 256  # Trigrama em mais que essa fração dos autores vira mapa de bits
+
+_SEPARADORES = re.compile(r"[\W_]+")
+_BYTE_NAO_NULO = re.compile(rb"[^\x00]")
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos, para comparar 'jose' com 'José'."""
+    if texto.isascii(): # Caso mais comum e bem mais rápido
+        return texto.lower()
+    decomposto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def trigramas(nome):
+    """Conjunto de trigramas das palavras de 'nome' ('  d', ' dr', 'dru', ..., 'nd ')."""
+    conjunto = set()
+    for palavra in _SEPARADORES.sub(" ", normalizar(nome)).split():
+        com_bordas = f"  {palavra} "
+        conjunto.update(com_bordas[i:i + 3] for i in range(len(com_bordas) - 2))
+    return frozenset(conjunto)
+
+
+def semelhanca(nome_a, nome_b):
+    """Coeficiente de Jaccard entre os trigramas de dois nomes (0.0 a 1.0)."""
+    a, b = trigramas(nome_a), trigramas(nome_b)
+    if not a or not b:
+        return 0.0
+    comuns = len(a & b)
+    return comuns / (len(a) + len(b) - comuns)
+
+
+class _ContadorDeBits:
+    """
+    Soma de vários mapas de bits, posição a posição, em "fatias de bits": a fatia
+    k tem o bit k da contagem de todas as posições. Somar um mapa custa poucas
+    operações sobre inteiros grandes (em C), qualquer que seja o número de autores.
+    """
+
+    def __init__(self):
+        self.fatias = []
+
+    def somar(self, mapa):
+        vai_um = mapa
+        for k, fatia in enumerate(self.fatias):
+            if not vai_um:
+                return
+            self.fatias[k], vai_um = fatia ^ vai_um, fatia & vai_um
+        if vai_um:
+            self.fatias.append(vai_um)
+
+    def pelo_menos(self, minimo):
+        """Mapa de bits das posições com contagem >= minimo."""
+        if minimo <= 0:
+            return -1
+        if minimo.bit_length() > len(self.fatias):
+            return 0
+        maior = 0 # Posições cuja contagem já é maior que 'minimo' nos bits examinados
+        igual = -1 # Posições com os bits examinados iguais aos de 'minimo'
+        for k in range(len(self.fatias) - 1, -1, -1):
+            fatia = self.fatias[k]
+            if minimo >> k & 1:
+                igual &= fatia
+            else:
+                maior |= igual & fatia
+                igual &= ~fatia
+        return maior | igual
+
+    def contagens(self):
+        """Função posicao -> contagem, lendo as fatias já convertidas em bytes."""
+        fatias = [fatia.to_bytes((fatia.bit_length() + 7) // 8, "little") for fatia in self.fatias]
+
+        def contagem(posicao):
+            byte, bit = posicao >> 3, posicao & 7
+            return sum(1 << k for k, dados in enumerate(fatias) if byte < len(dados) and dados[byte] >> bit & 1)
+        return contagem
+
+
+def _posicoes(mapa):
+    """Posições dos bits ligados de um mapa de bits (pula os bytes zerados em C)."""
+    dados = mapa.to_bytes((mapa.bit_length() + 7) // 8, "little")
+    for achado in _BYTE_NAO_NULO.finditer(dados):
+        byte, base = dados[achado.start()], achado.start() * 8
+        for bit in range(8):
+            if byte >> bit & 1:
+                yield base + bit
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido de trigramas sobre os nomes dos autores, atualizado item a
+    item (adicionar/remover) para acompanhar o cache de autores do database.py.
+    Cada autor ocupa uma posição (reaproveitada quando ele sai do índice), que é
+    o número do seu bit nos mapas dos trigramas frequentes.
+    """
+
+    def __init__(self, autores=()):
+        self.nomes = {}       # {id_autor: nome}
+        self._posicao = {}    # {id_autor: posição}
+        self._ids = []        # posição -> id_autor (None = posição livre)
+        self._trigramas = []  # posição -> frozenset de trigramas
+        self._livres = []     # Posições livres, para reaproveitar
+        self._conjuntos = {}  # Trigramas raros: {trigrama: {posição, ...}}
+        self._mapas = {}      # Trigramas frequentes: {trigrama: int com um bit por posição}
+
+        # Carga inicial: conjuntos para todos e depois mapas para os frequentes
+        for id_autor, nome in autores:
+            self.adicionar(id_autor, nome)
+        limite = max(64, len(self.nomes) * FRACAO_FREQUENTE)
+        for trigrama in [t for t, posicoes in self._conjuntos.items() if len(posicoes) > limite]:
+            self._mapas[trigrama] = self._montar_mapa(self._conjuntos.pop(trigrama))
+
+    @staticmethod
+    def _montar_mapa(posicoes):
+        bits = bytearray((max(posicoes) >> 3) + 1)
+        for posicao in posicoes:
+            bits[posicao >> 3] |= 1 << (posicao & 7)
+        return int.from_bytes(bits, "little")
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def adicionar(self, id_autor, nome):
+        """Inclui (ou substitui) o autor 'id_autor' no índice."""
+        self.remover(id_autor)
+        conjunto = trigramas(nome)
+        if self._livres:
+            posicao = self._livres.pop()
+            self._ids[posicao], self._trigramas[posicao] = id_autor, conjunto
+        else:
+            posicao = len(self._ids)
+            self._ids.append(id_autor)
+            self._trigramas.append(conjunto)
+        self.nomes[id_autor] = nome
+        self._posicao[id_autor] = posicao
+        for trigrama in conjunto:
+            if trigrama in self._mapas:
+                self._mapas[trigrama] |= 1 << posicao
+            else:
+                self._conjuntos.setdefault(trigrama, set()).add(posicao)
+
+    def remover(self, id_autor):
+        """Retira o autor 'id_autor' do índice (sem efeito se ele não estiver lá)."""
+        posicao = self._posicao.pop(id_autor, None)
+        if posicao is None:
+            return
+        del self.nomes[id_autor]
+        for trigrama in self._trigramas[posicao]:
+            if trigrama in self._mapas:
+                self._mapas[trigrama] &= ~(1 << posicao)
+            else:
+                posicoes = self._conjuntos[trigrama]
+                posicoes.discard(posicao)
+                if not posicoes:
+                    del self._conjuntos[trigrama]
+        self._ids[posicao], self._trigramas[posicao] = None, frozenset()
+        self._livres.append(posicao)
+
+    def semelhantes(self, nome, limite=MAX_SEMELHANTES, limiar=LIMIAR_SEMELHANCA):
+        """
+        Até 'limite' autores com semelhança >= 'limiar' a 'nome', do mais para o
+        menos parecido: lista de (id_autor, nome, semelhanca).
+
+        Com |T| trigramas no nome procurado, Jaccard >= limiar exige pelo menos
+        limiar * |T| trigramas em comum; só os autores que alcançam esse mínimo
+        somando os trigramas raros (Counter) e os frequentes (_ContadorDeBits)
+        têm a semelhança calculada.
+        """
+        consulta = trigramas(nome)
+        if not consulta or limite <= 0 or not self.nomes:
+            return []
+        tamanho = len(consulta)
+        minimo = max(1, math.ceil(limiar * tamanho))
+
+        raros = Counter()
+        frequentes = _ContadorDeBits()
+        quantos_frequentes = 0
+        for trigrama in consulta:
+            if trigrama in self._mapas:
+                frequentes.somar(self._mapas[trigrama])
+                quantos_frequentes += 1
+            elif trigrama in self._conjuntos:
+                raros.update(self._conjuntos[trigrama])
+
+        comuns_por_posicao = {}
+        contagem_frequentes = frequentes.contagens()
+        # Nem com todos os frequentes o autor chegaria ao mínimo: descarta sem ler as fatias
+        faltam = minimo - quantos_frequentes
+        for posicao, comuns in raros.items():
+            if comuns < faltam:
+                continue
+            comuns += contagem_frequentes(posicao)
+            if comuns >= minimo:
+                comuns_por_posicao[posicao] = comuns
+        # Quem não tem nenhum trigrama raro em comum precisa do mínimo só com os frequentes
+        for posicao in _posicoes(frequentes.pelo_menos(minimo)):
+            if posicao not in raros:
+                comuns_por_posicao[posicao] = contagem_frequentes(posicao)
+
+        encontrados = []
+        for posicao, comuns in comuns_por_posicao.items():
+            valor = comuns / (tamanho + len(self._trigramas[posicao]) - comuns)
+            if valor >= limiar:
+                encontrados.append((valor, self._ids[posicao]))
+        encontrados.sort(key=lambda item: (-item[0], self.nomes[item[1]]))
+        return [(id_autor, self.nomes[id_autor], valor) for valor, id_autor in encontrados[:limite]]
@@ -0,0 +1,202 @@
+"""
+Instrumentação das funções do módulo database.py.
+
+Para cada função decorada com @instrumentado são contabilizados: número de
+chamadas, erros, tempo total e máximo, um histograma de latência e o número de
+linhas retornadas. Com a captura de SQL ligada, as conexões do pool registram
+(via sqlite3.Connection.set_trace_callback) os comandos executados em cada
+chamada; chamadas mais lentas que o limite configurado são gravadas, junto com
+esses comandos, no log de consultas lentas.
+
+Tudo vem desligado: as métricas custam um pouco em cada chamada e a captura de
+SQL, um callback por comando. Ligue com database.configurar_instrumentacao (ou
+pelas opções --instrumentar/--capturar-sql e pela janela de estatísticas).
+"""
+import functools
+import re
+import threading
+import time
+from collections.abc import Sequence
+from datetime import datetime
+
+# Limites superiores (em ms) das faixas do histograma de latência; a última é "acima de"
+FAIXAS_HISTOGRAMA_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+MAX_SQL_POR_CHAMADA = 50  # Comandos SQL guardados por chamada (para o log de consultas lentas)
+MAX_COMANDOS_DISTINTOS = 500  # Limite de comandos distintos na contagem por comando
+_LITERAL_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_LITERAL_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+CONFIG_INSTRUMENTACAO = {
+    "ativo": False,
+    "capturar_sql": False,      # Usa set_trace_callback nas conexões do pool
+    "limite_lento_ms": 200.0,   # Chamadas acima disso vão para o log
+    "arquivo_log_lento": None,  # None desliga o log em arquivo (configurar_instrumentacao o põe ao lado do banco)
+}
+
+_metricas = {}  # nome da função -> dicionário de contadores
+_sql_executado = {}  # comando SQL normalizado (literais trocados por ?) -> número de execuções
+_trava = threading.Lock()
+_trava_log = threading.Lock()  # Só serializa as gravações no log (fora de _trava)
+_contexto_thread = threading.local()  # SQL da chamada em andamento e tempo acumulado em banco
+
+
+def _novas_metricas():
+    return {
+        "chamadas": 0,
+        "erros": 0,
+        "lentas": 0,
+        "tempo_total_s": 0.0,
+        "tempo_max_s": 0.0,
+        "linhas": 0,
+        "histograma": [0] * (len(FAIXAS_HISTOGRAMA_MS) + 1),
+    }
+
+
+def _contar_linhas(resultado):
+    """Linhas retornadas: tamanho de listas (e sequências como LivrosCompactos); 1 para uma linha (tupla)."""
+    if isinstance(resultado, Sequence) and not isinstance(resultado, (tuple, str, bytes)):
+        return len(resultado)
+    if isinstance(resultado, tuple) and resultado and all(
+            isinstance(valor, (int, float, str, bytes, type(None))) for valor in resultado):
+        return 1
+    return 0
+
+
+def _faixa_histograma(duracao_ms):
+    for indice, limite in enumerate(FAIXAS_HISTOGRAMA_MS):
+        if duracao_ms <= limite:
+            return indice
+    return len(FAIXAS_HISTOGRAMA_MS)
+
+
+def rastrear_sql(comando):
+    """
+    Callback para Connection.set_trace_callback: guarda o comando na chamada
+    instrumentada em andamento nesta thread e conta execuções por comando.
+    Comandos internos (de triggers e do FTS5, que o SQLite marca com "--") são ignorados.
+    """
+    if comando.startswith("--"):
+        return
+    pilha = getattr(_contexto_thread, "pilha_sql", None)
+    if pilha:
+        sql_da_chamada = pilha[-1]
+        if len(sql_da_chamada) < MAX_SQL_POR_CHAMADA:
+            sql_da_chamada.append(comando)
+    modelo = _normalizar_sql(comando)
+    with _trava:
+        if modelo in _sql_executado or len(_sql_executado) < MAX_COMANDOS_DISTINTOS:
+            _sql_executado[modelo] = _sql_executado.get(modelo, 0) + 1
+
+
+def _normalizar_sql(comando):
+    """
+    O SQLite entrega o comando com os parâmetros já substituídos; para contar por
+    comando, os literais voltam a ser '?' e os espaços são compactados.
+    """
+    comando = _LITERAL_TEXTO.sub("?", comando)
+    comando = _LITERAL_NUMERO.sub("?", comando)
+    return " ".join(comando.split())
+
+
+def instrumentado(funcao):
+    """Decorador que registra as métricas de cada chamada de 'funcao'."""
+    nome = funcao.__name__
+
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        if not CONFIG_INSTRUMENTACAO["ativo"]:
+            return funcao(*args, **kwargs)
+
+        # Pilha porque funções instrumentadas chamam outras (ex.: listar_autores -> conectar_db)
+        pilha = getattr(_contexto_thread, "pilha_sql", None)
+        if pilha is None:
+            pilha = _contexto_thread.pilha_sql = []
+        pilha.append([])
+        erro = False
+        resultado = None
+        inicio = time.perf_counter()
+        try:
+            resultado = funcao(*args, **kwargs)
+            return resultado
+        except Exception:
+            erro = True
+            raise
+        finally:
+            duracao = time.perf_counter() - inicio
+            sql_da_chamada = pilha.pop()
+            if not pilha: # Só a chamada mais externa conta como tempo gasto em banco
+                _contexto_thread.tempo_banco_s = getattr(_contexto_thread, "tempo_banco_s", 0.0) + duracao
+            _registrar(nome, duracao, erro, resultado, sql_da_chamada)
+
+    return envoltorio
+
+
+def _registrar(nome, duracao, erro, resultado, sql_da_chamada):
+    duracao_ms = duracao * 1000
+    lenta = duracao_ms >= CONFIG_INSTRUMENTACAO["limite_lento_ms"]
+    with _trava:
+        metricas = _metricas.get(nome)
+        if metricas is None:
+            metricas = _metricas[nome] = _novas_metricas()
+        metricas["chamadas"] += 1
+        metricas["erros"] += erro
+        metricas["lentas"] += lenta
+        metricas["tempo_total_s"] += duracao
+        metricas["tempo_max_s"] = max(metricas["tempo_max_s"], duracao)
+        metricas["linhas"] += _contar_linhas(resultado)
+        metricas["histograma"][_faixa_histograma(duracao_ms)] += 1
+    if lenta:
+        _registrar_consulta_lenta(nome, duracao_ms, sql_da_chamada)
+
+
+def _registrar_consulta_lenta(nome, duracao_ms, sql_da_chamada):
+    caminho = CONFIG_INSTRUMENTACAO["arquivo_log_lento"]
+    if not caminho:
+        return
+    linhas = [f"{datetime.now().isoformat(timespec='milliseconds')} {nome} {duracao_ms:.1f} ms "
+              f"[{threading.current_thread().name}]"]
+    linhas.extend("    " + " ".join(comando.split()) for comando in sql_da_chamada)
+    try:
+        with _trava_log, open(caminho, "a", encoding="utf-8") as arquivo:
+            arquivo.write("\n".join(linhas) + "\n")
+    except OSError as e:
+        print(f"Erro ao gravar o log de consultas lentas: {e}")
+
+
+def tempo_banco_thread():
+    """Tempo total (s) gasto em funções instrumentadas pela thread atual desde o início."""
+    return getattr(_contexto_thread, "tempo_banco_s", 0.0)
+
+
+def estatisticas(max_comandos_sql=10):
+    """
+    Retorna um retrato das métricas: {"funcoes": {nome: {...}}, "sql_mais_executado": [...]}.
+    Cada função traz chamadas, erros, lentas, media_ms, max_ms, linhas e o
+    histograma como {"<= 1 ms": n, ..., "> 1000 ms": n}.
+    """
+    rotulos = [f"<= {limite} ms" for limite in FAIXAS_HISTOGRAMA_MS] + [f"> {FAIXAS_HISTOGRAMA_MS[-1]} ms"]
+    with _trava:
+        funcoes = {}
+        for nome, metricas in _metricas.items():
+            chamadas = metricas["chamadas"]
+            funcoes[nome] = {
+                "chamadas": chamadas,
+                "erros": metricas["erros"],
+                "lentas": metricas["lentas"],
+                "media_ms": metricas["tempo_total_s"] * 1000 / chamadas if chamadas else 0.0,
+                "max_ms": metricas["tempo_max_s"] * 1000,
+                "linhas": metricas["linhas"],
+                "histograma": dict(zip(rotulos, metricas["histograma"])),
+            }
+        mais_executados = sorted(_sql_executado.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "funcoes": funcoes,
+        "sql_mais_executado": mais_executados[:max_comandos_sql],
+    }
+
+
+def zerar_estatisticas():
+    """Descarta todas as métricas acumuladas."""
+    with _trava:
+        _metricas.clear()
+        _sql_executado.clear()
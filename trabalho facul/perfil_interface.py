@@ -0,0 +1,290 @@
+"""
+Perfil de latência da interface Tkinter (modo opcional: app_biblioteca.py --perfilar).
+
+Enquanto o perfil está ligado, todo callback que o Tk chama no Python (comandos
+de botões e menus, eventos ligados com bind, protocolos da janela e callbacks
+de after) passa por PerfilInterface.medir, que separa o tempo de cada handler em:
+
+- banco: tempo em funções instrumentadas do database.py chamadas na própria
+  thread da interface (instrumentacao.tempo_banco_thread);
+- diálogos: espera dentro de um laço de eventos aninhado (messagebox, janelas
+  modais), percebida porque o batimento continua rodando durante o handler;
+- interface: o resto, ou seja, trabalho com widgets e código Python.
+
+Esses três tempos são os do próprio handler: os handlers chamados dentro dele
+(ex.: as respostas despachadas por ExecutorBanco._verificar_respostas) são
+contados à parte. As respostas do ExecutorBanco aparecem como "resposta: ...", e
+as operações que ele roda na thread de banco têm uma tabela própria (espera na
+fila, execução e tempo em banco).
+
+Um batimento (after a cada INTERVALO_BATIMENTO_MS) mede o atraso com que o laço de
+eventos o executa; atrasos acima do limite são registrados como travamentos, com
+o handler que mais tempo ocupou a interface desde o batimento anterior.
+"""
+import collections
+import threading
+import time
+import tkinter as tk
+
+import instrumentacao
+
+INTERVALO_BATIMENTO_MS = 20  # Frequência do batimento que detecta travamentos
+LIMITE_TRAVAMENTO_MS = 100   # Atraso do batimento a partir do qual a interface é considerada travada
+MAX_AMOSTRAS = 5000          # Durações guardadas por handler (as mais recentes) para o p95
+MAX_TRAVAMENTOS = 1000       # Travamentos guardados com detalhes
+TRAVAMENTOS_NO_RELATORIO = 10
+
+
+def _nome_callback(funcao):
+    """Nome legível de um callback: 'LivrosFrame._adicionar_livro', 'after: ...', lambdas com a linha."""
+    prefixo = ""
+    codigo = getattr(funcao, "__code__", None)
+    if codigo is not None and codigo.co_name == "callit" and "func" in codigo.co_freevars:
+        # Callback de after(): o Tk registra uma função interna que chama a original
+        prefixo = "after: "
+        funcao = funcao.__closure__[codigo.co_freevars.index("func")].cell_contents
+    nome = getattr(funcao, "__qualname__", None) or type(funcao).__name__
+    if nome.endswith("<lambda>"):
+        codigo = getattr(getattr(funcao, "__func__", funcao), "__code__", None)
+        nome = nome.replace(".<locals>.", "/") + (f":{codigo.co_firstlineno}" if codigo else "")
+    return prefixo + nome
+
+
+def _percentil(ordenadas, p):
+    return ordenadas[min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))] * 1000
+
+
+class _ChamadaMedida(tk.CallWrapper):
+    """CallWrapper do tkinter que mede cada chamada no perfil."""
+
+    def __init__(self, perfil, func, subst, widget):
+        super().__init__(func, subst, widget)
+        self.perfil = perfil
+        self.nome = None # Calculado na primeira chamada
+
+    def __call__(self, *args):
+        if self.nome is None:
+            self.nome = _nome_callback(self.func)
+        return self.perfil.medir(self.nome, super().__call__, *args)
+
+
+class PerfilInterface:
+    """
+    Mede os handlers da interface e detecta travamentos do laço de eventos.
+    Deve ser iniciado antes de os widgets serem criados: só os callbacks
+    registrados no Tk depois de iniciar() são medidos.
+    """
+
+    def __init__(self, raiz_tk, limite_travamento_ms=LIMITE_TRAVAMENTO_MS,
+                 intervalo_batimento_ms=INTERVALO_BATIMENTO_MS):
+        self.raiz = raiz_tk
+        self.limite_travamento_ms = limite_travamento_ms
+        self.intervalo_batimento_ms = intervalo_batimento_ms
+        self.ativo = False
+        self._callwrapper_original = None
+        self._id_batimento = None
+        self._inicio = None
+        self._duracao_total_s = None
+
+        self._handlers = {} # nome -> contadores (só alterado na thread da interface)
+        self._pilha = []    # Handlers em andamento (um handler pode rodar dentro de outro)
+        self._ultimo_batimento = None
+        self._maior_desde_batimento = (0.0, None) # (tempo próprio, nome) desde o último batimento
+        self._travamentos = []
+        self._contagem_travamentos = 0
+        self._tempo_travado_s = 0.0
+
+        self._segundo_plano = {} # nome -> contadores das operações da thread de banco
+        self._trava = threading.Lock()
+
+    # --- Ligar e desligar ---
+    def iniciar(self):
+        """Passa a medir os callbacks registrados daqui em diante e inicia o batimento."""
+        if self.ativo:
+            return
+        self.ativo = True
+        self._inicio = time.perf_counter()
+        self._callwrapper_original = tk.CallWrapper
+        tk.CallWrapper = self._embrulhar # Usado por Misc._register para todo callback novo
+        self._ultimo_batimento = time.perf_counter()
+        self._id_batimento = self.raiz.after(self.intervalo_batimento_ms, self._batimento)
+
+    def parar(self):
+        """Desliga as medições (os callbacks já registrados voltam a só repassar a chamada)."""
+        if not self.ativo:
+            return
+        self.ativo = False
+        self._duracao_total_s = time.perf_counter() - self._inicio
+        tk.CallWrapper = self._callwrapper_original
+        try:
+            self.raiz.after_cancel(self._id_batimento)
+        except tk.TclError:
+            pass # A janela já foi destruída
+
+    def _embrulhar(self, func, subst, widget):
+        codigo = getattr(func, "__code__", None)
+        if codigo is not None and codigo.co_name == "callit" and "func" in codigo.co_freevars:
+            original = func.__closure__[codigo.co_freevars.index("func")].cell_contents
+            if getattr(original, "__self__", None) is self: # O próprio batimento não entra no perfil
+                return self._callwrapper_original(func, subst, widget)
+        return _ChamadaMedida(self, func, subst, widget)
+
+    # --- Medição ---
+    def medir(self, nome, funcao, *args):
+        """Chama funcao(*args) na thread da interface, contabilizando o tempo em 'nome'."""
+        if not self.ativo:
+            return funcao(*args)
+        quadro = {"inicio": time.perf_counter(), "filhos_s": 0.0, "filhos_banco_s": 0.0, "dialogos_s": 0.0}
+        banco_antes = instrumentacao.tempo_banco_thread()
+        self._pilha.append(quadro)
+        try:
+            return funcao(*args)
+        finally:
+            self._pilha.pop()
+            duracao = time.perf_counter() - quadro["inicio"]
+            banco = instrumentacao.tempo_banco_thread() - banco_antes
+            if self._pilha: # O handler de fora não conta este tempo como seu
+                self._pilha[-1]["filhos_s"] += duracao
+                self._pilha[-1]["filhos_banco_s"] += banco
+            self._registrar(nome, duracao, banco - quadro["filhos_banco_s"],
+                            quadro["dialogos_s"], duracao - quadro["filhos_s"])
+
+    def medir_resposta(self, callback, valor):
+        """Chama um callback do ExecutorBanco (ao_concluir/ao_falhar) medindo-o como 'resposta: ...'."""
+        return self.medir(f"resposta: {_nome_callback(callback)}", callback, valor)
+
+    def _registrar(self, nome, duracao, banco, dialogos, proprio):
+        metricas = self._handlers.get(nome)
+        if metricas is None:
+            metricas = self._handlers[nome] = {
+                "chamadas": 0, "tempo_total_s": 0.0, "tempo_max_s": 0.0, "banco_s": 0.0,
+                "interface_s": 0.0, "dialogos_s": 0.0, "amostras": collections.deque(maxlen=MAX_AMOSTRAS),
+            }
+        metricas["chamadas"] += 1
+        metricas["tempo_total_s"] += duracao
+        metricas["tempo_max_s"] = max(metricas["tempo_max_s"], duracao)
+        metricas["banco_s"] += banco
+        metricas["dialogos_s"] += dialogos
+        metricas["interface_s"] += max(0.0, proprio - banco - dialogos)
+        metricas["amostras"].append(duracao)
+        ocupado = proprio - dialogos # Tempo em que este handler segurou o laço de eventos
+        if ocupado > self._maior_desde_batimento[0]:
+            self._maior_desde_batimento = (ocupado, nome)
+
+    def registrar_segundo_plano(self, funcao, espera_s, execucao_s, banco_s):
+        """Chamado pelo ExecutorBanco, na thread de banco, ao terminar cada pedido."""
+        if not self.ativo:
+            return
+        nome = _nome_callback(funcao)
+        with self._trava:
+            metricas = self._segundo_plano.get(nome)
+            if metricas is None:
+                metricas = self._segundo_plano[nome] = {
+                    "pedidos": 0, "espera_s": 0.0, "execucao_s": 0.0, "execucao_max_s": 0.0, "banco_s": 0.0}
+            metricas["pedidos"] += 1
+            metricas["espera_s"] += espera_s
+            metricas["execucao_s"] += execucao_s
+            metricas["execucao_max_s"] = max(metricas["execucao_max_s"], execucao_s)
+            metricas["banco_s"] += banco_s
+
+    def _batimento(self):
+        """Roda a cada intervalo_batimento_ms; um atraso grande indica que o laço de eventos travou."""
+        agora = time.perf_counter()
+        atraso = agora - self._ultimo_batimento - self.intervalo_batimento_ms / 1000
+        if self._pilha:
+            # Batimento durante um handler: ele abriu um laço de eventos aninhado (diálogo modal)
+            quadro = self._pilha[-1]
+            quadro["dialogos_s"] += agora - max(self._ultimo_batimento, quadro["inicio"])
+        if atraso * 1000 >= self.limite_travamento_ms:
+            ocupado, nome = self._maior_desde_batimento
+            self._contagem_travamentos += 1
+            self._tempo_travado_s += atraso
+            if len(self._travamentos) < MAX_TRAVAMENTOS:
+                self._travamentos.append({
+                    "instante_s": self._ultimo_batimento - self._inicio,
+                    "atraso_ms": atraso * 1000,
+                    "handler": nome or "(fora dos handlers: desenho e layout do Tk)",
+                    "handler_ms": ocupado * 1000,
+                })
+        self._maior_desde_batimento = (0.0, None)
+        self._ultimo_batimento = agora
+        if self.ativo:
+            self._id_batimento = self.raiz.after(self.intervalo_batimento_ms, self._batimento)
+
+    # --- Resultados ---
+    def estatisticas(self):
+        """
+        Retorna {"handlers": {nome: {...}}, "segundo_plano": {nome: {...}}, "travamentos": {...}}.
+        Cada handler traz chamadas, total_ms, media_ms, p95_ms, max_ms, banco_ms,
+        interface_ms e dialogos_ms (estes três são o tempo próprio do handler).
+        """
+        handlers = {}
+        for nome, metricas in self._handlers.items():
+            ordenadas = sorted(metricas["amostras"])
+            handlers[nome] = {
+                "chamadas": metricas["chamadas"],
+                "total_ms": metricas["tempo_total_s"] * 1000,
+                "media_ms": metricas["tempo_total_s"] * 1000 / metricas["chamadas"],
+                "p95_ms": _percentil(ordenadas, 95),
+                "max_ms": metricas["tempo_max_s"] * 1000,
+                "banco_ms": metricas["banco_s"] * 1000,
+                "interface_ms": metricas["interface_s"] * 1000,
+                "dialogos_ms": metricas["dialogos_s"] * 1000,
+            }
+        with self._trava:
+            segundo_plano = {
+                nome: {
+                    "pedidos": metricas["pedidos"],
+                    "espera_media_ms": metricas["espera_s"] * 1000 / metricas["pedidos"],
+                    "execucao_media_ms": metricas["execucao_s"] * 1000 / metricas["pedidos"],
+                    "execucao_max_ms": metricas["execucao_max_s"] * 1000,
+                    "banco_ms": metricas["banco_s"] * 1000,
+                }
+                for nome, metricas in self._segundo_plano.items()
+            }
+        duracao = self._duracao_total_s if self._duracao_total_s is not None else time.perf_counter() - self._inicio
+        return {
+            "duracao_s": duracao,
+            "handlers": handlers,
+            "segundo_plano": segundo_plano,
+            "travamentos": {
+                "limite_ms": self.limite_travamento_ms,
+                "quantidade": self._contagem_travamentos,
+                "tempo_travado_ms": self._tempo_travado_s * 1000,
+                "maiores": sorted(self._travamentos, key=lambda t: t["atraso_ms"], reverse=True)[:TRAVAMENTOS_NO_RELATORIO],
+            },
+        }
+
+    def relatorio(self):
+        """Texto do relatório por handler, impresso ao fechar a aplicação."""
+        dados = self.estatisticas()
+        linhas = [f"Perfil da interface ({dados['duracao_s']:.1f} s)",
+                  f"  {'handler':58} {'chamadas':>8} {'total ms':>10} {'média':>8} {'p95':>8} {'máx':>8} "
+                  f"{'banco':>9} {'interface':>10} {'diálogos':>10}"]
+        for nome, h in sorted(dados["handlers"].items(), key=lambda item: item[1]["total_ms"], reverse=True):
+            linhas.append(f"  {nome[-58:]:58} {h['chamadas']:>8} {h['total_ms']:>10.1f} {h['media_ms']:>8.2f} "
+                          f"{h['p95_ms']:>8.2f} {h['max_ms']:>8.2f} {h['banco_ms']:>9.1f} "
+                          f"{h['interface_ms']:>10.1f} {h['dialogos_ms']:>10.1f}")
+        if dados["segundo_plano"]:
+            linhas.append("")
+            linhas.append(f"  {'operação na thread de banco':58} {'pedidos':>8} {'fila ms':>10} "
+                          f"{'execução':>9} {'máx':>8} {'banco ms':>10}")
+            for nome, op in sorted(dados["segundo_plano"].items(),
+                                   key=lambda item: item[1]["execucao_media_ms"] * item[1]["pedidos"], reverse=True):
+                linhas.append(f"  {nome[-58:]:58} {op['pedidos']:>8} {op['espera_media_ms']:>10.2f} "
+                              f"{op['execucao_media_ms']:>9.2f} {op['execucao_max_ms']:>8.2f} {op['banco_ms']:>10.1f}")
+        travamentos = dados["travamentos"]
+        linhas.append("")
+        linhas.append(f"  Travamentos (batimento atrasado >= {travamentos['limite_ms']} ms): "
+                      f"{travamentos['quantidade']}, {travamentos['tempo_travado_ms']:.0f} ms no total")
+        for t in travamentos["maiores"]:
+            linhas.append(f"    {t['instante_s']:8.1f} s  {t['atraso_ms']:7.0f} ms  {t['handler']} "
+                          f"({t['handler_ms']:.0f} ms)")
+        return "\n".join(linhas)
+
+    def encerrar(self):
+        """Desliga o perfil e imprime o relatório."""
+        if not self.ativo: # Nunca iniciado ou já encerrado
+            return
+        self.parar()
+        print(self.relatorio())
@@ -0,0 +1,153 @@
+"""
+Seleção de autor por digitação (type-ahead) para o formulário de livros.
+
+Com dezenas de milhares de autores, um Combobox com todos os nomes demora a
+abrir e é impossível de percorrer. Aqui os nomes ficam num índice ordenado em
+memória e, a cada tecla, só as primeiras sugestões que começam com o texto
+digitado (em qualquer palavra do nome, sem diferenciar maiúsculas nem acentos)
+são mostradas.
+"""
+import bisect
+import tkinter as tk
+from tkinter import ttk
+
+from indice_trigramas import normalizar  # Mesma normalização da busca por semelhança
+
+MAX_SUGESTOES = 20  # Sugestões exibidas por tecla
+
+
+class IndicePrefixoAutores:
+    """
+    Índice de busca por prefixo sobre os nomes dos autores.
+
+    Cada nome entra uma vez para cada palavra, com a chave normalizada a partir
+    daquela palavra ("machado de assis", "de assis", "assis"); as chaves ficam
+    numa lista ordenada e a busca é um bisect seguido da leitura das chaves que
+    começam com o prefixo: O(log n + limite), sem percorrer todos os autores.
+    """
+
+    def __init__(self, autores, por_nome=None):
+        # por_nome pode ser o mapa do cache de autores (db.mapa_autores_por_nome), que é somente leitura
+        self.por_nome = por_nome if por_nome is not None else {nome: id_autor for id_autor, nome in autores}
+        entradas = []
+        for _id_autor, nome in autores:
+            chave = normalizar(nome)
+            inicio = 0
+            for palavra in chave.split():
+                inicio = chave.index(palavra, inicio)
+                entradas.append((chave[inicio:], nome))
+                inicio += len(palavra)
+        entradas.sort()
+        self.chaves = [chave for chave, _nome in entradas]
+        self.nomes = [nome for _chave, nome in entradas]
+
+    def __len__(self):
+        return len(self.por_nome)
+
+    def buscar(self, prefixo, limite=MAX_SUGESTOES):
+        """Até 'limite' nomes com alguma palavra começando por 'prefixo' (sem repetir nomes)."""
+        prefixo = normalizar(prefixo).strip()
+        if not prefixo:
+            return []
+        encontrados = {} # dict mantém a ordem e descarta o mesmo nome achado por outra palavra
+        posicao = bisect.bisect_left(self.chaves, prefixo)
+        while posicao < len(self.chaves) and len(encontrados) < limite:
+            if not self.chaves[posicao].startswith(prefixo):
+                break
+            encontrados[self.nomes[posicao]] = None
+            posicao += 1
+        return list(encontrados)
+
+    def id_do_autor(self, nome):
+        """ID do autor com exatamente esse nome, ou None (consulta O(1) no dicionário)."""
+        return self.por_nome.get(nome)
+
+
+class SeletorAutores(ttk.Frame):
+    """
+    Campo de texto com lista de sugestões logo abaixo. Setas/Enter/clique escolhem
+    uma sugestão; o nome escolhido fica na 'textvariable' informada.
+    """
+    ATRASO_OCULTAR_MS = 150  # Dá tempo de um clique na lista chegar antes de ela sumir
+
+    def __init__(self, parent, textvariable, max_sugestoes=MAX_SUGESTOES, width=50):
+        super().__init__(parent)
+        self.texto_var = textvariable
+        self.max_sugestoes = max_sugestoes
+        self.indice = IndicePrefixoAutores([])
+
+        self.entry = ttk.Entry(self, textvariable=self.texto_var, width=width)
+        self.entry.pack(fill="x")
+        self.lista_sugestoes = tk.Listbox(self, height=8, exportselection=False)
+
+        self.texto_var.trace_add("write", self._ao_digitar)
+        self.entry.bind("<Down>", self._ir_para_sugestoes)
+        self.entry.bind("<Return>", lambda _e: self._escolher_sugestao(0))
+        self.entry.bind("<Escape>", lambda _e: self._ocultar_sugestoes())
+        self.entry.bind("<FocusOut>", self._ao_perder_foco)
+        self.lista_sugestoes.bind("<ButtonRelease-1>", lambda _e: self._escolher_sugestao_marcada())
+        self.lista_sugestoes.bind("<Return>", lambda _e: self._escolher_sugestao_marcada())
+        self.lista_sugestoes.bind("<Escape>", lambda _e: (self._ocultar_sugestoes(), self.entry.focus_set()))
+        self.lista_sugestoes.bind("<FocusOut>", self._ao_perder_foco)
+
+    def definir_indice(self, indice):
+        self.indice = indice
+        self._ao_digitar()
+
+    def id_selecionado(self):
+        """ID do autor cujo nome está no campo, ou None se não houver autor com esse nome."""
+        return self.indice.id_do_autor(self.texto_var.get().strip())
+
+    def limpar(self):
+        self.texto_var.set("")
+        self._ocultar_sugestoes()
+
+    def _ao_digitar(self, *_args):
+        # Só sugere enquanto o usuário digita: nomes preenchidos pelo programa
+        # (ex.: ao selecionar um livro na lista) não abrem a lista.
+        if self.focus_get() is not self.entry:
+            self._ocultar_sugestoes()
+            return
+        texto = self.texto_var.get()
+        sugestoes = self.indice.buscar(texto, self.max_sugestoes)
+        if not sugestoes or sugestoes == [texto.strip()]:
+            self._ocultar_sugestoes()
+            return
+        self.lista_sugestoes.delete(0, "end")
+        self.lista_sugestoes.insert("end", *sugestoes)
+        self.lista_sugestoes.config(height=min(len(sugestoes), 8))
+        if not self.lista_sugestoes.winfo_ismapped():
+            self.lista_sugestoes.pack(fill="x")
+
+    def _ocultar_sugestoes(self):
+        if self.lista_sugestoes.winfo_ismapped():
+            self.lista_sugestoes.pack_forget()
+
+    def _ir_para_sugestoes(self, _event):
+        if self.lista_sugestoes.winfo_ismapped():
+            self.lista_sugestoes.focus_set()
+            self.lista_sugestoes.selection_clear(0, "end")
+            self.lista_sugestoes.selection_set(0)
+            self.lista_sugestoes.activate(0)
+        return "break"
+
+    def _escolher_sugestao_marcada(self):
+        marcadas = self.lista_sugestoes.curselection()
+        if marcadas:
+            self._escolher_sugestao(marcadas[0])
+
+    def _escolher_sugestao(self, posicao):
+        if not self.lista_sugestoes.winfo_ismapped() or posicao >= self.lista_sugestoes.size():
+            return
+        nome = self.lista_sugestoes.get(posicao)
+        self._ocultar_sugestoes()
+        self.entry.focus_set()
+        self.texto_var.set(nome) # Nome exato: _ao_digitar não reabre a lista
+        self.entry.icursor("end")
+
+    def _ao_perder_foco(self, _event):
+        self.after(self.ATRASO_OCULTAR_MS, self._ocultar_se_sem_foco)
+
+    def _ocultar_se_sem_foco(self):
+        if self.winfo_exists() and self.focus_get() not in (self.entry, self.lista_sugestoes):
+            self._ocultar_sugestoes()
@@ -0,0 +1,455 @@
+"""
+Servidor HTTP/JSON (sem interface gráfica) sobre o módulo database.py.
+
+Vários clientes podem usar a biblioteca ao mesmo tempo sem abrir o arquivo do
+banco diretamente: as requisições são atendidas por um conjunto fixo de threads
+(cada uma com sua conexão do pool do database.py) e as inclusões que chegam ao
+mesmo tempo são gravadas juntas, numa única transação.
+
+Rotas (corpos e respostas em JSON):
+    GET    /autores?apos=NOME&limite=N          -> {"itens": [...], "proximo": {...} | null}
+    GET    /autores/ID
+    POST   /autores          {"nome": ...}      -> 201 {"id_autor": ...}
+    PUT    /autores/ID       {"nome": ...}
+    DELETE /autores/ID
+    GET    /livros?apos_titulo=T&apos_id=ID&limite=N
+    GET    /livros?busca=TEXTO&limite=N
+    GET    /livros/ID
+    POST   /livros           {"titulo": ..., "id_autor": ...} -> 201 {"id_livro": ...}
+    PUT    /livros/ID        {"titulo": ..., "id_autor": ...}
+    DELETE /livros/ID
+    GET    /estatisticas                          -> métricas do banco e totais do catálogo
+
+Uso:
+    python servidor.py [--host 127.0.0.1] [--porta 8080] [--threads 8] [--banco ARQUIVO]
+                       [--janela-lote MS] [--concorrente] [--espelho] [--instrumentar [--capturar-sql]]
+
+Com --espelho as leituras são atendidas por uma cópia do banco em memória
+(database.ativar_espelho); as escritas vão para o arquivo e são levadas ao
+espelho logo em seguida, e as de outros processos a cada INTERVALO_MUDANCAS s.
+Com --instrumentar, GET /estatisticas passa a trazer as métricas por função.
+"""
+import argparse
+import json
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import database as db
+
+LIMITE_MAXIMO_PAGINA = 1000  # Maior 'limite' aceito nas listagens
+INTERVALO_MUDANCAS = 1.0  # Segundos entre verificações de mudanças de outros processos (com --espelho)
+MAX_LOTE_ESCRITAS = 500  # Inclusões gravadas por transação pelo agrupador
+TEMPO_OCIOSO_CONEXAO_S = 15  # Conexões keep-alive ociosas são fechadas, liberando a thread
+
+
+class ErroRequisicao(Exception):
+    """Erro que vira uma resposta HTTP com o status e a mensagem indicados."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+# --- Agrupamento de escritas ---
+
+class AgrupadorEscritas:
+    """
+    Grava as inclusões de autores e livros em lotes. As threads das requisições
+    enfileiram o pedido e esperam; uma thread própria junta tudo o que estiver na
+    fila (mais o que chegar durante 'janela_ms') e grava numa única transação.
+    Com pouca carga cada lote tem um pedido só; sob carga, um commit atende muitos.
+    """
+
+    def __init__(self, janela_ms=0.0, max_lote=MAX_LOTE_ESCRITAS):
+        self.janela_s = janela_ms / 1000
+        self.max_lote = max_lote
+        self.fila = queue.Queue()
+        self.trava = threading.Lock()
+        self.estatisticas = {"lotes": 0, "escritas": 0, "maior_lote": 0}
+        self.thread = threading.Thread(target=self._gravar_lotes, name="AgrupadorEscritas", daemon=True)
+        self.thread.start()
+
+    def adicionar_autor(self, nome):
+        """Mesmo contrato de db.adicionar_autor (id ou None), mas gravado em lote."""
+        return self._enfileirar("autor", nome)
+
+    def adicionar_livro(self, titulo, id_autor):
+        """Mesmo contrato de db.adicionar_livro (id ou None), mas gravado em lote."""
+        return self._enfileirar("livro", (titulo, id_autor))
+
+    def _enfileirar(self, tipo, dados):
+        futuro = Future()
+        self.fila.put((tipo, dados, futuro))
+        return futuro.result()
+
+    def _gravar_lotes(self):
+        """Laço da thread do agrupador."""
+        while True:
+            pedido = self.fila.get()
+            if pedido is None: # Sinal de encerramento
+                return
+            lote = [pedido]
+            prazo = time.perf_counter() + self.janela_s
+            encerrar = False
+            while len(lote) < self.max_lote:
+                try:
+                    restante = prazo - time.perf_counter()
+                    pedido = self.fila.get(timeout=restante) if restante > 0 else self.fila.get_nowait()
+                except queue.Empty:
+                    break
+                if pedido is None:
+                    encerrar = True
+                    break
+                lote.append(pedido)
+            self._gravar(lote)
+            if encerrar:
+                return
+
+    def _gravar(self, lote):
+        for tipo, funcao in (("autor", db.adicionar_autores_com_ids), ("livro", db.adicionar_livros_com_ids)):
+            pedidos = [(dados, futuro) for tipo_pedido, dados, futuro in lote if tipo_pedido == tipo]
+            if not pedidos:
+                continue
+            try:
+                ids = funcao([dados for dados, _futuro in pedidos])
+            except Exception as e: # Ex.: BancoOcupadoError; cada requisição do lote recebe o erro
+                for _dados, futuro in pedidos:
+                    futuro.set_exception(e)
+                continue
+            for (_dados, futuro), novo_id in zip(pedidos, ids):
+                futuro.set_result(novo_id)
+        with self.trava:
+            self.estatisticas["lotes"] += 1
+            self.estatisticas["escritas"] += len(lote)
+            self.estatisticas["maior_lote"] = max(self.estatisticas["maior_lote"], len(lote))
+
+    def retrato(self):
+        with self.trava:
+            return dict(self.estatisticas)
+
+    def encerrar(self, tempo_limite=5.0):
+        """Grava o que ainda estiver na fila e para a thread do agrupador."""
+        self.fila.put(None)
+        self.thread.join(tempo_limite)
+
+
+# --- Validação dos parâmetros ---
+
+def _inteiro(valor, nome, padrao=None, minimo=None, maximo=None):
+    if valor is None:
+        if padrao is None:
+            raise ErroRequisicao(400, f"'{nome}' é obrigatório")
+        return padrao
+    if isinstance(valor, bool):
+        raise ErroRequisicao(400, f"'{nome}' deve ser um número inteiro")
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError):
+        raise ErroRequisicao(400, f"'{nome}' deve ser um número inteiro") from None
+    if minimo is not None and numero < minimo:
+        raise ErroRequisicao(400, f"'{nome}' deve ser no mínimo {minimo}")
+    if maximo is not None and numero > maximo:
+        raise ErroRequisicao(400, f"'{nome}' deve ser no máximo {maximo}")
+    return numero
+
+
+def _texto_obrigatorio(corpo, nome):
+    valor = corpo.get(nome)
+    if not isinstance(valor, str) or not valor.strip():
+        raise ErroRequisicao(400, f"'{nome}' é obrigatório")
+    return valor.strip()
+
+
+def _limite(consulta, padrao=db.TAMANHO_PAGINA):
+    return _inteiro(consulta.get("limite"), "limite", padrao, minimo=1, maximo=LIMITE_MAXIMO_PAGINA)
+
+
+def _autor_json(autor):
+    id_autor, nome = autor
+    return {"id_autor": id_autor, "nome": nome}
+
+
+def _livro_json(livro):
+    id_livro, titulo, nome_autor, id_autor = livro
+    return {"id_livro": id_livro, "titulo": titulo, "nome_autor": nome_autor, "id_autor": id_autor}
+
+
+# --- Rotas ---
+
+def listar_autores(servidor, consulta, corpo):
+    """Página de autores em ordem de nome; 'apos' é o nome do último autor da página anterior."""
+    limite = _limite(consulta)
+    apos = (consulta["apos"],) if consulta.get("apos") is not None else None
+    # Consulta por chave no índice de nome (UNIQUE), com uma linha a mais para saber se há próxima página
+    autores = db.consultar_autores(apos=apos, limite=limite + 1)
+    pagina = autores[:limite]
+    proximo = {"apos": pagina[-1][1]} if len(autores) > limite else None
+    return 200, {"itens": [_autor_json(autor) for autor in pagina], "proximo": proximo}
+
+
+def obter_autor(servidor, consulta, corpo, id_autor):
+    autor = db.buscar_autor_por_id(id_autor)
+    if autor is None:
+        raise ErroRequisicao(404, f"autor {id_autor} não encontrado")
+    return 200, _autor_json(autor)
+
+
+def criar_autor(servidor, consulta, corpo):
+    nome = _texto_obrigatorio(corpo, "nome")
+    id_autor = servidor.agrupador.adicionar_autor(nome)
+    if id_autor is None:
+        raise ErroRequisicao(409, f"o autor '{nome}' já está cadastrado")
+    return 201, {"id_autor": id_autor, "nome": nome}
+
+
+def alterar_autor(servidor, consulta, corpo, id_autor):
+    nome = _texto_obrigatorio(corpo, "nome")
+    if not db.atualizar_autor(id_autor, nome):
+        if db.buscar_autor_por_id(id_autor) is None:
+            raise ErroRequisicao(404, f"autor {id_autor} não encontrado")
+        raise ErroRequisicao(409, f"já existe outro autor chamado '{nome}'")
+    return 200, {"id_autor": id_autor, "nome": nome}
+
+
+def remover_autor(servidor, consulta, corpo, id_autor):
+    if not db.deletar_autor(id_autor):
+        if db.buscar_autor_por_id(id_autor) is None:
+            raise ErroRequisicao(404, f"autor {id_autor} não encontrado")
+        raise ErroRequisicao(409, f"o autor {id_autor} possui livros cadastrados")
+    return 200, {"id_autor": id_autor}
+
+
+def listar_livros(servidor, consulta, corpo):
+    """
+    Página de livros em ordem de título (paginação por chave: 'apos_titulo' e
+    'apos_id' vêm do 'proximo' da página anterior) ou, com 'busca', os mais relevantes.
+    """
+    limite = _limite(consulta)
+    if consulta.get("busca") is not None:
+        livros = db.buscar_livros(consulta["busca"], limite)
+        return 200, {"itens": [_livro_json(livro) for livro in livros], "proximo": None}
+
+    apos = None
+    if consulta.get("apos_titulo") is not None or consulta.get("apos_id") is not None:
+        if consulta.get("apos_titulo") is None:
+            raise ErroRequisicao(400, "'apos_titulo' é obrigatório junto com 'apos_id'")
+        apos = (consulta["apos_titulo"], _inteiro(consulta.get("apos_id"), "apos_id"))
+    livros = db.listar_livros_pagina(apos, limite)
+    proximo = None
+    if len(livros) == limite:
+        proximo = {"apos_titulo": livros[-1][1], "apos_id": livros[-1][0]}
+    return 200, {"itens": [_livro_json(livro) for livro in livros], "proximo": proximo}
+
+
+def obter_livro(servidor, consulta, corpo, id_livro):
+    livro = db.buscar_livro_por_id(id_livro)
+    if livro is None:
+        raise ErroRequisicao(404, f"livro {id_livro} não encontrado")
+    return 200, _livro_json(livro)
+
+
+def criar_livro(servidor, consulta, corpo):
+    titulo = _texto_obrigatorio(corpo, "titulo")
+    id_autor = _inteiro(corpo.get("id_autor"), "id_autor")
+    id_livro = servidor.agrupador.adicionar_livro(titulo, id_autor)
+    if id_livro is None:
+        raise ErroRequisicao(409, f"o autor {id_autor} não existe")
+    return 201, {"id_livro": id_livro, "titulo": titulo, "id_autor": id_autor}
+
+
+def alterar_livro(servidor, consulta, corpo, id_livro):
+    titulo = _texto_obrigatorio(corpo, "titulo")
+    id_autor = _inteiro(corpo.get("id_autor"), "id_autor")
+    if not db.atualizar_livro(id_livro, titulo, id_autor):
+        if db.buscar_livro_por_id(id_livro) is None:
+            raise ErroRequisicao(404, f"livro {id_livro} não encontrado")
+        raise ErroRequisicao(409, f"o autor {id_autor} não existe")
+    return 200, {"id_livro": id_livro, "titulo": titulo, "id_autor": id_autor}
+
+
+def remover_livro(servidor, consulta, corpo, id_livro):
+    if not db.deletar_livro(id_livro):
+        raise ErroRequisicao(404, f"livro {id_livro} não encontrado")
+    return 200, {"id_livro": id_livro}
+
+
+def estatisticas(servidor, consulta, corpo):
+    retrato = db.estatisticas_banco()
+    retrato["agrupador_escritas"] = servidor.agrupador.retrato()
+    retrato["catalogo"] = db.estatisticas_catalogo() # Contadores mantidos por triggers: O(1)
+    return 200, retrato
+
+
+ROTAS = [ # (método, caminho, função); um grupo no caminho vira o último argumento (int)
+    ("GET", r"/autores", listar_autores),
+    ("POST", r"/autores", criar_autor),
+    ("GET", r"/autores/(\d+)", obter_autor),
+    ("PUT", r"/autores/(\d+)", alterar_autor),
+    ("DELETE", r"/autores/(\d+)", remover_autor),
+    ("GET", r"/livros", listar_livros),
+    ("POST", r"/livros", criar_livro),
+    ("GET", r"/livros/(\d+)", obter_livro),
+    ("PUT", r"/livros/(\d+)", alterar_livro),
+    ("DELETE", r"/livros/(\d+)", remover_livro),
+    ("GET", r"/estatisticas", estatisticas),
+]
+ROTAS = [(metodo, re.compile(caminho + r"/?"), funcao) for metodo, caminho, funcao in ROTAS]
+
+
+# --- HTTP ---
+
+class ManipuladorRequisicoes(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Mantém a conexão aberta entre requisições (keep-alive)
+    timeout = TEMPO_OCIOSO_CONEXAO_S
+    server_version = "BibliotecaHTTP/1.0"
+
+    def do_GET(self):
+        self._atender("GET")
+
+    def do_POST(self):
+        self._atender("POST")
+
+    def do_PUT(self):
+        self._atender("PUT")
+
+    def do_DELETE(self):
+        self._atender("DELETE")
+
+    def _atender(self, metodo):
+        try:
+            status, resposta = self._rotear(metodo)
+        except ErroRequisicao as e:
+            status, resposta = e.status, {"erro": e.mensagem}
+        except db.BancoOcupadoError:
+            status, resposta = 503, {"erro": "banco de dados ocupado, tente novamente"}
+        except Exception as e: # Não derruba a thread: responde 500 e segue atendendo
+            self.log_error("Erro inesperado em %s %s: %r", metodo, self.path, e)
+            status, resposta = 500, {"erro": "erro interno do servidor"}
+        self._responder(status, resposta)
+
+    def _rotear(self, metodo):
+        partes = urlsplit(self.path)
+        caminho_existe = False
+        for metodo_rota, padrao, funcao in ROTAS:
+            casamento = padrao.fullmatch(partes.path)
+            if not casamento:
+                continue
+            caminho_existe = True
+            if metodo_rota != metodo:
+                continue
+            consulta = {chave: valores[-1] for chave, valores in parse_qs(partes.query).items()}
+            corpo = self._ler_corpo()
+            return funcao(self.server, consulta, corpo, *(int(grupo) for grupo in casamento.groups()))
+        if caminho_existe:
+            raise ErroRequisicao(405, f"método {metodo} não permitido em {partes.path}")
+        raise ErroRequisicao(404, f"rota {partes.path} não encontrada")
+
+    def _ler_corpo(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        if not tamanho:
+            return {}
+        try:
+            corpo = json.loads(self.rfile.read(tamanho))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise ErroRequisicao(400, f"JSON inválido: {e}") from None
+        if not isinstance(corpo, dict):
+            raise ErroRequisicao(400, "o corpo deve ser um objeto JSON")
+        return corpo
+
+    def _responder(self, status, resposta):
+        dados = json.dumps(resposta, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, formato, *args):
+        if self.server.registrar_acessos:
+            super().log_message(formato, *args)
+
+
+class ServidorBiblioteca(HTTPServer):
+    """
+    HTTPServer que atende cada conexão numa thread de um ThreadPoolExecutor de
+    tamanho fixo (em vez de criar uma thread por conexão, como o ThreadingHTTPServer).
+    Conexões keep-alive ocupam uma thread enquanto estiverem abertas.
+    """
+
+    def __init__(self, endereco, threads=8, janela_lote_ms=0.0, registrar_acessos=False):
+        super().__init__(endereco, ManipuladorRequisicoes)
+        self.pool_threads = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="ServidorHTTP")
+        self.agrupador = AgrupadorEscritas(janela_lote_ms)
+        self.registrar_acessos = registrar_acessos
+
+    def process_request(self, request, client_address):
+        self.pool_threads.submit(self._processar_na_thread, request, client_address)
+
+    def _processar_na_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool_threads.shutdown(wait=True)
+        self.agrupador.encerrar()
+
+
+def _acompanhar_mudancas():
+    """Thread do espelho: leva a ele as mudanças feitas no arquivo por outros processos."""
+    monitor = db.MonitorMudancas() # verificar() sincroniza o espelho quando o arquivo muda
+    while True:
+        monitor.verificar()
+        time.sleep(INTERVALO_MUDANCAS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON da biblioteca.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--threads", type=int, default=8, help="Threads que atendem as conexões")
+    parser.add_argument("--banco", default=db.DB_NAME, help="Arquivo do banco de dados")
+    parser.add_argument("--janela-lote", type=float, default=0.0,
+                        help="Milissegundos que o agrupador espera por mais inclusões antes de gravar")
+    parser.add_argument("--concorrente", action="store_true",
+                        help="Ativa WAL e busy_timeout (outros processos também usam o banco)")
+    parser.add_argument("--registrar-acessos", action="store_true", help="Imprime cada requisição atendida")
+    parser.add_argument("--espelho", action="store_true", help="Atende as leituras por uma cópia do banco em memória")
+    parser.add_argument("--instrumentar", action="store_true", help="Coleta métricas por função do database.py")
+    parser.add_argument("--capturar-sql", action="store_true",
+                        help="Com --instrumentar, registra o SQL das chamadas lentas no log ao lado do banco")
+    args = parser.parse_args()
+
+    db.DB_NAME = args.banco
+    if args.instrumentar:
+        db.configurar_instrumentacao(capturar_sql=args.capturar_sql)
+    if args.concorrente:
+        db.configurar_modo_concorrente()
+    db.criar_tabelas()
+    if args.espelho and db.ativar_espelho() is not None:
+        threading.Thread(target=_acompanhar_mudancas, name="EspelhoMudancas", daemon=True).start()
+
+    servidor = ServidorBiblioteca((args.host, args.porta), args.threads, args.janela_lote, args.registrar_acessos)
+    print(f"Servidor da biblioteca em http://{args.host}:{servidor.server_address[1]} "
+          f"({args.threads} threads, banco '{args.banco}'). Ctrl+C para encerrar.")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\nEncerrando...")
+    finally:
+        servidor.server_close()
+        db.fechar_conexoes()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+Testes do módulo database.py. Cada teste usa um arquivo de banco novo num
+diretório temporário.
+
+Uso (na pasta do projeto):
+    python -m pytest -q          ou          python -m unittest test_database
+"""
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import database as db
+import servidor
+
+
+class BancoTemporario(unittest.TestCase):
+    """Aponta o database para um arquivo temporário novo, com o esquema atual."""
+
+    criar_esquema = True
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp(prefix="teste_biblioteca_")
+        self.db_name_original = db.DB_NAME
+        db.fechar_conexoes()
+        db.invalidar_cache_autores()
+        db.DB_NAME = os.path.join(self.diretorio, "teste.db")
+        if self.criar_esquema:
+            self.silencioso(db.criar_tabelas)
+
+    def tearDown(self):
+        db.desativar_espelho()
+        db.fechar_conexoes()
+        db.invalidar_cache_autores()
+        db.DB_NAME = self.db_name_original
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    @staticmethod
+    def silencioso(funcao, *args):
+        """Chama funcao(*args) sem as mensagens que o database imprime no console."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            return funcao(*args)
+
+    def conexao_externa(self):
+        """Conexão que não passa pelo pool, como a de outra estação."""
+        conn = sqlite3.connect(db.DB_NAME)
+        conn.execute("PRAGMA foreign_keys = ON")
+        self.addCleanup(conn.close)
+        return conn
+
+    def objetos_do_esquema(self, tipo):
+        conn = self.conexao_externa()
+        return {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = ?", (tipo,))}
+
+
+class TesteMigracoes(BancoTemporario):
+    criar_esquema = False
+
+    def test_banco_novo_chega_a_versao_atual(self):
+        self.silencioso(db.criar_tabelas)
+        self.assertEqual(db.versao_esquema(), db.VERSAO_ESQUEMA)
+
+        indices = self.objetos_do_esquema("index")
+        self.assertIn("idx_livro_titulo", indices)                     # Migração 1
+        self.assertIn("idx_livro_autor_titulo", indices)               # Migração 3
+        self.assertNotIn("idx_livro_id_autor", indices)                # Substituído pela 3
+        self.assertIn("idx_autor_livros_count", indices)               # Migração 4
+        tabelas = self.objetos_do_esquema("table")
+        self.assertIn("estatisticas_catalogo", tabelas)                # Migração 4
+        self.assertIn("log_mudancas", tabelas)                         # Migração 5
+        gatilhos = self.objetos_do_esquema("trigger")
+        self.assertTrue({"livro_contadores_ai", "livro_contadores_ad", "livro_log_ai", "autor_log_au"} <= gatilhos)
+        if db._fts5_disponivel(sqlite3.connect(":memory:").cursor()):
+            self.assertIn("livro_fts", tabelas)                        # Migração 2
+
+    def test_banco_antigo_com_dados_e_migrado(self):
+        # Esquema original (versão 0), já com dados
+        conn = sqlite3.connect(db.DB_NAME)
+        conn.executescript("""
+            CREATE TABLE autor (id_autor INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL UNIQUE);
+            CREATE TABLE livro (id_livro INTEGER PRIMARY KEY AUTOINCREMENT, titulo TEXT NOT NULL,
+                                id_autor INTEGER NOT NULL REFERENCES autor(id_autor));
+            INSERT INTO autor (nome) VALUES ('Machado de Assis'), ('Clarice Lispector');
+            INSERT INTO livro (titulo, id_autor) VALUES ('Dom Casmurro', 1), ('Memórias Póstumas', 1),
+                                                        ('A Hora da Estrela', 2);
+        """)
+        conn.close()
+
+        self.assertTrue(self.silencioso(db.preparar_banco))
+        self.assertEqual(db.versao_esquema(), db.VERSAO_ESQUEMA)
+        self.assertEqual(db.verificar_contadores(), [])
+        totais = db.estatisticas_catalogo()
+        self.assertEqual((totais["livros"], totais["autores"]), (3, 2))
+        self.assertEqual(db.contar_livros_do_autor(1), 2)
+        self.assertEqual([livro[1] for livro in db.buscar_livros("casmurro")], ["Dom Casmurro"])
+
+    def test_preparar_banco_em_dia_nao_roda_ddl(self):
+        self.silencioso(db.criar_tabelas)
+        saida = io.StringIO()
+        with contextlib.redirect_stdout(saida):
+            self.assertTrue(db.preparar_banco())
+        self.assertNotIn("Migração", saida.getvalue())
+        self.assertEqual(db.versao_esquema(), db.VERSAO_ESQUEMA)
+
+    def test_migracao_com_erro_nao_avanca_a_versao(self):
+        self.silencioso(db.criar_tabelas)
+
+        def migracao_com_erro(cursor):
+            cursor.execute("CREATE TABLE temporaria_da_migracao (x)")
+            cursor.execute("SELECT * FROM tabela_que_nao_existe")
+
+        migracoes = db.MIGRACOES + [(db.VERSAO_ESQUEMA + 1, "Migração com erro", migracao_com_erro)]
+        with mock.patch.object(db, "MIGRACOES", migracoes):
+            self.assertFalse(self.silencioso(db.aplicar_migracoes))
+        self.assertEqual(db.versao_esquema(), db.VERSAO_ESQUEMA)
+        self.assertNotIn("temporaria_da_migracao", self.objetos_do_esquema("table"))
+
+
+class TesteTransacao(BancoTemporario):
+
+    def test_commit_unico_no_fim_do_bloco(self):
+        with db.transacao() as tx:
+            id_autor = db.adicionar_autor("Cecília Meireles")
+            for titulo in ("Romanceiro da Inconfidência", "Ou Isto ou Aquilo", "Viagem"):
+                db.adicionar_livro(titulo, id_autor)
+            # Dentro do bloco, nada foi confirmado para as outras conexões
+            self.assertEqual(self.conexao_externa().execute("SELECT COUNT(*) FROM livro").fetchone()[0], 0)
+            self.assertEqual(db.contar_livros_do_autor(id_autor), 3) # A própria transação enxerga
+        self.assertEqual(tx.operacoes, 5) # 1 autor + 3 livros + 1 contagem
+        self.assertEqual(self.conexao_externa().execute("SELECT COUNT(*) FROM livro").fetchone()[0], 3)
+        self.assertEqual(db.listar_autores(), [(id_autor, "Cecília Meireles")])
+
+    def test_excecao_desfaz_tudo(self):
+        with self.assertRaises(RuntimeError):
+            with db.transacao():
+                id_autor = db.adicionar_autor("Graciliano Ramos")
+                db.adicionar_livro("Vidas Secas", id_autor)
+                raise RuntimeError("desistiu")
+        self.assertEqual(db.listar_autores(), []) # O cache também não guarda o autor desfeito
+        self.assertEqual(db.listar_livros_pagina(), [])
+        self.assertEqual(db.verificar_contadores(), [])
+
+    def test_desfazer_sem_excecao(self):
+        with db.transacao() as tx:
+            db.adicionar_autor("Jorge Amado")
+            tx.desfazer()
+        self.assertEqual(db.listar_autores(), [])
+
+    def test_operacao_que_falha_desfaz_so_a_sua_parte(self):
+        id_existente = db.adicionar_autor("Rachel de Queiroz")
+        with db.transacao():
+            id_novo = db.adicionar_autor("Lygia Fagundes Telles")
+            self.assertIsNone(self.silencioso(db.adicionar_autor, "Rachel de Queiroz")) # UNIQUE
+            db.adicionar_livro("As Meninas", id_novo)
+        self.assertEqual(sorted(db.listar_autores()), sorted([(id_existente, "Rachel de Queiroz"),
+                                                             (id_novo, "Lygia Fagundes Telles")]))
+        self.assertEqual(db.contar_livros_do_autor(id_novo), 1)
+
+    def test_transacao_aninhada_participa_da_de_fora(self):
+        with self.assertRaises(RuntimeError):
+            with db.transacao() as externa:
+                with db.transacao() as interna:
+                    self.assertIs(interna, externa)
+                    db.adicionar_autor("Érico Veríssimo")
+                raise RuntimeError("desistiu")
+        self.assertEqual(db.listar_autores(), [])
+
+
+class TesteContadores(BancoTemporario):
+
+    def test_contadores_acompanham_as_escritas(self):
+        machado = db.adicionar_autor("Machado de Assis")
+        clarice = db.adicionar_autor("Clarice Lispector")
+        self.assertEqual(db.adicionar_livros_em_lote([(f"Livro {i}", machado) for i in range(10)]), (10, []))
+        ids = [livro[0] for livro in db.listar_livros_com_autor()]
+        db.adicionar_livro("A Hora da Estrela", clarice)
+        db.deletar_livro(ids[0])
+        db.reatribuir_livros_em_lote(ids[1:4], clarice)
+        db.atualizar_livro(ids[4], "Livro 4 (revisto)", clarice)
+        db.deletar_livros_em_lote(ids[8:])
+        temporario = db.adicionar_autor("Autor Sem Livros")
+        db.deletar_autor(temporario)
+
+        self.assertEqual(db.verificar_contadores(), [])
+        self.assertEqual(db.contar_livros_do_autor(machado), 3)
+        self.assertEqual(db.contar_livros_do_autor(clarice), 5)
+        totais = db.estatisticas_catalogo()
+        self.assertEqual((totais["livros"], totais["autores"]), (8, 2))
+        self.assertEqual(totais["top_autores"][0][:2], (clarice, "Clarice Lispector"))
+
+    def test_divergencia_detectada_e_reconstruida(self):
+        id_autor = db.adicionar_autor("Cora Coralina")
+        db.adicionar_livro("Poemas dos Becos de Goiás", id_autor)
+        conn = self.conexao_externa()
+        conn.execute("UPDATE autor SET livros_count = 7 WHERE id_autor = ?", (id_autor,))
+        conn.execute("UPDATE estatisticas_catalogo SET valor = 0 WHERE chave = 'livros'")
+        conn.commit()
+
+        self.assertEqual(sorted(db.verificar_contadores(), key=str), sorted([(id_autor, 7, 1), ("livros", 0, 1)], key=str))
+        self.assertTrue(db.reconstruir_contadores())
+        self.assertEqual(db.verificar_contadores(), [])
+
+
+class TesteEspelho(BancoTemporario):
+
+    def setUp(self):
+        super().setUp()
+        self.machado = db.adicionar_autor("Machado de Assis")
+        db.adicionar_livro("Dom Casmurro", self.machado)
+        self.assertIsNotNone(db.ativar_espelho())
+
+    def titulos(self):
+        return [livro[1] for livro in db.listar_livros_pagina()]
+
+    def test_escritas_pelo_modulo_chegam_ao_espelho(self):
+        id_livro = db.adicionar_livro("Quincas Borba", self.machado)
+        self.assertEqual(self.titulos(), ["Dom Casmurro", "Quincas Borba"])
+        db.atualizar_livro(id_livro, "Quincas Borba (2ª ed.)", self.machado)
+        self.assertEqual(self.titulos(), ["Dom Casmurro", "Quincas Borba (2ª ed.)"])
+        db.deletar_livro(id_livro)
+        self.assertEqual(self.titulos(), ["Dom Casmurro"])
+        self.assertEqual(db.estatisticas_catalogo()["livros"], 1) # Contadores do espelho em dia
+
+    def test_escrita_externa_so_aparece_depois_de_sincronizar(self):
+        conn = self.conexao_externa()
+        conn.execute("INSERT INTO livro (titulo, id_autor) VALUES ('Helena', ?)", (self.machado,))
+        conn.execute("UPDATE autor SET nome = 'J. M. Machado de Assis' WHERE id_autor = ?", (self.machado,))
+        conn.commit()
+        self.assertEqual(self.titulos(), ["Dom Casmurro"]) # As leituras vão mesmo para o espelho
+
+        self.assertTrue(db.sincronizar_espelho())
+        livros = db.listar_livros_pagina()
+        self.assertEqual([livro[1] for livro in livros], ["Dom Casmurro", "Helena"])
+        self.assertEqual({livro[2] for livro in livros}, {"J. M. Machado de Assis"})
+        self.assertEqual([livro[1] for livro in db.buscar_livros("helena")], ["Helena"]) # FTS do espelho
+
+    def test_registro_podado_recarrega_o_espelho(self):
+        conn = self.conexao_externa()
+        conn.execute("INSERT INTO livro (titulo, id_autor) VALUES ('Iaiá Garcia', ?)", (self.machado,))
+        conn.execute("INSERT INTO livro (titulo, id_autor) VALUES ('Esaú e Jacó', ?)", (self.machado,))
+        conn.execute("DELETE FROM log_mudancas WHERE seq < (SELECT MAX(seq) FROM log_mudancas)") # Como a poda
+        conn.commit()
+        recargas = db.estatisticas_espelho()["recargas"]
+
+        self.assertTrue(self.silencioso(db.sincronizar_espelho))
+        self.assertEqual(db.estatisticas_espelho()["recargas"], recargas + 1)
+        self.assertEqual(self.titulos(), ["Dom Casmurro", "Esaú e Jacó", "Iaiá Garcia"])
+
+    def test_desativar_volta_a_ler_do_arquivo(self):
+        conn = self.conexao_externa()
+        conn.execute("INSERT INTO livro (titulo, id_autor) VALUES ('Helena', ?)", (self.machado,))
+        conn.commit()
+        db.desativar_espelho()
+        self.assertFalse(db.estatisticas_espelho()["ativo"])
+        self.assertEqual(self.titulos(), ["Dom Casmurro", "Helena"])
+
+    def test_recarga_com_leitores_em_outras_threads(self):
+        db.adicionar_livros_em_lote([(f"Livro {i:04d}", self.machado) for i in range(2999)])
+        primeira_leitura, parar = threading.Event(), threading.Event()
+        tamanhos, erros = set(), []
+
+        def leitor():
+            try:
+                while not parar.is_set():
+                    tamanhos.add(len(db.listar_livros_pagina(None, 2000)))
+                    primeira_leitura.set()
+            except Exception as e:
+                erros.append(e)
+            finally:
+                primeira_leitura.set()
+
+        thread = threading.Thread(target=leitor, daemon=True)
+        thread.start()
+        primeira_leitura.wait(10)
+        # A recarga não pode fechar a conexão que o leitor está usando no meio da consulta
+        for _ in range(20):
+            self.assertTrue(db.recarregar_espelho())
+        parar.set()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(erros, [])
+        self.assertEqual(tamanhos, {2000})
+
+
+class TestePaginacaoPorChave(BancoTemporario):
+
+    def setUp(self):
+        super().setUp()
+        self.autor_a = db.adicionar_autor("Autora A")
+        self.autor_b = db.adicionar_autor("Autor B")
+        # Títulos repetidos: o id_livro desempata a ordem e a chave da página
+        titulos = ["Contos", "Contos", "Contos", "Poemas", "Antologia", "Poemas", "Zebra"]
+        db.adicionar_livros_em_lote([(titulo, self.autor_a if i % 2 else self.autor_b) for i, titulo in enumerate(titulos)])
+        self.todos = db.listar_livros_com_autor()
+
+    def paginas(self, buscar_pagina, chave_de, limite):
+        paginas, apos = [], None
+        while True:
+            pagina = buscar_pagina(apos, limite)
+            paginas.append(list(pagina))
+            if len(pagina) < limite:
+                return paginas
+            apos = chave_de(pagina[-1])
+
+    def test_paginas_de_livros_cobrem_o_catalogo_sem_repetir(self):
+        for limite in (1, 2, 3, 7, 8):
+            with self.subTest(limite=limite):
+                paginas = self.paginas(db.listar_livros_pagina, lambda livro: (livro[1], livro[0]), limite)
+                self.assertEqual([livro for pagina in paginas for livro in pagina], self.todos)
+                self.assertTrue(all(len(pagina) == limite for pagina in paginas[:-1]))
+
+    def test_catalogo_multiplo_do_limite_termina_em_pagina_vazia(self):
+        paginas = self.paginas(db.listar_livros_pagina, lambda livro: (livro[1], livro[0]), 7)
+        self.assertEqual([len(pagina) for pagina in paginas], [7, 0])
+        ultimo = self.todos[-1]
+        self.assertEqual(db.listar_livros_pagina((ultimo[1], ultimo[0])), [])
+
+    def test_consultar_livros_decrescente_por_autor(self):
+        esperado = sorted(self.todos, key=lambda livro: (livro[2], livro[1], livro[0]), reverse=True)
+
+        def pagina(apos, limite):
+            return db.consultar_livros("nome_autor", decrescente=True, apos=apos, limite=limite)
+
+        paginas = self.paginas(pagina, lambda livro: db.chave_ordenacao(livro, "nome_autor"), 2)
+        self.assertEqual([livro for pagina in paginas for livro in pagina], esperado)
+
+    def test_pagina_de_autores_do_servidor(self):
+        for nome in ("Carla", "Bruno", "Diana"):
+            db.adicionar_autor(nome)
+        nomes = [nome for _id, nome in db.listar_autores()]
+
+        vistos, consulta = [], {"limite": "2"}
+        while True:
+            _status, resposta = servidor.listar_autores(None, consulta, None)
+            vistos.extend(autor["nome"] for autor in resposta["itens"])
+            if resposta["proximo"] is None:
+                break
+            consulta = {"limite": "2", "apos": resposta["proximo"]["apos"]}
+        self.assertEqual(vistos, nomes)
+        # Última página exatamente cheia: sem 'proximo' apontando para uma página vazia
+        _status, resposta = servidor.listar_autores(None, {"limite": "2", "apos": nomes[-3]}, None)
+        self.assertEqual([autor["nome"] for autor in resposta["itens"]], nomes[-2:])
+        self.assertIsNone(resposta["proximo"])
+
+
+if __name__ == "__main__":
+    unittest.main()
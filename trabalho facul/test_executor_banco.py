@@ -0,0 +1,84 @@
+"""
+Testes do ExecutorBanco sem janela: uma raiz falsa guarda o after() agendado e
+o teste chama a verificação de respostas diretamente.
+
+Uso (na pasta do projeto):
+    python -m pytest -q          ou          python -m unittest test_executor_banco
+"""
+import contextlib
+import io
+import time
+import unittest
+
+from executor_banco import ExecutorBanco
+
+
+class RaizFalsa:
+    """Só o que o ExecutorBanco usa da raiz do Tk."""
+
+    def __init__(self):
+        self.agendados = []
+
+    def after(self, _intervalo_ms, funcao):
+        self.agendados.append(funcao)
+        return len(self.agendados)
+
+    def after_cancel(self, _id):
+        pass
+
+
+class TesteVerificacaoDeRespostas(unittest.TestCase):
+
+    def setUp(self):
+        self.raiz = RaizFalsa()
+        self.ocupado = []
+        self.executor = ExecutorBanco(self.raiz, ao_mudar_ocupado=self.ocupado.append)
+        self.addCleanup(self.executor.encerrar)
+
+    def esperar_respostas(self, quantidade):
+        limite = time.monotonic() + 5
+        while self.executor.respostas.qsize() < quantidade and time.monotonic() < limite:
+            time.sleep(0.005)
+        self.assertEqual(self.executor.respostas.qsize(), quantidade)
+
+    def verificar(self):
+        agendados = len(self.raiz.agendados)
+        saida = io.StringIO()
+        with contextlib.redirect_stdout(saida):
+            self.executor._verificar_respostas()
+        self.assertEqual(len(self.raiz.agendados), agendados + 1) # A verificação seguinte foi agendada
+        return saida.getvalue()
+
+    def test_callback_com_erro_nao_para_as_respostas_seguintes(self):
+        recebidos = []
+
+        def callback_com_erro(_resultado):
+            raise RuntimeError("widget destruído")
+
+        def falha():
+            raise ValueError("consulta falhou")
+
+        self.executor.submeter(lambda: 1, ao_concluir=callback_com_erro)
+        self.executor.submeter(falha, ao_falhar=callback_com_erro)
+        self.executor.submeter(lambda: 3, ao_concluir=recebidos.append)
+        self.esperar_respostas(3)
+
+        saida = self.verificar()
+        self.assertEqual(recebidos, [3])
+        self.assertEqual(saida.count("widget destruído"), 2)
+        self.assertEqual(self.executor.pendentes, 0)
+        self.assertEqual(self.ocupado, [True, False]) # O indicador de atividade foi desligado
+
+    def test_erro_no_tratador_padrao(self):
+        def tratador_com_erro(_erro):
+            raise RuntimeError("tratador quebrado")
+
+        self.executor.ao_falhar_padrao = tratador_com_erro
+        self.executor.submeter(lambda: 1 / 0)
+        self.esperar_respostas(1)
+        self.assertIn("tratador quebrado", self.verificar())
+        self.assertEqual(self.executor.pendentes, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
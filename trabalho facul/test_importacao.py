@@ -0,0 +1,58 @@
+"""
+Testes do importacao.py sobre um banco temporário (ver test_database.BancoTemporario).
+
+Uso (na pasta do projeto):
+    python -m pytest -q          ou          python -m unittest test_importacao
+"""
+import csv
+import os
+import unittest
+from unittest import mock
+
+import database as db
+import importacao
+from test_database import BancoTemporario
+
+
+class TesteCacheDeAutores(BancoTemporario):
+
+    def escrever_csv(self, linhas):
+        caminho = os.path.join(self.diretorio, "catalogo.csv")
+        with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+            escritor = csv.writer(arquivo)
+            escritor.writerow(["titulo", "autor"])
+            escritor.writerows(linhas)
+        return caminho
+
+    def test_cache_limitado_entre_blocos(self):
+        # 40 autores em blocos de 10 linhas; o cache guarda só 5 entre um bloco e outro,
+        # então os autores que voltam a aparecer precisam ser achados de novo no banco
+        linhas = [(f"Livro {i}", f"Autor {i % 40:02d}") for i in range(120)]
+        tamanhos = []
+        aparar = importacao._CacheAutores.aparar
+
+        def aparar_e_medir(cache):
+            aparar(cache)
+            tamanhos.append(len(cache))
+
+        with mock.patch.object(importacao, "MAX_AUTORES_EM_CACHE", 5), \
+                mock.patch.object(importacao._CacheAutores, "aparar", aparar_e_medir):
+            relatorio = importacao.importar_catalogo(self.escrever_csv(linhas), tamanho_lote=10)
+
+        self.assertEqual(relatorio["total_rejeitadas"], 0)
+        self.assertEqual(relatorio["livros_inseridos"], 120)
+        self.assertEqual(relatorio["autores_inseridos"], 40) # Nenhum autor criado duas vezes
+        self.assertEqual(max(tamanhos), 5)
+        self.assertEqual(db.verificar_contadores(), [])
+        self.assertEqual({db.contar_livros_do_autor(id_autor) for id_autor, _nome in db.listar_autores()}, {3})
+
+    def test_aparar_descarta_os_usados_ha_mais_tempo(self):
+        cache = importacao._CacheAutores(limite=2)
+        cache.update({"A": 1, "B": 2, "C": 3})
+        cache.usar(["A", "inexistente"])
+        cache.aparar()
+        self.assertEqual(list(cache.items()), [("C", 3), ("A", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()